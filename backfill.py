@@ -0,0 +1,230 @@
+"""
+Rattrapage de l'historique d'un canal après un redémarrage ou une reconnexion.
+
+Le dernier ID de message traité est persisté par canal. Au démarrage (ou à la
+reconnexion), les messages arrivés pendant l'interruption sont relus par lots
+d'IDs explicites avec `get_messages(ids=...)` (les bots n'ont pas accès à
+l'historique par `limit`/`min_id`) puis passés, dans l'ordre, au même pipeline
+que les messages en direct. La borne haute est l'ID du premier message reçu en
+direct ; sinon la fin du canal est estimée par sondage exponentiel (quelques
+requêtes) et seuls les `max_gap` derniers IDs sont lus. Un écart trop grand est
+tronqué aux messages les plus récents (`max_gap`).
+
+Les `overlap` derniers messages déjà traités sont relus (éditions pendant
+l'interruption). Le cache d'empreintes des éditions est en mémoire : après un
+redémarrage, ces messages repassent entièrement dans le pipeline.
+"""
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+PROBE_STEPS = 16  # Sondage exponentiel jusqu'à max_gap × 2^15 IDs au-delà du dernier traité
+
+
+class BackfillEvent:
+    """Événement minimal pour rejouer un message de l'historique dans le pipeline"""
+
+    __slots__ = ("chat_id", "message")
+
+    def __init__(self, chat_id: int, message):
+        self.chat_id = chat_id
+        self.message = message
+
+
+class HistoryBackfill:
+    """Suivi du dernier message traité par canal et rattrapage de l'écart"""
+
+    def __init__(self, client, path: str = os.path.join("data", "last_message_ids.json"),
+                 max_gap: int = 500, batch_size: int = 100, overlap: int = 10,
+                 save_interval: float = 5.0):
+        """
+        Args:
+            client: Client Telegram (get_messages)
+            path: Fichier JSON des derniers IDs traités {chat_id: message_id}
+            max_gap: Nombre maximal de messages rattrapés (les plus récents sont gardés)
+            batch_size: IDs demandés par appel à get_messages
+            overlap: Messages déjà traités relus en plus (éditions pendant l'interruption)
+            save_interval: Intervalle minimal entre deux écritures du fichier
+        """
+        self.client = client
+        self.path = path
+        self.max_gap = max_gap
+        self.batch_size = batch_size
+        self.overlap = overlap
+        self.save_interval = save_interval
+        self.last_ids: Dict[str, int] = {}
+        self._saved_at = 0.0
+        self._dirty = False
+        self.stats = {
+            "runs": 0, "fetched": 0, "processed": 0, "skipped_over_gap": 0,
+            "requests": 0, "errors": 0, "last_duration": 0.0, "last_rate": 0.0,
+        }
+        self.load()
+
+    # --- Persistance ---
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.last_ids = {str(k): int(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            print(f"⚠️ Erreur chargement des derniers messages traités: {e}")
+            self.last_ids = {}
+
+    def save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.last_ids, f)
+            os.replace(tmp_path, self.path)
+            self._saved_at = time.monotonic()
+            self._dirty = False
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde des derniers messages traités: {e}")
+
+    def flush(self):
+        """Écrit le fichier si des IDs ont changé depuis la dernière sauvegarde"""
+        if self._dirty:
+            self.save()
+
+    def last_processed(self, chat_id: int) -> Optional[int]:
+        return self.last_ids.get(str(chat_id))
+
+    def mark_processed(self, chat_id: int, message_id: int):
+        """Enregistre un message traité (écriture disque au plus toutes les save_interval secondes)"""
+        key = str(chat_id)
+        if message_id <= self.last_ids.get(key, 0):
+            return
+        self.last_ids[key] = message_id
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    # --- Rattrapage ---
+    async def _fetch(self, chat_id: int, ids: List[int]) -> List[Any]:
+        """Messages existants parmi `ids` (channels.getMessages, autorisé aux bots)"""
+        batch = await self.client.get_messages(chat_id, ids=ids)
+        self.stats["requests"] += 1
+        return [message for message in batch if message is not None]
+
+    async def _find_tip(self, chat_id: int, last_id: int) -> Optional[int]:
+        """Estime le dernier ID du canal quand il est à plus de max_gap IDs de `last_id`
+
+        Un appel sonde last_id + max_gap × 2^k, puis chaque appel suivant sonde
+        batch_size IDs régulièrement espacés dans l'intervalle restant : quelques
+        requêtes au lieu d'une par lot d'IDs. Retourne None si l'écart tient dans max_gap.
+        """
+        points = [last_id + self.max_gap * 2 ** step for step in range(PROBE_STEPS)]
+        found = await self._fetch(chat_id, points)
+        if not found:
+            return None
+        low = max(message.id for message in found)
+        high = next((point for point in points if point > low), low * 2)
+        while high - low > self.batch_size:
+            step = (high - low) / self.batch_size
+            points = sorted({low + int(step * index) for index in range(1, self.batch_size)})
+            found = await self._fetch(chat_id, points)
+            if found:
+                low = max(message.id for message in found)
+                high = next((point for point in points if point > low), high)
+            else:
+                high = points[0]
+        return low
+
+    async def _probe(self, chat_id: int, last_id: int) -> Tuple[List[Any], int]:
+        """Lit l'écart sans borne haute connue; retourne les messages (au plus max_gap après
+        `last_id`, plus les `overlap` relus) et le nombre de messages écartés
+        """
+        tip = await self._find_tip(chat_id, last_id)
+        first_id = max(1, last_id - self.overlap + 1)
+        skipped = 0
+        if tip is not None:
+            # Écart trop grand: seuls les max_gap derniers IDs sont lus
+            first_id = tip - self.max_gap + 1
+            skipped = first_id - last_id - 1
+        known_id = tip or last_id
+        messages: Deque[Any] = deque()
+        cursor = first_id
+        while True:
+            found = await self._fetch(chat_id, list(range(cursor, cursor + self.batch_size)))
+            cursor += self.batch_size
+            self.stats["fetched"] += len(found)
+            messages.extend(found)
+            if cursor > known_id + 1 and not any(message.id > known_id for message in found):
+                break
+            if tip is None and cursor > last_id + self.max_gap:
+                break
+        while sum(1 for message in messages if message.id > last_id) > self.max_gap:
+            if messages.popleft().id > last_id:
+                skipped += 1
+        return list(messages), skipped
+
+    async def catch_up(self, chat_id: int, handler: Callable[[Any], Awaitable[None]],
+                       upper_bound: Optional[int] = None) -> int:
+        """Rejoue dans l'ordre les messages arrivés depuis le dernier traité; retourne leur nombre
+
+        Les bots n'ont pas accès à messages.getHistory : l'écart est relu par IDs
+        explicites. `upper_bound` est l'ID du premier message reçu en direct
+        (exclu); sans lui, les IDs sont sondés par lots jusqu'à un lot vide.
+        """
+        started_at = time.perf_counter()
+        self.stats["runs"] += 1
+        processed = 0
+        try:
+            last_id = self.last_processed(chat_id)
+            if last_id is None:
+                # Premier démarrage sur ce canal: rien à rattraper, le premier message en direct sert de repère
+                return 0
+            if upper_bound is not None and upper_bound <= last_id + 1:
+                return 0
+
+            first_id = max(1, last_id - self.overlap + 1)
+            if upper_bound is None:
+                messages, skipped = await self._probe(chat_id, last_id)
+            else:
+                skipped = 0
+                if upper_bound - first_id > self.max_gap:
+                    skipped = max(0, upper_bound - 1 - self.max_gap - last_id)
+                    first_id = upper_bound - self.max_gap
+                messages = []
+                for cursor in range(first_id, upper_bound, self.batch_size):
+                    found = await self._fetch(chat_id, list(range(cursor, min(cursor + self.batch_size, upper_bound))))
+                    self.stats["fetched"] += len(found)
+                    messages.extend(found)
+            if skipped:
+                self.stats["skipped_over_gap"] += skipped
+                print(f"⚠️ {skipped} messages manqués sur {chat_id} au-delà de l'écart maximal, "
+                      f"seuls les {self.max_gap} plus récents sont rattrapés")
+
+            if not any(message.id > last_id for message in messages):
+                return 0
+            print(f"⏪ Rattrapage du canal {chat_id}: messages {messages[0].id} à {messages[-1].id}")
+            for message in messages:
+                if getattr(message, 'message', None):
+                    await handler(BackfillEvent(chat_id, message))
+                    processed += 1
+
+            self.mark_processed(chat_id, messages[-1].id)
+            self.flush()
+            return processed
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"❌ Erreur rattrapage du canal {chat_id}: {e}")
+            return processed
+        finally:
+            duration = time.perf_counter() - started_at
+            self.stats["processed"] += processed
+            self.stats["last_duration"] = round(duration, 3)
+            self.stats["last_rate"] = round(processed / duration, 1) if duration > 0 and processed else 0.0
+            if processed:
+                print(f"✅ Rattrapage terminé: {processed} message(s) en {duration:.2f}s")
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        status["channels"] = dict(self.last_ids)
+        return status
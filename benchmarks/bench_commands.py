@@ -0,0 +1,111 @@
+"""
+Benchmark du coût de répartition d'une commande par message.
+
+Compare le répartiteur (premier mot extrait une fois, table à correspondance
+exacte) avec l'ancienne approche où chaque motif regex enregistré était
+évalué sur chaque message. Les deux approches alternent sur plusieurs tours ;
+le meilleur tour de chacune est retenu.
+
+Usage: python benchmarks/bench_commands.py [--messages 200000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands import CommandDispatcher
+
+ADMIN_ID = 42
+LEGACY_PATTERNS = [
+    r'/set_stat (-?\d+)', r'/set_display (-?\d+)', '/start', '/status', '/reset',
+    '/test_invite', '/sta', '/report', '/scheduler', '/schedule_info', '/intervalle', '/deploy',
+]
+SAMPLES = [
+    "/status", "/start", "/sta", "/report", "/scheduler status", "/scheduler start -1001 -1002",
+    "/schedule_info", "/intervalle 5", "/set_stat -1001234567890", "/deploy",
+    "#N512. ✅3(K♠️8♥️) - 1(9♦️)", "bonjour", "/inconnue",
+]
+
+
+class FakeMessage:
+    __slots__ = ("message",)
+
+    def __init__(self, text: str):
+        self.message = text
+
+
+class FakeEvent:
+    def __init__(self, text: str):
+        self.message = FakeMessage(text)
+        self.sender_id = ADMIN_ID
+
+    async def respond(self, text):
+        pass
+
+
+async def run(args):
+    random.seed(args.seed)
+    texts = [random.choice(SAMPLES) for _ in range(args.messages)]
+    calls = {"trie": 0, "legacy": 0}
+
+    async def handler(event):
+        calls["trie"] += 1
+
+    async def legacy_handler(event):
+        calls["legacy"] += 1
+
+    dispatcher = CommandDispatcher(ADMIN_ID)
+    for pattern in LEGACY_PATTERNS:
+        name = pattern.split()[0]
+        options = {"args_pattern": r'(-?\d+)'} if ' ' in pattern else {}
+        dispatcher.register(name, handler, **options)
+
+    events = [FakeEvent(text) for text in texts]
+    legacy = [re.compile(p) for p in LEGACY_PATTERNS]
+
+    async def table_round():
+        for event in events:
+            await dispatcher.dispatch(event)
+
+    async def legacy_round():
+        for event in events:
+            # Comme Telethon: chaque motif est évalué et chaque correspondance exécute son handler
+            text = event.message.message
+            for pattern in legacy:
+                match = pattern.match(text)
+                if match:
+                    event.pattern_match = match
+                    await legacy_handler(event)
+
+    table_time = legacy_time = float("inf")
+    for _ in range(args.rounds):
+        calls["trie"] = calls["legacy"] = 0
+        start = time.perf_counter()
+        await table_round()
+        table_time = min(table_time, time.perf_counter() - start)
+        start = time.perf_counter()
+        await legacy_round()
+        legacy_time = min(legacy_time, time.perf_counter() - start)
+
+    n = args.messages
+    print(f"Messages: {n} (meilleur de {args.rounds} tours)")
+    print(f"Table:  {table_time / n * 1e6:.2f}µs/message  handlers exécutés: {calls['trie']}")
+    print(f"Regex:  {legacy_time / n * 1e6:.2f}µs/message  handlers exécutés: {calls['legacy']} "
+          f"(/sta et /scheduler déclenchés en double)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
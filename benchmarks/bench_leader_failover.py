@@ -0,0 +1,91 @@
+"""
+Mesure du temps de reprise du bail de leader entre plusieurs processus.
+
+Démarre N instances qui se disputent le même bail SQLite, tue brutalement
+(SIGKILL) le leader et mesure le délai avant qu'un suiveur prenne la main.
+Vérifie aussi que le jeton de fencing augmente à chaque bascule.
+
+Usage: python benchmarks/bench_leader_failover.py [--replicas 3] [--ttl 2] [--rounds 3]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leader_lease import LeaderLease
+
+
+def replica(db_path: str, ttl: float):
+    """Processus instance: heartbeat du bail"""
+    lease = LeaderLease(db_path, ttl_seconds=ttl, holder_id=str(os.getpid()))
+    asyncio.run(lease.run())
+
+
+def wait_for_leader(db_path: str, exclude=None, timeout: float = 60.0):
+    """Observe la ligne du bail jusqu'à ce qu'un détenteur valide (autre que exclude) apparaisse"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with sqlite3.connect(db_path, timeout=5.0) as conn:
+                row = conn.execute("SELECT holder, token, expires_at FROM lease").fetchone()
+        except sqlite3.Error:
+            row = None
+        now = time.time()
+        if row and row[0] and row[2] > now and int(row[0]) != exclude:
+            return int(row[0]), row[1], now
+        time.sleep(0.01)
+    raise TimeoutError("Aucun leader élu")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--ttl", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "leader.db")
+        processes = {}
+
+        def spawn():
+            process = multiprocessing.Process(target=replica, args=(db_path, args.ttl), daemon=True)
+            process.start()
+            processes[process.pid] = process
+
+        for _ in range(args.replicas):
+            spawn()
+
+        leader, token, _ = wait_for_leader(db_path)
+        print(f"Leader initial: pid {leader} (jeton {token})")
+
+        takeovers = []
+        for round_number in range(1, args.rounds + 1):
+            killed_at = time.time()
+            os.kill(leader, signal.SIGKILL)
+            processes.pop(leader).join()
+            new_leader, new_token, elected_at = wait_for_leader(db_path, exclude=leader)
+            takeover = elected_at - killed_at
+            takeovers.append(takeover)
+            print(f"Bascule {round_number}: pid {leader} → {new_leader}, "
+                  f"jeton {token} → {new_token}, reprise en {takeover:.2f}s")
+            assert new_token > token, "Le jeton de fencing doit augmenter"
+            leader, token = new_leader, new_token
+            spawn()
+
+        for process in processes.values():
+            process.terminate()
+
+    print(f"TTL: {args.ttl:.1f}s, reprise moyenne: {sum(takeovers) / len(takeovers):.2f}s, "
+          f"max: {max(takeovers):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Coût par échantillon de l'instrumentation (compteurs, histogrammes, mesure en ligne).
+
+Objectif: moins d'une microseconde par échantillon sur le chemin critique.
+
+Usage: python benchmarks/bench_metrics.py [--samples 1000000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry
+
+
+def per_sample(func, samples: int) -> float:
+    started_at = time.perf_counter()
+    func(samples)
+    return (time.perf_counter() - started_at) / samples * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=1000000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    counter = registry.counter("bench_total", "bench", ["kind"]).labels("stat")
+    histogram = registry.histogram("bench_seconds", "bench", ["kind"]).labels("stat")
+    values = [random.random() * 0.05 for _ in range(1024)]
+
+    def empty_loop(n):
+        for i in range(n):
+            pass
+
+    def count(n):
+        inc = counter.inc
+        for i in range(n):
+            inc()
+
+    def observe(n):
+        obs = histogram.observe
+        for i in range(n):
+            obs(values[i & 1023])
+
+    def perf_counter_pair(n):
+        clock = time.perf_counter
+        for i in range(n):
+            obs_start = clock()
+            histogram.observe(clock() - obs_start)
+
+    baseline = per_sample(empty_loop, args.samples)
+    print(f"Boucle vide:               {baseline:7.1f} ns")
+    print(f"Counter.inc:               {per_sample(count, args.samples) - baseline:7.1f} ns")
+    print(f"Histogram.observe:         {per_sample(observe, args.samples) - baseline:7.1f} ns")
+    print(f"perf_counter x2 + observe: {per_sample(perf_counter_pair, args.samples) - baseline:7.1f} ns")
+
+    async def plain():
+        pass
+
+    async def inline():
+        """Mesure en ligne, comme les handlers de main.py"""
+        started_at = time.perf_counter()
+        try:
+            pass
+        finally:
+            histogram.observe(time.perf_counter() - started_at)
+
+    async def run(func, n):
+        started_at = time.perf_counter()
+        for _ in range(n):
+            await func()
+        return (time.perf_counter() - started_at) / n * 1e9
+
+    n = args.samples // 10
+    overhead = asyncio.run(run(inline, n)) - asyncio.run(run(plain, n))
+    print(f"Mesure en ligne:           {overhead:7.1f} ns")
+    print(f"Export /metrics:           {len(registry.render())} octets")
+
+
+if __name__ == "__main__":
+    main()
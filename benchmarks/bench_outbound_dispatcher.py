@@ -0,0 +1,114 @@
+"""
+Test de charge de la file d'envoi sortante.
+
+Un faux client Telegram simule la latence réseau et injecte des FloodWait.
+On mesure :
+- le temps de soumission côté handler (doit rester négligeable),
+- le débit réel par chat et global face à la limitation,
+- le nombre de FloodWait et de nouvelles tentatives,
+- l'ordre de priorité (les prédictions passent avant les rapports).
+
+Usage: python benchmarks/bench_outbound_dispatcher.py [--chats 20] [--messages 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telethon.errors import FloodWaitError
+
+from outbound import OutboundDispatcher, PRIORITY_PREDICTION, PRIORITY_REPORT
+
+
+class FakeMessage:
+    def __init__(self, chat_id: int, message_id: int):
+        self.chat_id = chat_id
+        self.id = message_id
+
+
+class FakeClient:
+    """Client simulé: latence réseau et FloodWait injecté avec une probabilité donnée"""
+
+    def __init__(self, latency: float, flood_rate: float, flood_seconds: int):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.calls = 0
+        self.order = {}  # {chat_id: [texte, ...]} dans l'ordre d'exécution
+
+    async def _call(self, chat_id, text):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.flood_rate:
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+        self.order.setdefault(chat_id, []).append(text)
+        return FakeMessage(chat_id, self.calls)
+
+    async def send_message(self, chat_id, text):
+        return await self._call(chat_id, text)
+
+    async def edit_message(self, chat_id, message_id, text):
+        return await self._call(chat_id, text)
+
+
+async def run(args):
+    random.seed(args.seed)
+    client = FakeClient(args.latency, args.flood_rate, args.flood_seconds)
+    dispatcher = OutboundDispatcher(
+        client, chat_rate=args.chat_rate, chat_burst=args.chat_burst,
+        global_rate=args.global_rate, global_burst=args.global_rate,
+        max_flood_wait=args.flood_seconds + 1
+    )
+
+    futures = []
+    start = time.perf_counter()
+    for chat_id in range(1, args.chats + 1):
+        for i in range(args.messages):
+            # Les rapports sont soumis avant les prédictions: la priorité doit les doubler
+            futures.append(dispatcher.send_message(chat_id, f"report-{i}", PRIORITY_REPORT))
+        for i in range(args.messages):
+            futures.append(dispatcher.send_message(chat_id, f"prediction-{i}", PRIORITY_PREDICTION))
+    submit_time = time.perf_counter() - start
+
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    total_time = time.perf_counter() - start
+    failed = sum(1 for r in results if isinstance(r, Exception))
+
+    # Après la rafale initiale, les prédictions doivent toutes précéder les rapports
+    inversions = 0
+    for texts in client.order.values():
+        tail = texts[int(args.chat_burst):]
+        last_prediction = max((i for i, t in enumerate(tail) if t.startswith("prediction")), default=-1)
+        inversions += sum(1 for i, t in enumerate(tail) if t.startswith("report") and i < last_prediction)
+
+    total = len(futures)
+    stats = dispatcher.get_status()
+    print(f"Chats: {args.chats}  messages: {total}  latence simulée: {args.latency * 1000:.0f}ms")
+    print(f"Soumission: {submit_time * 1000:.2f}ms au total ({submit_time / total * 1e6:.1f}µs par message)")
+    print(f"Durée totale: {total_time:.2f}s  débit: {total / total_time:.1f} msg/s "
+          f"(limite globale {args.global_rate}/s, par chat {args.chat_rate}/s)")
+    print(f"FloodWait: {stats['flood_waits']} ({stats['flood_wait_seconds']:.0f}s)  "
+          f"nouvelles tentatives: {stats['retries']}  échecs: {failed}")
+    print(f"Inversions de priorité après la rafale: {inversions}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=30, help="messages par priorité et par chat")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--flood-rate", type=float, default=0.02)
+    parser.add_argument("--flood-seconds", type=int, default=1)
+    parser.add_argument("--chat-rate", type=float, default=20.0)
+    parser.add_argument("--chat-burst", type=float, default=3.0)
+    parser.add_argument("--global-rate", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
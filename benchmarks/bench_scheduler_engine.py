@@ -0,0 +1,103 @@
+"""
+Benchmark du moteur de planification multi-canaux.
+
+Enregistre N paires de canaux sur une seule roue temporelle, puis mesure :
+- le coût d'ajout d'un canal (génération de sa partition, sauvegarde différée),
+- le coût d'un tick sans lancement dû,
+- le coût d'un tick où chaque canal a un lancement dû,
+- l'écriture groupée des partitions modifiées (thread, hors de la boucle).
+
+Usage: python benchmarks/bench_scheduler_engine.py [--channels 1000]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from predictor import CardPredictor
+from scheduler import SchedulerEngine
+
+
+class FakeMessage:
+    def __init__(self, message_id: int):
+        self.id = message_id
+
+
+class FakeClient:
+    """Client minimal: send_message/edit_message sans réseau"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text):
+        self.sent += 1
+        return FakeMessage(self.sent)
+
+    async def edit_message(self, chat_id, message_id, text):
+        return FakeMessage(message_id)
+
+
+async def run(channels: int):
+    client = FakeClient()
+    with tempfile.TemporaryDirectory() as data_dir:
+        engine = SchedulerEngine(client, CardPredictor, data_dir=data_dir)
+
+        # Ajout des canaux (les logs de génération sont masqués)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(channels):
+                engine.add_channel(-1000000000000 - i, -2000000000000 - i)
+        add_elapsed = time.perf_counter() - start
+
+        # Tick à vide: minute sans aucune entrée
+        now = datetime.now()
+        empty_minute = now + timedelta(minutes=30)
+        engine._last_minute = None
+        start = time.perf_counter()
+        await engine.tick(empty_minute)
+        empty_tick = time.perf_counter() - start
+
+        # Tick chargé: la première entrée de chaque canal arrive à échéance
+        due = {}
+        for channel in engine.channels.values():
+            numero, data = next(iter(channel.schedule_data.items()))
+            due[(channel.source_channel_id, channel.target_channel_id)] = data["heure_lancement"]
+        first_launch = datetime.strptime(next(iter(due.values())), "%H:%M")
+        busy_minute = now.replace(hour=first_launch.hour, minute=first_launch.minute)
+        engine._last_minute = None
+        due_count = sum(1 for heure in due.values() if heure == next(iter(due.values())))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            launched = await engine.tick(busy_minute)
+        busy_tick = time.perf_counter() - start
+
+        # Sauvegardes différées: écrites dans un thread, la boucle reste libre
+        pending = len(engine.store.dirty)
+        start = time.perf_counter()
+        await engine.store.flush()
+        flush_elapsed = time.perf_counter() - start
+
+    print(f"Canaux: {channels}")
+    print(f"Entrées planifiées: {sum(len(c.schedule_data) for c in engine.channels.values())}")
+    print(f"Ajout: {add_elapsed * 1000:.1f} ms total, {add_elapsed / channels * 1e6:.0f} µs/canal")
+    print(f"Tick à vide: {empty_tick * 1e6:.1f} µs")
+    print(f"Tick chargé: {busy_tick * 1000:.1f} ms pour {launched}/{due_count} lancements dus")
+    print(f"Écriture différée: {flush_elapsed * 1000:.1f} ms pour {pending} partitions (hors boucle)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.channels))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Mesure du temps de démarrage du bot: session neuve (à froid) contre session réutilisée (à chaud).
+
+À froid, chaque démarrage part d'une session vide et refait l'autorisation
+complète du bot; à chaud, la session obtenue au premier démarrage est réutilisée.
+Le temps mesuré va de la création du client au retour de get_me().
+
+Nécessite API_ID, API_HASH et BOT_TOKEN (fichier .env accepté) et un accès réseau.
+Usage: python benchmarks/bench_startup.py [--runs 3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from telethon import TelegramClient
+from telethon.sessions import StringSession
+
+
+async def boot(session_string: str, api_id: int, api_hash: str, bot_token: str):
+    """Démarre un client, retourne (durée, session encodée)"""
+    started_at = time.perf_counter()
+    client = TelegramClient(StringSession(session_string), api_id, api_hash)
+    await client.start(bot_token=bot_token)
+    await client.get_me()
+    elapsed = time.perf_counter() - started_at
+    saved = client.session.save()
+    await client.disconnect()
+    return elapsed, saved
+
+
+async def run(args):
+    load_dotenv()
+    api_id = int(os.getenv('API_ID') or '0')
+    api_hash = os.getenv('API_HASH') or ''
+    bot_token = os.getenv('BOT_TOKEN') or ''
+    if not api_id or not api_hash or not bot_token:
+        print("❌ API_ID, API_HASH et BOT_TOKEN sont requis")
+        return
+
+    cold, warm = [], []
+    saved = ""
+    for _ in range(args.runs):
+        elapsed, saved = await boot("", api_id, api_hash, bot_token)
+        cold.append(elapsed)
+    for _ in range(args.runs):
+        elapsed, saved = await boot(saved, api_id, api_hash, bot_token)
+        warm.append(elapsed)
+
+    print(f"À froid (nouvelle autorisation): médiane {statistics.median(cold):.2f}s  "
+          f"min {min(cold):.2f}s  max {max(cold):.2f}s")
+    print(f"À chaud (session réutilisée):    médiane {statistics.median(warm):.2f}s  "
+          f"min {min(warm):.2f}s  max {max(warm):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
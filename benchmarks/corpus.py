@@ -0,0 +1,20 @@
+"""
+Corpus synthétique et reproductible de messages du canal stats.
+
+Même graine = mêmes messages : les résultats de deux exécutions du suite
+de benchmarks portent sur une entrée identique. Les textes viennent du
+simulateur de parties (`simulator.py`), éditions et messages malformés compris.
+"""
+from typing import Iterator, List
+
+from simulator import GameSimulator
+
+
+def stat_messages(count: int, seed: int = 42, start: int = 1) -> Iterator[str]:
+    """Flux de textes: résultats finaux, éditions en cours (⏰/🕐) et quelques messages malformés"""
+    for message in GameSimulator(seed, start_game=start).messages(count):
+        yield message.text
+
+
+def corpus(count: int, seed: int = 42) -> List[str]:
+    return list(stat_messages(count, seed))
@@ -0,0 +1,176 @@
+"""
+Client Telegram local, en mémoire, pour les tests de charge sans réseau.
+
+`FakeTelegramClient` implémente le sous-ensemble de `TelegramClient` utilisé
+par le bot (send_message, edit_message, get_me, get_entity, get_messages,
+send_file) avec une latence, des échecs et des FloodWait configurables.
+`FakeEvent` reproduit les attributs d'un événement Telethon lus par les
+handlers (chat_id, sender_id, message, respond).
+"""
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+
+
+class FakeMessage:
+    __slots__ = ("id", "chat_id", "message", "out", "date")
+
+    def __init__(self, message_id: int, chat_id: int, text: str, out: bool = True):
+        self.id = message_id
+        self.chat_id = chat_id
+        self.message = text
+        self.out = out
+        self.date = time.time()
+
+
+class FakeEntity:
+    def __init__(self, entity_id: int, title: str = "", username: Optional[str] = None, bot: bool = False):
+        self.id = entity_id
+        self.title = title
+        self.first_name = title
+        self.username = username
+        self.bot = bot
+
+
+class FakeEvent:
+    """Événement injecté (nouveau message ou édition)"""
+
+    def __init__(self, client: "FakeTelegramClient", chat_id: int, text: str, message_id: int,
+                 sender_id: Optional[int] = None):
+        self.client = client
+        self.chat_id = chat_id
+        self.sender_id = sender_id if sender_id is not None else chat_id
+        self.message = FakeMessage(message_id, chat_id, text, out=False)
+        self.is_private = chat_id > 0
+
+    async def respond(self, text: str, **kwargs):
+        return await self.client.send_message(self.chat_id, text)
+
+
+class FakeTelegramClient:
+    """Stand-in de TelegramClient: historique par chat, latence et pannes simulées"""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, failure_rate: float = 0.0,
+                 flood_wait_rate: float = 0.0, flood_wait_seconds: int = 3, seed: int = 42,
+                 me_id: int = 999, history_limit: int = 10000):
+        """
+        Args:
+            latency: Durée moyenne d'un appel (secondes)
+            jitter: Variation aléatoire ajoutée à la latence (0 à jitter secondes)
+            failure_rate: Part des envois/éditions en échec (erreur réseau)
+            flood_wait_rate: Part des envois/éditions refusés par un FloodWait
+            flood_wait_seconds: Attente demandée par les FloodWait simulés
+            seed: Graine des tirages de latence et de pannes
+            me_id: ID du bot renvoyé par get_me
+            history_limit: Messages conservés par chat
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.flood_wait_rate = flood_wait_rate
+        self.flood_wait_seconds = flood_wait_seconds
+        self.rng = random.Random(seed)
+        self.me = FakeEntity(me_id, "Bot de charge", "load_bot", bot=True)
+        self.history_limit = history_limit
+        self.history: Dict[int, List[FakeMessage]] = {}
+        self.last_ids: Dict[int, int] = {}
+        self.stats = {"send_message": 0, "edit_message": 0, "send_file": 0, "get_me": 0,
+                      "get_entity": 0, "get_messages": 0, "failures": 0, "flood_waits": 0}
+
+    # --- Simulation du réseau ---
+    async def _network(self, method: str, fallible: bool = True):
+        self.stats[method] += 1
+        delay = self.latency + (self.rng.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if not fallible:
+            return
+        roll = self.rng.random()
+        if roll < self.flood_wait_rate:
+            self.stats["flood_waits"] += 1
+            raise FloodWaitError(request=None, capture=self.flood_wait_seconds)
+        if roll < self.flood_wait_rate + self.failure_rate:
+            self.stats["failures"] += 1
+            raise ConnectionError(f"{method}: panne simulée")
+
+    def _store(self, chat_id: int, text: str, out: bool = True) -> FakeMessage:
+        message_id = self.last_ids.get(chat_id, 0) + 1
+        self.last_ids[chat_id] = message_id
+        message = FakeMessage(message_id, chat_id, text, out)
+        history = self.history.setdefault(chat_id, [])
+        history.append(message)
+        if len(history) > self.history_limit:
+            del history[:len(history) - self.history_limit]
+        return message
+
+    # --- API TelegramClient ---
+    async def send_message(self, entity, message: str, **kwargs) -> FakeMessage:
+        await self._network("send_message")
+        return self._store(int(entity), message)
+
+    async def edit_message(self, entity, message, text: Optional[str] = None, **kwargs) -> FakeMessage:
+        await self._network("edit_message")
+        chat_id, message_id = int(entity), int(getattr(message, "id", message))
+        for stored in reversed(self.history.get(chat_id, [])):
+            if stored.id == message_id:
+                if stored.message == text:
+                    raise ValueError("MessageNotModifiedError: contenu identique")
+                stored.message = text
+                return stored
+        raise ValueError(f"Message {message_id} introuvable dans {chat_id}")
+
+    async def send_file(self, entity, file, caption: str = "", **kwargs) -> FakeMessage:
+        await self._network("send_file")
+        return self._store(int(entity), caption or str(file))
+
+    async def get_me(self) -> FakeEntity:
+        await self._network("get_me", fallible=False)
+        return self.me
+
+    async def get_entity(self, entity) -> FakeEntity:
+        await self._network("get_entity", fallible=False)
+        entity_id = int(getattr(entity, "id", entity))
+        return FakeEntity(entity_id, f"Canal {entity_id}")
+
+    async def get_messages(self, entity, limit: int = 1, min_id: int = 0, max_id: int = 0,
+                           reverse: bool = False, ids=None, **kwargs):
+        await self._network("get_messages", fallible=False)
+        if ids is not None:
+            # Comme Telethon: un message (ou None) par ID demandé, dans l'ordre
+            by_id = {m.id: m for m in self.history.get(int(entity), [])}
+            if isinstance(ids, int):
+                return by_id.get(ids)
+            return [by_id.get(message_id) for message_id in ids]
+        if self.me.bot:
+            # messages.getHistory est refusé aux bots (BotMethodInvalidError)
+            raise ValueError("BotMethodInvalidError: historique inaccessible à un bot")
+        messages = [m for m in self.history.get(int(entity), [])
+                    if m.id > min_id and (not max_id or m.id < max_id)]
+        if reverse:
+            return messages[:limit]
+        return list(reversed(messages))[:limit]
+
+    # --- Injection d'événements ---
+    def inject(self, chat_id: int, text: str, message_id: Optional[int] = None,
+               sender_id: Optional[int] = None) -> FakeEvent:
+        """Enregistre un message entrant et retourne l'événement correspondant
+
+        Avec `message_id` déjà connu, le message existant est modifié (édition).
+        """
+        if message_id is not None:
+            for stored in reversed(self.history.get(chat_id, [])):
+                if stored.id == message_id:
+                    stored.message = text
+                    break
+            else:
+                self.last_ids[chat_id] = max(self.last_ids.get(chat_id, 0), message_id)
+                self.history.setdefault(chat_id, []).append(FakeMessage(message_id, chat_id, text, out=False))
+        else:
+            message_id = self._store(chat_id, text, out=False).id
+        return FakeEvent(self, chat_id, text, message_id, sender_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        return dict(self.stats)
@@ -0,0 +1,250 @@
+"""
+Test de charge de bout en bout du bot, sans Telegram.
+
+Importe le vrai `main.py` dans un répertoire de données temporaire, remplace
+son client par `FakeTelegramClient`, démarre une paire planifiée, puis
+injecte des messages du simulateur de parties dans le routeur (et quelques
+commandes admin) à N messages/seconde. Mesures :
+- latence de traitement : injection -> fin de handle_messages (file du chat comprise) ;
+- latence de bout en bout : injection -> envoi/édition de prédiction effectué
+  par le client (limitation de débit, FloodWait et réessais compris) ;
+- débit maximal soutenable (`--find-max`) : débit doublé tant que la file ne
+  diverge pas et que le p99 de traitement reste sous `--max-p99`.
+
+Usage: python benchmarks/load_harness.py [--rate 50] [--duration 20] [--latency 0.05]
+                                          [--flood-wait-rate 0.01] [--find-max]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_telegram import FakeTelegramClient
+from simulator import GameSimulator
+
+STAT_CHANNEL = -1001000000001
+DISPLAY_CHANNEL = -1001000000002
+ADMIN_ID = 4242
+ADMIN_COMMANDS = ["/status", "/sta", "/report", "/schedule_info", "/scheduler list"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def load_bot(args, data_dir: str):
+    """Importe main.py configuré pour le harnais (client factice, données temporaires)"""
+    os.environ.update({
+        "API_ID": "1", "API_HASH": "harness", "BOT_TOKEN": "1:harness", "ADMIN_ID": str(ADMIN_ID),
+        "SESSION_NAME": os.path.join(data_dir, "harness"),
+        "OUTBOUND_CHAT_RATE": str(args.chat_rate), "OUTBOUND_CHAT_BURST": str(args.chat_burst),
+    })
+    os.environ.pop("TELEGRAM_SESSION", None)
+    os.chdir(data_dir)
+    import main
+
+    client = FakeTelegramClient(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                                flood_wait_rate=args.flood_wait_rate, flood_wait_seconds=args.flood_wait_seconds,
+                                seed=args.seed)
+    main.client = client
+    main.outbound.client = client
+    main.entity_cache.client = client
+    main.history_backfill.client = client
+    return main, client
+
+
+class LoadHarness:
+    """Injection cadencée et mesure des latences"""
+
+    def __init__(self, bot, client: FakeTelegramClient, seed: int, command_rate: float):
+        self.bot = bot
+        self.client = client
+        self.simulator = GameSimulator(seed)
+        self.rng = random.Random(seed)
+        self.command_rate = command_rate
+        self.current_injected_at: Optional[float] = None
+        self.handler_latencies: List[float] = []
+        self.landing_latencies: List[float] = []
+        self.outbound_failures = 0
+        self.pending_outbound = 0
+
+    def install(self):
+        """Configure la paire de canaux et instrumente les points de mesure"""
+        bot = self.bot
+        bot.detected_stat_channel = STAT_CHANNEL
+        bot.detected_display_channel = DISPLAY_CHANNEL
+        bot.leader_lease.try_acquire()
+        bot.start_scheduler_channel(STAT_CHANNEL, DISPLAY_CHANNEL)
+
+        async def traced_handler(event):
+            self.current_injected_at = event.injected_at
+            try:
+                await bot.handle_messages(event)
+            finally:
+                self.current_injected_at = None
+                self.handler_latencies.append(time.perf_counter() - event.injected_at)
+
+        routes = dict(bot.router.routes)
+        for kind in (bot.KIND_NEW, bot.KIND_EDITED):
+            routes[(STAT_CHANNEL, kind)] = traced_handler
+        bot.router.set_routes(routes)
+
+        # Envois/éditions déposés pendant le traitement d'un message: latence jusqu'à l'appel réussi
+        outbound = bot.outbound
+        original_send, original_edit = outbound.send_message, outbound.edit_message
+
+        def track(future):
+            injected_at = self.current_injected_at
+            if injected_at is None:
+                return future
+            self.pending_outbound += 1
+
+            def done(result):
+                self.pending_outbound -= 1
+                if result.cancelled() or result.exception() is not None:
+                    self.outbound_failures += 1
+                else:
+                    self.landing_latencies.append(time.perf_counter() - injected_at)
+            future.add_done_callback(done)
+            return future
+
+        outbound.send_message = lambda *a, **k: track(original_send(*a, **k))
+        outbound.edit_message = lambda *a, **k: track(original_edit(*a, **k))
+
+    async def inject_one(self, message) -> None:
+        event = self.client.inject(STAT_CHANNEL, message.text, message.message_id)
+        kind = self.bot.KIND_EDITED if message.kind == "edited" else self.bot.KIND_NEW
+        event.injected_at = event.received_at = time.perf_counter()
+        await self.bot.router.dispatch(event, kind)
+        if self.command_rate and self.rng.random() < self.command_rate:
+            command = self.client.inject(ADMIN_ID, self.rng.choice(ADMIN_COMMANDS), sender_id=ADMIN_ID)
+            await self.bot.router.dispatch(command, self.bot.KIND_NEW)
+
+    async def run_step(self, rate: float, duration: float, drain_timeout: float) -> Dict[str, float]:
+        """Injecte `rate` messages/s pendant `duration` secondes puis attend la fin du traitement"""
+        self.handler_latencies, self.landing_latencies = [], []
+        failures_before = self.outbound_failures
+        total = int(rate * duration)
+        messages = self.simulator.messages(total)
+        started_at = time.perf_counter()
+        injected = 0
+        for message in messages:
+            due = started_at + injected / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.inject_one(message)
+            injected += 1
+        inject_elapsed = time.perf_counter() - started_at
+        backlog = self.bot.router.queue_depth()
+
+        await asyncio.wait_for(self.bot.router.join(), drain_timeout)
+        processed_elapsed = time.perf_counter() - started_at
+        deadline = time.perf_counter() + drain_timeout
+        while self.pending_outbound and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+        return {
+            "rate": rate,
+            "injected": injected,
+            "achieved_rate": injected / inject_elapsed if inject_elapsed else 0.0,
+            "processed_rate": injected / processed_elapsed if processed_elapsed else 0.0,
+            "backlog_at_end": backlog,
+            "handler_p50": percentile(self.handler_latencies, 0.5),
+            "handler_p99": percentile(self.handler_latencies, 0.99),
+            "landing_count": len(self.landing_latencies),
+            "landing_p50": percentile(self.landing_latencies, 0.5),
+            "landing_p90": percentile(self.landing_latencies, 0.9),
+            "landing_p99": percentile(self.landing_latencies, 0.99),
+            "outbound_failures": self.outbound_failures - failures_before,
+            "outbound_unfinished": self.pending_outbound,
+        }
+
+
+def print_step(result: Dict[str, float]):
+    ms = 1000
+    print(f"📈 {result['rate']:.0f} msg/s demandés | injectés {result['achieved_rate']:.0f}/s, "
+          f"traités {result['processed_rate']:.0f}/s, file restante {result['backlog_at_end']}")
+    print(f"   Traitement  p50 {result['handler_p50'] * ms:8.2f} ms | p99 {result['handler_p99'] * ms:8.2f} ms")
+    print(f"   Bout en bout p50 {result['landing_p50'] * ms:8.1f} ms | p90 {result['landing_p90'] * ms:8.1f} ms | "
+          f"p99 {result['landing_p99'] * ms:8.1f} ms ({result['landing_count']} envois/éditions, "
+          f"{result['outbound_failures']} échec(s), {result['outbound_unfinished']} non terminé(s))")
+
+
+def sustainable(result: Dict[str, float], max_p99: float) -> bool:
+    """Le débit tient si l'injection n'est pas freinée, si la file ne s'accumule pas et si le p99 reste borné"""
+    return (result["achieved_rate"] >= result["rate"] * 0.9
+            and result["processed_rate"] >= result["rate"] * 0.9
+            and result["backlog_at_end"] <= max(10, result["rate"] * 0.5)
+            and result["handler_p99"] <= max_p99)
+
+
+async def run(args):
+    data_dir = tempfile.mkdtemp(prefix="load_harness_")
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with output:
+        bot, client = load_bot(args, data_dir)
+        harness = LoadHarness(bot, client, args.seed, args.command_rate)
+        harness.install()
+        # Heartbeat du bail comme dans main(): sans lui l'instance perd le rôle de leader au bout du TTL
+        asyncio.create_task(bot.leader_lease.run())
+        await bot.entity_cache.warm([STAT_CHANNEL, DISPLAY_CHANNEL])
+
+    results = []
+    rate = args.rate
+    while True:
+        with output:
+            result = await harness.run_step(rate, args.duration, args.drain_timeout)
+        print_step(result)
+        results.append(result)
+        if not args.find_max or not sustainable(result, args.max_p99) or rate >= args.max_rate:
+            break
+        rate *= 2
+
+    if args.find_max:
+        best = [r for r in results if sustainable(r, args.max_p99)]
+        if best:
+            print(f"✅ Débit maximal soutenable: ~{best[-1]['rate']:.0f} msg/s "
+                  f"(traités {best[-1]['processed_rate']:.0f}/s)")
+        else:
+            print(f"❌ Débit initial de {args.rate:.0f} msg/s déjà non soutenable")
+    print(f"📡 Appels du client factice: {client.get_status()}")
+    print(f"📤 File sortante: {bot.outbound.get_status()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50, help="Messages du canal stats par seconde")
+    parser.add_argument("--duration", type=float, default=20, help="Durée d'injection par palier (secondes)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--command-rate", type=float, default=0.01, help="Commandes admin par message injecté")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence moyenne des appels Telegram (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--flood-wait-rate", type=float, default=0.0)
+    parser.add_argument("--flood-wait-seconds", type=int, default=3)
+    parser.add_argument("--chat-rate", type=float, default=1.0, help="Débit sortant par chat (OUTBOUND_CHAT_RATE)")
+    parser.add_argument("--chat-burst", type=float, default=3.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--find-max", action="store_true", help="Double le débit jusqu'à saturation")
+    parser.add_argument("--max-rate", type=float, default=20000)
+    parser.add_argument("--max-p99", type=float, default=1.0, help="p99 de traitement toléré (s) pour --find-max")
+    parser.add_argument("--verbose", action="store_true", help="Garde les logs du bot")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Simulateur du jeu 2D publié sur le canal stats (entrée des benchmarks et backtests).
+
+Chaque partie distribue deux groupes de 2 cartes tirées d'un sabot de 8 jeux,
+complétés par une troisième carte selon la règle de tirage du baccara ; le
+total (modulo 10) précède chaque groupe. Le texte produit est celui que lisent
+`CardPredictor.extract_game_number` et `extract_symbols_from_parentheses` :
+
+    #N512. ✅3(K♠️8♥️) - 1(9♦️2♣️)
+
+Une partie peut d'abord être publiée « en cours » (⏰/🕐, cartes partielles)
+puis éditée avec son résultat final (✅, 🔰 en cas d'égalité). Les taux
+d'éditions, de parties manquantes et de messages malformés sont réglables.
+Les messages sont produits à la volée : la mémoire reste constante quel que
+soit le nombre de messages.
+
+Usage: python benchmarks/simulator.py [--count 1000000] [--seed 42] [--format text|jsonl]
+"""
+import argparse
+import json
+import random
+import sys
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+RANKS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
+EMOJI_SUITS = ["♠️", "♥️", "♦️", "♣️"]
+PLAIN_SUITS = ["♠", "♥", "♦", "♣"]
+POINTS = {"A": 1, "10": 0, "J": 0, "Q": 0, "K": 0}
+
+KIND_NEW = "new"
+KIND_EDITED = "edited"
+
+Card = Tuple[str, int]  # (rang, index de couleur)
+
+
+class SimMessage(NamedTuple):
+    """Message simulé: nouveau message ou édition d'un message déjà publié"""
+    kind: str
+    message_id: int
+    game_number: Optional[int]
+    text: str
+
+
+def card_points(rank: str) -> int:
+    return POINTS.get(rank, int(rank) if rank.isdigit() else 0)
+
+
+def hand_total(cards: List[Card]) -> int:
+    return sum(card_points(rank) for rank, _ in cards) % 10
+
+
+class Shoe:
+    """Sabot de `decks` jeux, rebattu quand il reste moins d'un quart des cartes"""
+
+    def __init__(self, rng: random.Random, decks: int = 8):
+        self.rng = rng
+        self.cards: List[Card] = [(rank, suit) for _ in range(decks) for rank in RANKS for suit in range(4)]
+        self.position = len(self.cards)
+
+    def draw(self) -> Card:
+        if self.position >= len(self.cards) * 3 // 4:
+            self.rng.shuffle(self.cards)
+            self.position = 0
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+
+def deal(shoe: Shoe) -> Tuple[List[Card], List[Card]]:
+    """Une partie: deux mains de 2 cartes, troisième carte selon la règle du baccara"""
+    first = [shoe.draw(), shoe.draw()]
+    second = [shoe.draw(), shoe.draw()]
+    first_total, second_total = hand_total(first), hand_total(second)
+    if first_total >= 8 or second_total >= 8:
+        return first, second  # Naturel: personne ne tire
+
+    third_points = None
+    if first_total <= 5:
+        first.append(shoe.draw())
+        third_points = card_points(first[2][0])
+
+    if third_points is None:
+        draws = second_total <= 5
+    elif second_total <= 2:
+        draws = True
+    elif second_total == 3:
+        draws = third_points != 8
+    elif second_total == 4:
+        draws = 2 <= third_points <= 7
+    elif second_total == 5:
+        draws = 4 <= third_points <= 7
+    elif second_total == 6:
+        draws = third_points in (6, 7)
+    else:
+        draws = False
+    if draws:
+        second.append(shoe.draw())
+    return first, second
+
+
+class GameSimulator:
+    """Flux de messages du canal stats, reproductible pour une graine donnée"""
+
+    def __init__(self, seed: int = 42, start_game: int = 1, edit_rate: float = 0.3,
+                 gap_rate: float = 0.01, malformed_rate: float = 0.005, emoji_rate: float = 0.8,
+                 late_edit_rate: float = 0.3):
+        """
+        Args:
+            seed: Graine du générateur (même graine = mêmes messages)
+            start_game: Numéro de la première partie
+            edit_rate: Part des parties publiées en cours (⏰/🕐) puis éditées
+            gap_rate: Part des parties absentes du canal (numéro sauté)
+            malformed_rate: Part de messages malformés (numéro ou parenthèses manquants, texte tronqué)
+            emoji_rate: Part des parties dont les couleurs sont au format emoji (♠️) plutôt que simple (♠)
+            late_edit_rate: Part des éditions finales publiées après le message de la partie suivante
+        """
+        self.rng = random.Random(seed)
+        self.shoe = Shoe(self.rng)
+        self.game_number = start_game
+        self.message_id = 0
+        self.edit_rate = edit_rate
+        self.gap_rate = gap_rate
+        self.malformed_rate = malformed_rate
+        self.emoji_rate = emoji_rate
+        self.late_edit_rate = late_edit_rate
+
+    @staticmethod
+    def format_game(game_number: int, first: List[Card], second: List[Card], marker: str,
+                    emoji: bool = True) -> str:
+        suits = EMOJI_SUITS if emoji else PLAIN_SUITS
+        first_text = "".join(rank + suits[suit] for rank, suit in first)
+        second_text = "".join(rank + suits[suit] for rank, suit in second)
+        return f"#N{game_number}. {marker}{hand_total(first)}({first_text}) - {hand_total(second)}({second_text})"
+
+    def _malformed(self, game_number: int) -> str:
+        text = self.format_game(game_number, [self.shoe.draw(), self.shoe.draw()],
+                                [self.shoe.draw(), self.shoe.draw()], "✅", self.rng.random() < self.emoji_rate)
+        variant = self.rng.randrange(4)
+        if variant == 0:
+            return text.replace(f"#N{game_number}", "#N")  # Numéro manquant
+        if variant == 1:
+            return text.replace(")", "", 1)  # Parenthèse non fermée
+        if variant == 2:
+            return text[:self.rng.randint(1, len(text) - 1)]  # Tronqué
+        return self.rng.choice(("Bonne chance à tous 🍀", "Pause de 5 minutes", "⏰ Reprise bientôt"))
+
+    def _next_id(self) -> int:
+        self.message_id += 1
+        return self.message_id
+
+    def messages(self, count: int) -> Iterator[SimMessage]:
+        """Produit `count` messages (nouveaux et éditions), sans les garder en mémoire"""
+        produced = 0
+        deferred: Optional[SimMessage] = None  # Édition finale publiée après le message suivant
+        while produced < count:
+            rng = self.rng
+            game_number = self.game_number
+            self.game_number += 1
+            if rng.random() < self.gap_rate:
+                continue
+
+            late_final = None
+            if rng.random() < self.malformed_rate:
+                batch = [SimMessage(KIND_NEW, self._next_id(), None, self._malformed(game_number))]
+            else:
+                first, second = deal(self.shoe)
+                final_marker = "🔰" if hand_total(first) == hand_total(second) else "✅"
+                emoji = rng.random() < self.emoji_rate
+                message_id = self._next_id()
+                final_text = self.format_game(game_number, first, second, final_marker, emoji)
+                if rng.random() < self.edit_rate:
+                    # En cours: cartes partielles, puis édition finale (éventuellement après la partie suivante)
+                    in_progress = self.format_game(game_number, first[:2], second[:rng.choice((1, 2))],
+                                                   rng.choice(("⏰", "🕐")), emoji)
+                    batch = [SimMessage(KIND_NEW, message_id, game_number, in_progress)]
+                    final = SimMessage(KIND_EDITED, message_id, game_number, final_text)
+                    if rng.random() < self.late_edit_rate:
+                        late_final = final
+                    else:
+                        batch.append(final)
+                else:
+                    batch = [SimMessage(KIND_NEW, message_id, game_number, final_text)]
+
+            # L'édition finale retardée de la partie précédente arrive après ce message
+            if deferred is not None:
+                batch.append(deferred)
+            deferred = late_final
+            for message in batch:
+                if produced >= count:
+                    return
+                yield message
+                produced += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--edit-rate", type=float, default=0.3)
+    parser.add_argument("--gap-rate", type=float, default=0.01)
+    parser.add_argument("--malformed-rate", type=float, default=0.005)
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text")
+    args = parser.parse_args()
+
+    simulator = GameSimulator(args.seed, edit_rate=args.edit_rate, gap_rate=args.gap_rate,
+                              malformed_rate=args.malformed_rate)
+    write = sys.stdout.write
+    for message in simulator.messages(args.count):
+        if args.format == "jsonl":
+            write(json.dumps(message._asdict(), ensure_ascii=False) + "\n")
+        else:
+            write(f"{message.kind}\t{message.message_id}\t{message.text}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Suite de benchmarks reproductible des chemins critiques (predictor, planificateur, stockage YAML).
+
+Chaque cas est reconstruit à chaque répétition à partir d'un corpus synthétique
+à graine fixe, puis chronométré ; on retient le temps par opération minimal
+(le plus stable) et médian. Les logs des modules mesurés sont envoyés vers
+/dev/null : leur coût d'écriture reste compté, pas l'affichage du terminal.
+
+Usage:
+    python benchmarks/suite.py run [--repeat 5] [--seed 42] [--filter verify] [--output results.json]
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 0.15]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import corpus
+from predictor import CardPredictor
+from yaml_manager import ScheduleStore
+
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+
+# Cas: nom -> fonction (graine) -> (fonction à chronométrer, nombre d'opérations)
+Case = Callable[[int], Tuple[Callable[[], None], int]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(setup: Case) -> Case:
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def predictor_with_pending(count: int, first: int) -> CardPredictor:
+    predictor = CardPredictor()
+    for number in range(first, first + count):
+        predictor.prediction_status[number] = '⌛'
+    return predictor
+
+
+# --- Predictor ---
+@case("predictor.extract")
+def bench_extract(seed: int):
+    messages = corpus(5000, seed)
+    predictor = CardPredictor()
+
+    def run():
+        for message in messages:
+            predictor.extract_game_number(message)
+            predictor.extract_symbols_from_parentheses(message)
+    return run, len(messages)
+
+
+@case("predictor.decide")
+def bench_decide(seed: int):
+    """Décision complète par message, comme dans handle_messages"""
+    messages = corpus(5000, seed)
+    predictor = CardPredictor()
+
+    def run():
+        for message in messages:
+            is_pending, _ = predictor.is_pending_edit_message(message)
+            if is_pending:
+                continue
+            predicted, _, _ = predictor.process_final_edit_message(message)
+            if not predicted:
+                predictor.should_predict(message)
+    return run, len(messages)
+
+
+def register_verify(pending: int):
+    @case(f"predictor.verify[pending={pending}]")
+    def bench_verify(seed: int):
+        messages = corpus(2000, seed)
+        # Prédictions en attente au-delà des jeux du corpus: chaque message parcourt tout l'ensemble
+        predictor = predictor_with_pending(pending, 1000000)
+
+        def run():
+            for message in messages:
+                predictor.verify_prediction(message)
+        return run, len(messages)
+
+
+def register_expiry(pending: int):
+    @case(f"predictor.expiry[pending={pending}]")
+    def bench_expiry(seed: int):
+        predictor = predictor_with_pending(pending, 1000)
+        calls = 2000
+
+        def run():
+            for current in range(calls):
+                predictor.check_expired_predictions(current % 1000)
+        return run, calls
+
+
+def register_stats(log_size: int):
+    @case(f"predictor.stats[log={log_size}]")
+    def bench_stats(seed: int):
+        rng = random.Random(seed)
+        predictor = predictor_with_pending(50, 1000000)
+        statuses = ['✅0️⃣', '✅1️⃣', '✅2️⃣', '✅3️⃣', '❌', '❌❌']
+        predictor.status_log = [(n, rng.choice(statuses)) for n in range(log_size)]
+        calls = 200
+
+        def run():
+            for _ in range(calls):
+                predictor.get_statistics()
+        return run, calls
+
+
+for size in (10, 100, 1000):
+    register_verify(size)
+    register_expiry(size)
+for size in (100, 1000, 10000):
+    register_stats(size)
+
+
+# --- Planificateur ---
+def new_scheduler(directory: str, seed: int):
+    from scheduler import PredictionScheduler
+
+    random.seed(seed)  # Décalages de lancement tirés avec le module random
+    return PredictionScheduler(None, CardPredictor(), -1001, -1002,
+                               schedule_file=os.path.join(directory, "bench.yaml"),
+                               store=ScheduleStore(directory))
+
+
+@case("scheduler.generate_daily")
+def bench_generate_daily(seed: int):
+    scheduler = new_scheduler(tempfile.mkdtemp(), seed)
+    calls = 200
+
+    def run():
+        for _ in range(calls):
+            scheduler.generate_daily_schedule()
+    return run, calls
+
+
+@case("scheduler.extend_plan[days=7]")
+def bench_extend_plan(seed: int):
+    """Précalcul d'une semaine de prédictions horaires, persistance comprise"""
+    scheduler = new_scheduler(tempfile.mkdtemp(), seed)
+    now = datetime(2026, 1, 1, 8, 0)
+
+    def run():
+        scheduler.extend_plan(7, now)
+    return run, 1
+
+
+def register_launch_lookup(entries: int):
+    @case(f"scheduler.launch_lookup[entries={entries}]")
+    def bench_launch_lookup(seed: int):
+        scheduler = new_scheduler(tempfile.mkdtemp(), seed)
+        moment = datetime(2026, 1, 1, 8, 0)
+        for index in range(entries):
+            data = scheduler.generate_next_prediction_time(moment)
+            scheduler._add_entry(f"{data.pop('numero')}_{index}", data)
+            moment += timedelta(minutes=7)
+        slots = [f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in range(0, 60, 7)]
+        now = datetime(2026, 1, 1, 12, 0)
+
+        def run():
+            for slot in slots:
+                scheduler.get_pending_launches(slot)
+                scheduler.get_upcoming(10, now)
+        return run, len(slots)
+
+
+for size in (12, 168, 2000):
+    register_launch_lookup(size)
+
+
+# --- Stockage YAML ---
+def schedule_entries(count: int, seed: int) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    moment = datetime(2026, 1, 1, 8, 0)
+    entries = {}
+    for index in range(count):
+        launch = moment - timedelta(minutes=rng.randint(1, 4))
+        entries[f"N{moment:%H%M}_{index}"] = {
+            "heure_lancement": f"{launch:%H:%M}", "heure_prediction": f"{moment:%H:%M}",
+            "statut": rng.choice(["⌛", "✅0️⃣", "❌"]), "message_id": rng.randint(1, 10 ** 6),
+            "chat_id": -1002, "launched": rng.random() < 0.5, "verified": rng.random() < 0.3,
+            "generated_at": f"{moment:%Y-%m-%d %H:%M:%S}", "launch_offset": rng.randint(1, 4),
+            "launch_at": f"{launch:%Y-%m-%d %H:%M}", "prediction_at": f"{moment:%Y-%m-%d %H:%M}",
+        }
+        moment += timedelta(hours=1)
+    return entries
+
+
+def register_yaml(entries: int):
+    @case(f"yaml.write[entries={entries}]")
+    def bench_yaml_write(seed: int):
+        store = ScheduleStore(tempfile.mkdtemp())
+        store.partition("bench", load=False).replace(schedule_entries(entries, seed))
+
+        def run():
+            store.save("bench")
+        return run, 1
+
+    @case(f"yaml.read[entries={entries}]")
+    def bench_yaml_read(seed: int):
+        store = ScheduleStore(tempfile.mkdtemp())
+        store.partition("bench", load=False).replace(schedule_entries(entries, seed))
+        store.save("bench")
+
+        def run():
+            store.read("bench")
+        return run, 1
+
+
+for size in (12, 168, 2000):
+    register_yaml(size)
+
+
+# --- Exécution ---
+def measure(setup: Case, seed: int, repeat: int) -> Dict[str, float]:
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat + 1):  # Première exécution: échauffement, non retenue
+            run, ops = setup(seed)
+            started_at = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started_at) / ops * 1e9)
+    timings = timings[1:]
+    return {
+        "ns_per_op_min": round(min(timings), 1),
+        "ns_per_op_median": round(statistics.median(timings), 1),
+        "ops": ops,
+        "repeat": repeat,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BENCH_DIR, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run_suite(args) -> int:
+    names = [name for name in CASES if not args.filter or args.filter in name]
+    results = {}
+    for name in names:
+        try:
+            results[name] = measure(CASES[name], args.seed, args.repeat)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+            print(f"❌ {name}: {e}")
+            continue
+        print(f"{name:42s} {format_ns(results[name]['ns_per_op_min']):>12s} (médiane "
+              f"{format_ns(results[name]['ns_per_op_median'])})")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Résultats écrits dans {args.output}")
+    return 0
+
+
+def format_ns(value: float) -> str:
+    if value >= 1e6:
+        return f"{value / 1e6:.2f} ms"
+    if value >= 1e3:
+        return f"{value / 1e3:.2f} µs"
+    return f"{value:.0f} ns"
+
+
+def compare(args) -> int:
+    """Compare deux fichiers de résultats; code de sortie 1 si une régression dépasse le seuil"""
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)["results"]
+
+    regressions: List[str] = []
+    for name in sorted(set(baseline) | set(current)):
+        before, after = baseline.get(name, {}), current.get(name, {})
+        if "ns_per_op_min" not in before or "ns_per_op_min" not in after:
+            print(f"  {name:42s} {'absent de la référence' if name not in baseline else 'non mesuré'}")
+            continue
+        ratio = after["ns_per_op_min"] / before["ns_per_op_min"] if before["ns_per_op_min"] else 1.0
+        if ratio > 1 + args.threshold:
+            marker = "🔴"
+            regressions.append(name)
+        elif ratio < 1 - args.threshold:
+            marker = "🟢"
+        else:
+            marker = "  "
+        print(f"{marker} {name:42s} {format_ns(before['ns_per_op_min']):>12s} -> "
+              f"{format_ns(after['ns_per_op_min']):>12s} ({(ratio - 1) * 100:+.1f}%)")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s) au-delà de {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ Aucune régression au-delà de {args.threshold:.0%}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Exécute la suite et écrit les résultats en JSON")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--filter", default="", help="Sous-chaîne du nom des cas à exécuter")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+
+    compare_parser = commands.add_parser("compare", help="Compare des résultats à une référence")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", default=DEFAULT_OUTPUT)
+    compare_parser.add_argument("--threshold", type=float, default=0.15,
+                                help="Écart relatif toléré avant de signaler une régression")
+
+    args = parser.parse_args()
+    return run_suite(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
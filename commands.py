@@ -0,0 +1,145 @@
+"""
+Répartiteur des commandes du bot.
+
+Le premier mot du message est extrait une seule fois, puis recherché dans la
+table des commandes (dictionnaire, correspondance exacte) : `/sta` ne déclenche
+plus `/status` ni `/start`. Un arbre préfixe (trie) des noms ne sert qu'aux
+suggestions « Vouliez-vous dire » d'une commande inconnue. Le contrôle
+administrateur et l'analyse des arguments sont faits ici, pas dans chaque handler.
+"""
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+class Command:
+    """Description d'une commande enregistrée"""
+
+    __slots__ = ("name", "handler", "admin_only", "args_pattern", "usage", "deny_message")
+
+    def __init__(self, name: str, handler: Handler, admin_only: bool = True,
+                 args_pattern: Optional[str] = None, usage: Optional[str] = None,
+                 deny_message: Optional[str] = None):
+        self.name = name
+        self.handler = handler
+        self.admin_only = admin_only
+        self.args_pattern = re.compile(args_pattern) if args_pattern else None
+        self.usage = usage
+        self.deny_message = deny_message
+
+
+class CommandTrie:
+    """Arbre préfixe des noms de commandes (suggestions pour les commandes inconnues)"""
+
+    _END = object()
+
+    def __init__(self):
+        self.root: Dict[Any, Any] = {}
+
+    def insert(self, name: str, command: Command):
+        node = self.root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[self._END] = command
+
+    def get(self, name: str) -> Optional[Command]:
+        """Correspondance exacte du nom complet"""
+        node = self.root
+        for char in name:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(self._END)
+
+    def complete(self, prefix: str) -> List[str]:
+        """Noms de commandes commençant par `prefix` (suggestions)"""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        names = []
+        stack = [(node, prefix)]
+        while stack:
+            node, name = stack.pop()
+            for key, child in node.items():
+                if key is self._END:
+                    names.append(name)
+                else:
+                    stack.append((child, name + key))
+        return sorted(names)
+
+
+class CommandDispatcher:
+    """Répartit un message vers sa commande, après contrôle admin et analyse des arguments"""
+
+    def __init__(self, admin_id: int, bot_username: Optional[str] = None):
+        self.admin_id = admin_id
+        self.bot_username = bot_username
+        self.trie = CommandTrie()
+        self.commands: Dict[str, Command] = {}
+        self.stats = {"dispatched": 0, "unknown": 0, "denied": 0, "bad_args": 0}
+
+    def register(self, name: str, handler: Handler, **options) -> Command:
+        """Enregistre `/name` (options: admin_only, args_pattern, usage, deny_message)"""
+        command = Command(name.lstrip('/').lower(), handler, **options)
+        self.commands[command.name] = command
+        self.trie.insert(command.name, command)
+        return command
+
+    def parse(self, text: str):
+        """Retourne (nom de commande, jetons) ou None si ce n'est pas une commande"""
+        if not text or text[0] != '/':
+            return None
+        parts = text.split()
+        name = parts[0][1:].lower()
+        if '@' in name:
+            name, _, username = name.partition('@')
+            if self.bot_username and username != self.bot_username.lower():
+                return None  # Commande adressée à un autre bot
+        return name, parts
+
+    async def dispatch(self, event) -> bool:
+        """Exécute la commande du message; retourne True si une commande a été exécutée"""
+        message = event.message
+        parsed = self.parse(message.message if message else "")
+        if parsed is None:
+            return False
+        name, parts = parsed
+
+        command = self.commands.get(name)
+        if command is None:
+            self.stats["unknown"] += 1
+            suggestions = self.trie.complete(name) if name else []
+            if suggestions and event.sender_id == self.admin_id:
+                await event.respond(f"❓ Commande inconnue /{name}. Vouliez-vous dire: "
+                                    + ", ".join(f"/{s}" for s in suggestions) + " ?")
+            return False
+
+        if command.admin_only and event.sender_id != self.admin_id:
+            self.stats["denied"] += 1
+            if command.deny_message:
+                await event.respond(command.deny_message)
+            return False
+
+        event.command_parts = parts
+        event.pattern_match = None
+        if command.args_pattern:
+            # Texte des arguments extrait seulement pour les commandes qui en attendent
+            match = command.args_pattern.fullmatch(message.message[len(parts[0]):].strip())
+            if match is None:
+                self.stats["bad_args"] += 1
+                if command.usage:
+                    await event.respond(f"❌ Usage: {command.usage}")
+                return False
+            event.pattern_match = match
+
+        self.stats["dispatched"] += 1
+        await command.handler(event)
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        status["commands"] = len(self.commands)
+        return status
@@ -0,0 +1,143 @@
+"""
+Cache des entités Telegram (bot lui-même, canaux, utilisateurs).
+
+Évite les allers-retours réseau de `get_me` / `get_entity` pour des données
+qui changent rarement : chaque entrée a une durée de vie, les échecs sont
+aussi mis en cache (plus brièvement) et le tout est persisté sur disque pour
+être disponible dès le redémarrage.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+
+class EntityCache:
+    """Cache TTL des informations d'entités, avec cache négatif et persistance JSON"""
+
+    def __init__(self, client, path: str = os.path.join("data", "entity_cache.json"),
+                 ttl_seconds: float = 6 * 3600, negative_ttl_seconds: float = 300,
+                 me_key: str = "me"):
+        """
+        Args:
+            client: Client Telegram (get_me / get_entity)
+            path: Fichier JSON de persistance
+            ttl_seconds: Durée de validité d'une entité résolue
+            negative_ttl_seconds: Durée de validité d'un échec de résolution
+            me_key: Clé de l'entrée du bot (à distinguer par token si le bot change)
+        """
+        self.client = client
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.me_key = me_key
+        self.entries: Dict[str, Dict[str, Any]] = {}  # {clé: {"info": dict|None, "expires_at": float}}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "errors": 0}
+        self.load()
+
+    # --- Persistance ---
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+                print(f"✅ Cache d'entités chargé: {len(self.entries)} entrée(s)")
+        except Exception as e:
+            print(f"⚠️ Erreur chargement cache d'entités: {e}")
+            self.entries = {}
+
+    def save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde cache d'entités: {e}")
+
+    # --- Lecture ---
+    @staticmethod
+    def _describe(entity) -> Dict[str, Any]:
+        """Champs utiles d'une entité Telethon (sérialisables)"""
+        first_name = getattr(entity, 'first_name', None)
+        return {
+            "id": getattr(entity, 'id', None),
+            "title": getattr(entity, 'title', None) or first_name,
+            "username": getattr(entity, 'username', None),
+        }
+
+    def _cached(self, key: str):
+        """Retourne (trouvé, info) si l'entrée est encore valide"""
+        entry = self.entries.get(key)
+        if entry is None or entry["expires_at"] <= time.time():
+            return False, None
+        if entry["info"] is None:
+            self.stats["negative_hits"] += 1
+        else:
+            self.stats["hits"] += 1
+        return True, entry["info"]
+
+    async def _resolve(self, key: str, fetch) -> Optional[Dict[str, Any]]:
+        found, info = self._cached(key)
+        if found:
+            return info
+
+        # Une seule requête réseau par clé même si plusieurs handlers demandent en même temps
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                info = self._describe(await fetch())
+                ttl = self.ttl_seconds
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Entité {key} introuvable: {e}")
+                info = None
+                ttl = self.negative_ttl_seconds
+            self.entries[key] = {"info": info, "expires_at": time.time() + ttl}
+            self.save()
+            future.set_result(info)
+            return info
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    async def get_me(self) -> Optional[Dict[str, Any]]:
+        """Informations du bot (id, username)"""
+        return await self._resolve(self.me_key, self.client.get_me)
+
+    async def get_entity(self, entity_id: int) -> Optional[Dict[str, Any]]:
+        """Informations d'un chat ou utilisateur (id, title, username), None si introuvable"""
+        return await self._resolve(str(entity_id), lambda: self.client.get_entity(entity_id))
+
+    async def get_title(self, chat_id: int) -> str:
+        """Titre d'un canal, ou `Canal <id>` par défaut"""
+        info = await self.get_entity(chat_id)
+        return (info or {}).get("title") or f'Canal {chat_id}'
+
+    def invalidate(self, entity_id: int):
+        """Oublie une entité (par exemple un canal que le bot vient de rejoindre)"""
+        if self.entries.pop(str(entity_id), None) is not None:
+            self.save()
+
+    async def warm(self, entity_ids: Iterable[Optional[int]] = ()):
+        """Précharge le bot et les entités données (au démarrage)"""
+        await self.get_me()
+        for entity_id in entity_ids:
+            if entity_id:
+                await self.get_entity(entity_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        status["size"] = len(self.entries)
+        return status
@@ -0,0 +1,125 @@
+"""
+Flux d'événements en direct (Server-Sent Events) pour les tableaux de bord.
+
+Chaque événement (prédiction créée, vérifiée, expirée, changement de leader)
+est sérialisé une seule fois en trame SSE (`id:`, `event:`, `data:`), puis la
+même trame d'octets est déposée dans la file bornée de chaque abonné. Un abonné
+trop lent dont la file est pleine est déconnecté plutôt que de retenir la
+mémoire ou de ralentir la publication : il se reconnecte avec `Last-Event-ID`
+et reçoit les événements encore présents dans l'historique récent.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from metrics import registry
+
+EVENTS_PUBLISHED = registry.counter("bot_event_feed_published_total", "Événements publiés sur /events", ["type"])
+SUBSCRIBERS_DROPPED = registry.counter("bot_event_feed_dropped_total", "Abonnés /events déconnectés car trop lents")
+
+EVENT_PREDICTION_CREATED = "prediction_created"
+EVENT_PREDICTION_VERIFIED = "prediction_verified"
+EVENT_PREDICTION_EXPIRED = "prediction_expired"
+EVENT_LEADER_CHANGED = "leader_changed"
+
+HEARTBEAT = b": ping\n\n"
+
+
+class Subscriber:
+    """File bornée d'un client /events (trames déjà encodées)"""
+    __slots__ = ("queue", "dropped", "connected_at", "delivered")
+
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(queue_size)
+        self.dropped = False
+        self.connected_at = time.time()
+        self.delivered = 0
+
+    async def next(self, timeout: float) -> Optional[bytes]:
+        """Prochaine trame; HEARTBEAT si rien n'arrive avant `timeout`, None si l'abonné a été déconnecté"""
+        try:
+            frame = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None if self.dropped else HEARTBEAT
+        if frame is not None:
+            self.delivered += 1
+        return frame
+
+
+class EventFeed:
+    """Diffusion des événements vers des centaines d'abonnés SSE"""
+
+    def __init__(self, queue_size: int = 256, max_subscribers: int = 1000, history: int = 200):
+        """
+        Args:
+            queue_size: Trames en attente par abonné avant déconnexion pour lenteur
+            max_subscribers: Abonnés simultanés au plus (au-delà, subscribe retourne None)
+            history: Trames récentes gardées pour la reprise via Last-Event-ID
+        """
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscriber] = set()
+        self.history: Deque[Tuple[int, bytes]] = deque(maxlen=history)
+        self.last_id = 0
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "rejected": 0, "connections": 0}
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """Encode l'événement une fois et le dépose chez chaque abonné; retourne son ID"""
+        self.last_id += 1
+        payload = dict(data, ts=round(time.time(), 3))
+        frame = (f"id: {self.last_id}\nevent: {event_type}\n"
+                 f"data: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n").encode("utf-8")
+        self.history.append((self.last_id, frame))
+        self.stats["published"] += 1
+        EVENTS_PUBLISHED.labels(event_type).inc()
+
+        slow = []
+        for subscriber in self.subscribers:
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                slow.append(subscriber)
+        self.stats["delivered"] += len(self.subscribers) - len(slow)
+        for subscriber in slow:
+            self._drop(subscriber)
+        return self.last_id
+
+    def _drop(self, subscriber: Subscriber):
+        """Déconnecte un abonné trop lent: sa file est vidée et remplacée par la sentinelle de fin"""
+        self.subscribers.discard(subscriber)
+        subscriber.dropped = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+        self.stats["dropped"] += 1
+        SUBSCRIBERS_DROPPED.inc()
+        print(f"🐢 Abonné /events déconnecté (file pleine, {self.queue_size} trames en attente)")
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Nouvel abonné, avec les trames manquées depuis `last_event_id` si elles sont encore en historique"""
+        if len(self.subscribers) >= self.max_subscribers:
+            self.stats["rejected"] += 1
+            return None
+        subscriber = Subscriber(self.queue_size)
+        if last_event_id:
+            try:
+                since = int(last_event_id)
+            except ValueError:
+                since = self.last_id
+            missed = [frame for event_id, frame in self.history if event_id > since]
+            for frame in missed[-self.queue_size:]:
+                subscriber.queue.put_nowait(frame)
+        self.subscribers.add(subscriber)
+        self.stats["connections"] += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        status["subscribers"] = len(self.subscribers)
+        status["last_id"] = self.last_id
+        return status
@@ -0,0 +1,152 @@
+"""
+Bail de leader pour l'exécution unique du planificateur entre plusieurs instances.
+
+Le bail est une ligne SQLite partagée par les processus d'une même machine
+(déploiement progressif, exécution locale en parallèle). Seul le détenteur du
+bail lance et édite les prédictions ; les autres instances restent prêtes avec
+la planification en mémoire et reprennent dès que le bail expire.
+
+Chaque changement de détenteur incrémente un jeton de fencing : un ancien
+leader qui se réveille après une pause ne peut plus agir, car son jeton ne
+correspond plus à celui de la base.
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+from typing import Callable, List, Optional
+
+
+class LeaderLease:
+    """Bail de leader renouvelé par heartbeat, stocké dans une ligne SQLite"""
+
+    def __init__(self, db_path: str = os.path.join("data", "leader.db"), name: str = "scheduler",
+                 ttl_seconds: float = 15.0, holder_id: Optional[str] = None):
+        """
+        Args:
+            db_path: Fichier SQLite partagé entre les instances
+            name: Nom du bail (une ligne par ressource protégée)
+            ttl_seconds: Durée de validité du bail sans renouvellement
+            holder_id: Identifiant de cette instance (hôte:pid par défaut)
+        """
+        self.db_path = db_path
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder_id = holder_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.token: Optional[int] = None
+        self.expires_at = 0.0
+        self.is_running = False
+        self.on_change: List[Callable[[bool], None]] = []
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lease ("
+                "name TEXT PRIMARY KEY, holder TEXT, token INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+
+    @property
+    def is_leader(self) -> bool:
+        """Vrai si le bail est détenu et pas encore expiré localement (sans I/O)"""
+        return self.token is not None and time.time() < self.expires_at
+
+    def try_acquire(self) -> bool:
+        """Acquiert ou renouvelle le bail ; retourne True si cette instance est leader"""
+        was_leader = self.is_leader
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT holder, token, expires_at FROM lease WHERE name = ?", (self.name,)
+            ).fetchone()
+
+            if row is None:
+                token = 1
+                conn.execute(
+                    "INSERT INTO lease (name, holder, token, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.name, self.holder_id, token, now + self.ttl_seconds)
+                )
+            else:
+                holder, token, expires_at = row
+                if holder == self.holder_id and token == self.token:
+                    pass  # Renouvellement du bail courant
+                elif expires_at <= now or holder is None:
+                    token += 1  # Nouveau détenteur : nouveau jeton de fencing
+                else:
+                    conn.execute("COMMIT")
+                    self._set_state(None, 0.0, was_leader)
+                    return False
+                conn.execute(
+                    "UPDATE lease SET holder = ?, token = ?, expires_at = ? WHERE name = ?",
+                    (self.holder_id, token, now + self.ttl_seconds, self.name)
+                )
+            conn.execute("COMMIT")
+            self._set_state(token, now + self.ttl_seconds, was_leader)
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Erreur bail leader: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            return self.is_leader
+        finally:
+            conn.close()
+
+    def _set_state(self, token: Optional[int], expires_at: float, was_leader: bool):
+        self.token = token
+        self.expires_at = expires_at
+        if self.is_leader != was_leader:
+            print(f"👑 Instance {self.holder_id} {'devient leader' if self.is_leader else 'passe en suiveur'} (jeton {token})")
+            for callback in self.on_change:
+                try:
+                    callback(self.is_leader)
+                except Exception as e:
+                    print(f"❌ Erreur callback bail leader: {e}")
+
+    def check_fencing_token(self) -> bool:
+        """Vérifie en base que notre jeton est toujours le jeton courant avant une action"""
+        if not self.is_leader:
+            return False
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT holder, token FROM lease WHERE name = ?", (self.name,)
+                ).fetchone()
+            return row is not None and row[0] == self.holder_id and row[1] == self.token
+        except sqlite3.Error as e:
+            print(f"❌ Erreur vérification jeton: {e}")
+            return False
+
+    def release(self):
+        """Libère le bail pour une reprise immédiate par une autre instance"""
+        if self.token is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE lease SET holder = NULL, expires_at = 0 WHERE name = ? AND holder = ? AND token = ?",
+                    (self.name, self.holder_id, self.token)
+                )
+        except sqlite3.Error as e:
+            print(f"❌ Erreur libération bail: {e}")
+        self._set_state(None, 0.0, self.is_leader)
+
+    async def run(self):
+        """Boucle de heartbeat : renouvelle le bail toutes les ttl/3 secondes"""
+        self.is_running = True
+        while self.is_running:
+            self.try_acquire()
+            await asyncio.sleep(self.ttl_seconds / 3)
+
+    def stop(self):
+        """Arrête le heartbeat et libère le bail"""
+        self.is_running = False
+        self.release()
@@ -0,0 +1,207 @@
+"""
+Surveillance de la boucle asyncio partagée (Telethon, serveur web, planificateur).
+
+- Sonde de latence : une tâche dort `interval` secondes et mesure son retard
+  au réveil ; le p99 sur une fenêtre glissante sert au statut de /health.
+- Rappels lents, à la demande (`capture(seconds)`, /debug/slow?capture=N) :
+  pendant la fenêtre de capture seulement, chaque rappel exécuté par la boucle
+  est chronométré (enrobage de `asyncio.events.Handle._run`, interne à
+  CPython) ; au-delà de `slow_threshold`, il est enregistré avec son site
+  d'appel. Un thread de surveillance capture la pile du thread de la boucle
+  pendant le blocage, ce qui attribue la lenteur à la ligne réellement
+  bloquante (dump YAML, zip...). Hors capture, seule la sonde tourne et les
+  rappels s'exécutent sans aucun enrobage.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from metrics import registry
+
+LOOP_LAG_SECONDS = registry.histogram(
+    "bot_loop_lag_seconds", "Retard de réveil de la sonde de la boucle asyncio",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+SLOW_CALLBACKS = registry.counter("bot_slow_callbacks_total", "Rappels asyncio plus longs que le seuil")
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+THIS_FILE = os.path.abspath(__file__)
+
+
+def _call_site(frames: List[traceback.FrameSummary]) -> str:
+    """Frame la plus profonde appartenant au projet (sinon la plus profonde tout court)"""
+    frames = [frame for frame in frames if frame.filename != THIS_FILE]
+    for frame in reversed(frames):
+        if frame.filename.startswith(PROJECT_DIR) and "site-packages" not in frame.filename:
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    if frames:
+        frame = frames[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    return "inconnu"
+
+
+def _describe_callback(handle) -> str:
+    """Nom lisible d'un rappel (coroutine de la tâche si c'est une étape de tâche)"""
+    callback = getattr(handle, "_callback", None)
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopMonitor:
+    """Sonde de latence et capture des rappels lents de la boucle asyncio"""
+
+    def __init__(self, interval: float = 0.5, window: int = 600, slow_threshold: float = 0.1,
+                 degraded_p99: float = 0.5, max_sites: int = 200):
+        """
+        Args:
+            interval: Période de la sonde de latence (secondes)
+            window: Nombre d'échantillons de latence conservés pour le p99
+            slow_threshold: Durée au-delà de laquelle un rappel est considéré lent
+            degraded_p99: p99 de latence au-delà duquel /health est dégradé
+            max_sites: Nombre maximal de sites d'appel lents suivis
+        """
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+        self.slow_threshold = slow_threshold
+        self.degraded_p99 = degraded_p99
+        self.max_sites = max_sites
+        self.slow_sites: Dict[str, Dict[str, Any]] = {}
+        self.is_running = False
+
+        # État du rappel en cours, partagé avec le thread de surveillance
+        self._loop_thread_id: Optional[int] = None
+        self._current_started_at = 0.0
+        self._current_stack: Optional[List[traceback.FrameSummary]] = None
+        self._original_run = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._capture_end: Optional[asyncio.TimerHandle] = None
+        self.capturing_until: Optional[float] = None  # Horodatage (time.time) de fin de capture
+
+    # --- Sonde de latence ---
+    async def run(self):
+        """Tâche de sonde: enregistre le retard de chaque réveil"""
+        self.is_running = True
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def stop(self):
+        self.is_running = False
+        self.uninstall()
+
+    def lag_percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def health(self) -> Dict[str, Any]:
+        p99 = self.lag_percentile(0.99)
+        return {
+            "status": "degraded" if p99 > self.degraded_p99 else "ok",
+            "lag_p50_ms": round(self.lag_percentile(0.5) * 1000, 1),
+            "lag_p99_ms": round(p99 * 1000, 1),
+            "lag_max_ms": round(max(self.samples, default=0.0) * 1000, 1),
+            "samples": len(self.samples),
+        }
+
+    # --- Rappels lents ---
+    def capture(self, seconds: float) -> float:
+        """Chronomètre les rappels pendant `seconds` secondes (prolonge une capture en cours)
+
+        Doit être appelé depuis la boucle surveillée; retourne la fin de capture (time.time).
+        """
+        loop = asyncio.get_running_loop()
+        if self._capture_end is not None:
+            self._capture_end.cancel()
+        self.install()
+        self._capture_end = loop.call_later(seconds, self.uninstall)
+        self.capturing_until = time.time() + seconds
+        print(f"🔬 Capture des rappels lents pendant {seconds:.0f}s")
+        return self.capturing_until
+
+    def install(self):
+        """Chronomètre chaque rappel de la boucle et démarre le thread de surveillance"""
+        if self._original_run is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        original_run = self._original_run = asyncio.events.Handle._run
+        monitor = self
+
+        def timed_run(handle):
+            started_at = time.perf_counter()
+            monitor._current_started_at = started_at
+            monitor._current_stack = None
+            try:
+                return original_run(handle)
+            finally:
+                monitor._current_started_at = 0.0
+                duration = time.perf_counter() - started_at
+                if duration >= monitor.slow_threshold:
+                    monitor._record(handle, duration)
+
+        asyncio.events.Handle._run = timed_run
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def uninstall(self):
+        if self._capture_end is not None:
+            self._capture_end.cancel()
+            self._capture_end = None
+        self.capturing_until = None
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    def _watch(self):
+        """Thread: capture la pile de la boucle quand un rappel dépasse le seuil"""
+        period = self.slow_threshold / 2
+        while self._original_run is not None:
+            time.sleep(period)
+            started_at = self._current_started_at
+            if started_at and self._current_stack is None and time.perf_counter() - started_at >= self.slow_threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._current_stack = traceback.extract_stack(frame)
+
+    def _record(self, handle, duration: float):
+        SLOW_CALLBACKS.inc()
+        stack = self._current_stack
+        self._current_stack = None
+        callback = _describe_callback(handle)
+        site = _call_site(stack) if stack else callback
+
+        entry = self.slow_sites.get(site)
+        if entry is None:
+            if len(self.slow_sites) >= self.max_sites:
+                # Oublie le site le moins coûteux pour rester borné
+                cheapest = min(self.slow_sites, key=lambda key: self.slow_sites[key]["total_seconds"])
+                del self.slow_sites[cheapest]
+            entry = self.slow_sites[site] = {
+                "site": site, "callback": callback, "count": 0,
+                "total_seconds": 0.0, "max_seconds": 0.0, "last_at": None, "stack": [],
+            }
+        entry["count"] += 1
+        entry["total_seconds"] += duration
+        entry["max_seconds"] = max(entry["max_seconds"], duration)
+        entry["last_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        if stack:
+            entry["stack"] = [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in stack[-8:]]
+
+    def worst_sites(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Sites d'appel lents, du plus coûteux au moins coûteux"""
+        ordered = sorted(self.slow_sites.values(), key=lambda entry: entry["total_seconds"], reverse=True)
+        return [dict(entry, total_seconds=round(entry["total_seconds"], 3),
+                     max_seconds=round(entry["max_seconds"], 3)) for entry in ordered[:limit]]
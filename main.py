@@ -2,16 +2,37 @@ import os
 import asyncio
 import re
 import json
+import time
 import zipfile
 import tempfile
 import shutil
 from datetime import datetime
+from typing import Optional
 from telethon import TelegramClient, events
 from telethon.events import ChatAction
 from dotenv import load_dotenv
-from predictor import CardPredictor
-from scheduler import PredictionScheduler
-from yaml_manager import init_database, db
+from predictor import CardPredictor, MessageDigestCache, message_digest
+from scheduler import PredictionScheduler, SchedulerEngine, CatchUpPolicy, schedule_file_for, game_number_of
+from yaml_manager import init_database, db, ScheduleStore
+from leader_lease import LeaderLease
+from router import ChatRouter, KIND_NEW, KIND_EDITED
+from commands import CommandDispatcher
+from entity_cache import EntityCache
+from session_store import build_session, cleanup_legacy_sessions
+from backfill import HistoryBackfill
+from outbox import Outbox, outbox_key
+from loop_monitor import LoopMonitor
+from memory_profiler import MemoryProfiler, format_report
+from profiler import SamplingProfiler
+from status_snapshot import StatusSnapshot
+from event_feed import (EventFeed, EVENT_PREDICTION_CREATED, EVENT_PREDICTION_VERIFIED,
+                        EVENT_PREDICTION_EXPIRED, EVENT_LEADER_CHANGED)
+from tracing import (SpanRing, STAGE_ROUTE, STAGE_PARSE, STAGE_PENDING_EDIT, STAGE_SHOULD_PREDICT,
+                     STAGE_BROADCAST, STAGE_VERIFY, STAGE_EXPIRY, STAGE_SCHEDULER_VERIFY,
+                     STAGE_PERSIST, STAGE_REPORT)
+from metrics import (registry, MESSAGES, PREDICTIONS, VERIFICATIONS,
+                     HANDLER_SECONDS, PARSE_SECONDS)
+from outbound import OutboundDispatcher, on_result, PRIORITY_PREDICTION, PRIORITY_STATUS, PRIORITY_REPORT
 from aiohttp import web
 import threading
 
@@ -25,6 +46,35 @@ try:
     BOT_TOKEN = os.getenv('BOT_TOKEN') or ''
     ADMIN_ID = int(os.getenv('ADMIN_ID') or '0')
     PORT = int(os.getenv('PORT') or '10000')
+    # Rattrapage des créneaux du planificateur manqués pendant un arrêt
+    CATCHUP_GRACE_MINUTES = int(os.getenv('CATCHUP_GRACE_MINUTES') or '10')
+    CATCHUP_EXPIRE_MINUTES = int(os.getenv('CATCHUP_EXPIRE_MINUTES') or '120')
+    # Bail de leader partagé entre instances (une seule lance et édite)
+    LEADER_LEASE_DB = os.getenv('LEADER_LEASE_DB') or os.path.join('data', 'leader.db')
+    LEADER_LEASE_TTL = float(os.getenv('LEADER_LEASE_TTL') or '15')
+    # Limitation de débit des envois sortants par chat
+    OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE') or '1')
+    OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST') or '3')
+    # Fenêtre de regroupement des éditions d'un même message (secondes)
+    OUTBOUND_EDIT_WINDOW = float(os.getenv('OUTBOUND_EDIT_WINDOW') or '1')
+    # File de traitement ordonnée par chat (taille maximale avant contre-pression)
+    ROUTER_QUEUE_SIZE = int(os.getenv('ROUTER_QUEUE_SIZE') or '1000')
+    # Rattrapage du canal stats après redémarrage/reconnexion (messages au plus)
+    BACKFILL_MAX_GAP = int(os.getenv('BACKFILL_MAX_GAP') or '500')
+    # Journal persistant des envois (reprise après arrêt brutal)
+    OUTBOX_DB = os.getenv('OUTBOX_DB') or os.path.join('data', 'outbox.db')
+    # Spans de traçage conservés en mémoire (/debug/trace)
+    TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE') or '8192')
+    # Jeton des endpoints de diagnostic sensibles (/debug/memory); vide = désactivés
+    DEBUG_TOKEN = os.getenv('DEBUG_TOKEN') or ''
+    # Surveillance de la boucle: rappels lents et seuil de latence p99 de /health (ms)
+    LOOP_SLOW_CALLBACK_MS = float(os.getenv('LOOP_SLOW_CALLBACK_MS') or '100')
+    LOOP_LAG_DEGRADED_MS = float(os.getenv('LOOP_LAG_DEGRADED_MS') or '500')
+    # Durée maximale d'une capture des rappels lents (/debug/slow?capture=N, secondes)
+    LOOP_CAPTURE_MAX_SECONDS = float(os.getenv('LOOP_CAPTURE_MAX_SECONDS') or '300')
+    # Flux SSE /events: trames en attente par abonné avant déconnexion, abonnés simultanés
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE') or '256')
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS') or '1000')
     
     # Validation des variables requises
     if not API_ID or API_ID == 0:
@@ -106,34 +156,105 @@ def update_channel_config(source_id: int, target_id: int):
     detected_stat_channel = source_id
     detected_display_channel = target_id
     save_config()
+    refresh_routes()
 
 # Initialize database
 database = init_database()
 
 # Gestionnaire de prédictions
 predictor = CardPredictor()
+# Éditions du canal stats déjà traitées avec le même contenu utile
+edit_dedup = MessageDigestCache()
 
 # Planificateur automatique
-scheduler = None
-
-# Initialize Telegram client with unique session name
-import time
-session_name = f'bot_session_{int(time.time())}'
-client = TelegramClient(session_name, API_ID, API_HASH)
+scheduler = None  # Planificateur de la paire de canaux configurée (stat → display)
+scheduler_engine = None  # Moteur partagé pilotant toutes les paires de canaux
+scheduler_task = None
+
+# Bail de leader: les instances suiveuses traitent les messages sans rien envoyer
+leader_lease = LeaderLease(LEADER_LEASE_DB, ttl_seconds=LEADER_LEASE_TTL)
+
+# Session stable (fichier ou TELEGRAM_SESSION): pas de nouvelle autorisation à chaque démarrage
+cleanup_legacy_sessions()
+session, session_is_warm = build_session()
+client = TelegramClient(session, API_ID, API_HASH)
+startup_metrics = {"session": "warm" if session_is_warm else "cold", "start_seconds": None}
+
+# File d'envoi sortante: les handlers n'attendent jamais le réseau
+outbound = OutboundDispatcher(client, chat_rate=OUTBOUND_CHAT_RATE, chat_burst=OUTBOUND_CHAT_BURST,
+                              edit_window=OUTBOUND_EDIT_WINDOW)
+pending_prediction_sends = {}  # {game_number: Future du message de prédiction en cours d'envoi}
+outbox = Outbox(OUTBOX_DB)
+
+# Variantes de métriques utilisées sur le chemin critique
+STAT_MESSAGES = MESSAGES.labels("stat")
+SCHEDULER_SOURCE_MESSAGES = MESSAGES.labels("scheduler_source")
+ADMIN_MESSAGES = MESSAGES.labels("admin")
+DROPPED_MESSAGES = MESSAGES.labels("dropped")
+MANUAL_PREDICTIONS = PREDICTIONS.labels("manual")
+
+# Routage par chat: canal stats → prédictions, messages privés → commandes, le reste est ignoré
+# Chaque chat routé est traité dans l'ordre par sa propre tâche
+router = ChatRouter(max_queue_per_chat=ROUTER_QUEUE_SIZE)
+commands = CommandDispatcher(ADMIN_ID)
+
+# Cache des entités (bot, canaux) persisté entre redémarrages
+entity_cache = EntityCache(client, me_key=f"me:{BOT_TOKEN.split(':')[0]}")
+
+# Dernier message traité par canal, pour rejouer l'écart après une interruption
+history_backfill = HistoryBackfill(client, max_gap=BACKFILL_MAX_GAP)
+
+# Spans de traçage du pipeline du canal stats
+tracer = SpanRing(TRACE_BUFFER_SIZE)
+
+# Profilage mémoire à la demande (/debug/memory, /mem)
+memory_profiler = MemoryProfiler()
+memory_profiler.track("predictor.prediction_status", predictor.prediction_status)
+memory_profiler.track("predictor.processed_messages", predictor.processed_messages)
+memory_profiler.track("predictor.status_log", predictor.status_log)
+memory_profiler.track("predictor.prediction_messages", predictor.prediction_messages)
+memory_profiler.track("predictor.pending_edit_messages", predictor.pending_edit_messages)
+memory_profiler.track("confirmation_pending", confirmation_pending)
+memory_profiler.track("pending_prediction_sends", pending_prediction_sends)
+memory_profiler.track("entity_cache.entries", entity_cache.entries)
+memory_profiler.track("backfill.last_ids", history_backfill.last_ids)
+memory_profiler.track("telethon.entity_cache", getattr(client, '_entity_cache', {}))
+
+# Profileur CPU par échantillonnage (/debug/profile, /profile)
+cpu_profiler = SamplingProfiler()
+
+# Latence de la boucle asyncio et rappels bloquants (/health, /debug/slow)
+loop_monitor = LoopMonitor(slow_threshold=LOOP_SLOW_CALLBACK_MS / 1000,
+                           degraded_p99=LOOP_LAG_DEGRADED_MS / 1000)
+
+# Flux en direct des prédictions et changements de statut (/events)
+event_feed = EventFeed(queue_size=EVENTS_QUEUE_SIZE, max_subscribers=EVENTS_MAX_SUBSCRIBERS)
 
 async def start_bot():
     """Start the bot with proper error handling"""
     try:
         # Load saved configuration first
         load_config()
+        refresh_routes()
+        # Les messages en direct du canal stats attendent la fin du rattrapage
+        if detected_stat_channel:
+            router.hold(detected_stat_channel)
 
+        started_at = time.perf_counter()
         await client.start(bot_token=BOT_TOKEN)
         print("Bot démarré avec succès...")
 
-        # Get bot info
-        me = await client.get_me()
-        username = getattr(me, 'username', 'Unknown') or f"ID:{getattr(me, 'id', 'Unknown')}"
-        print(f"Bot connecté: @{username}")
+        # Get bot info (cache préchargé avec les canaux configurés)
+        await entity_cache.warm([detected_stat_channel, detected_display_channel])
+        me = await entity_cache.get_me() or {}
+        username = me.get('username') or f"ID:{me.get('id', 'Unknown')}"
+        startup_metrics["start_seconds"] = round(time.perf_counter() - started_at, 3)
+        print(f"Bot connecté: @{username} (démarrage {startup_metrics['session']} en {startup_metrics['start_seconds']}s)")
+
+        await reconcile_outbox()
+        # Paires planifiées avant l'arrêt: rattrapage des créneaux avant celui du canal stats
+        restore_scheduler_channels()
+        await catch_up_stat_channel()
 
     except Exception as e:
         print(f"Erreur lors du démarrage du bot: {e}")
@@ -153,19 +274,16 @@ async def handler_join(event):
         print(f"user_id: {event.user_id}, chat_id: {event.chat_id}")
 
         if event.user_joined or event.user_added:
-            me = await client.get_me()
-            me_id = getattr(me, 'id', None)
+            me = await entity_cache.get_me() or {}
+            me_id = me.get('id')
             print(f"Mon ID: {me_id}, Event user_id: {event.user_id}")
 
             if event.user_id == me_id:
                 confirmation_pending[event.chat_id] = 'waiting_confirmation'
 
                 # Get channel info
-                try:
-                    chat = await client.get_entity(event.chat_id)
-                    chat_title = getattr(chat, 'title', f'Canal {event.chat_id}')
-                except:
-                    chat_title = f'Canal {event.chat_id}'
+                entity_cache.invalidate(event.chat_id)  # Un échec mis en cache avant l'ajout n'est plus valable
+                chat_title = await entity_cache.get_title(event.chat_id)
 
                 # Send private invitation to admin
                 invitation_msg = f"""🔔 **Nouveau canal détecté**
@@ -190,20 +308,11 @@ Envoyez votre choix en réponse à ce message."""
     except Exception as e:
         print(f"Erreur dans handler_join: {e}")
 
-@client.on(events.NewMessage(pattern=r'/set_stat (-?\d+)'))
 async def set_stat_channel(event):
     """Set statistics channel (only admin in private)"""
     global detected_stat_channel, confirmation_pending
 
     try:
-        # Only allow in private chat with admin
-        if event.is_group or event.is_channel:
-            return
-
-        if event.sender_id != ADMIN_ID:
-            await event.respond("❌ Seul l'administrateur peut configurer les canaux")
-            return
-
         # Extract channel ID from command
         match = event.pattern_match
         channel_id = int(match.group(1))
@@ -218,12 +327,9 @@ async def set_stat_channel(event):
 
         # Save configuration
         save_config()
+        refresh_routes()
 
-        try:
-            chat = await client.get_entity(channel_id)
-            chat_title = getattr(chat, 'title', f'Canal {channel_id}')
-        except:
-            chat_title = f'Canal {channel_id}'
+        chat_title = await entity_cache.get_title(channel_id)
 
         await event.respond(f"✅ **Canal de statistiques configuré**\n📋 {chat_title}\n\n✨ Le bot surveillera ce canal pour les prédictions - développé par Sossou Kouamé Appolinaire\n💾 Configuration sauvegardée automatiquement")
         print(f"Canal de statistiques configuré: {channel_id}")
@@ -231,20 +337,11 @@ async def set_stat_channel(event):
     except Exception as e:
         print(f"Erreur dans set_stat_channel: {e}")
 
-@client.on(events.NewMessage(pattern=r'/set_display (-?\d+)'))
 async def set_display_channel(event):
     """Set display channel (only admin in private)"""
     global detected_display_channel, confirmation_pending
 
     try:
-        # Only allow in private chat with admin
-        if event.is_group or event.is_channel:
-            return
-
-        if event.sender_id != ADMIN_ID:
-            await event.respond("❌ Seul l'administrateur peut configurer les canaux")
-            return
-
         # Extract channel ID from command
         match = event.pattern_match
         channel_id = int(match.group(1))
@@ -260,11 +357,7 @@ async def set_display_channel(event):
         # Save configuration
         save_config()
 
-        try:
-            chat = await client.get_entity(channel_id)
-            chat_title = getattr(chat, 'title', f'Canal {channel_id}')
-        except:
-            chat_title = f'Canal {channel_id}'
+        chat_title = await entity_cache.get_title(channel_id)
 
         await event.respond(f"✅ **Canal de diffusion configuré**\n📋 {chat_title}\n\n🚀 Le bot publiera les prédictions dans ce canal - développé par Sossou Kouamé Appolinaire\n💾 Configuration sauvegardée automatiquement")
         print(f"Canal de diffusion configuré: {channel_id}")
@@ -273,7 +366,6 @@ async def set_display_channel(event):
         print(f"Erreur dans set_display_channel: {e}")
 
 # --- COMMANDES DE BASE ---
-@client.on(events.NewMessage(pattern='/start'))
 async def start_command(event):
     """Send welcome message when user starts the bot"""
     try:
@@ -316,13 +408,9 @@ Le bot est prêt à analyser vos jeux ! 🚀"""
         print(f"Erreur dans start_command: {e}")
 
 # --- COMMANDES ADMINISTRATIVES ---
-@client.on(events.NewMessage(pattern='/status'))
 async def show_status(event):
     """Show bot status (admin only)"""
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         config_status = "✅ Sauvegardée" if os.path.exists(CONFIG_FILE) else "❌ Non sauvegardée"
         status_msg = f"""📊 **Statut du Bot**
 
@@ -338,15 +426,11 @@ Messages traités: {len(predictor.processed_messages)}
     except Exception as e:
         print(f"Erreur dans show_status: {e}")
 
-@client.on(events.NewMessage(pattern='/reset'))
 async def reset_bot(event):
     """Reset bot configuration (admin only)"""
     global detected_stat_channel, detected_display_channel, confirmation_pending
 
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         detected_stat_channel = None
         detected_display_channel = None
         confirmation_pending.clear()
@@ -354,6 +438,7 @@ async def reset_bot(event):
 
         # Save the reset configuration
         save_config()
+        refresh_routes()
 
         await event.respond("🔄 Bot réinitialisé avec succès\n💾 Configuration effacée et sauvegardée")
         print("Bot réinitialisé par l'administrateur")
@@ -362,13 +447,9 @@ async def reset_bot(event):
 
 # Handler /deploy supprimé - remplacé par le handler 2D plus bas
 
-@client.on(events.NewMessage(pattern='/test_invite'))
 async def test_invite(event):
     """Test sending invitation (admin only)"""
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         # Test invitation message
         test_msg = f"""🔔 **Test d'invitation**
 
@@ -387,13 +468,9 @@ Ceci est un message de test pour vérifier les invitations."""
     except Exception as e:
         print(f"Erreur dans test_invite: {e}")
 
-@client.on(events.NewMessage(pattern='/sta'))
 async def show_trigger_numbers(event):
     """Show current trigger numbers for automatic predictions"""
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         trigger_nums = list(predictor.trigger_numbers)
         trigger_nums.sort()
 
@@ -420,13 +497,9 @@ async def show_trigger_numbers(event):
         print(f"Erreur dans show_trigger_numbers: {e}")
         await event.respond(f"❌ Erreur: {e}")
 
-@client.on(events.NewMessage(pattern='/report'))
 async def show_report_status(event):
     """Show report counter and remaining messages until next automatic report"""
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         total_predictions = len(predictor.status_log)
         processed_messages = len(predictor.processed_messages)
         pending_predictions = len([s for s in predictor.prediction_status.values() if s == '⌛'])
@@ -477,24 +550,145 @@ async def show_report_status(event):
 
 # Handler /deploy supprimé - remplacé par le handler 2D unique
 
-@client.on(events.NewMessage(pattern='/scheduler'))
+def save_scheduler_channels():
+    """Mémorise les paires planifiées actives, rechargées au démarrage"""
+    try:
+        if database:
+            pairs = [list(key) for key in scheduler_engine.channels] if scheduler_engine else []
+            database.set_config('scheduler_channels', pairs)
+    except Exception as e:
+        print(f"❌ Erreur sauvegarde des paires planifiées: {e}")
+
+def load_scheduler_channels() -> list:
+    """Paires planifiées sauvegardées [(source_id, target_id)]"""
+    try:
+        pairs = database.get_config('scheduler_channels', []) if database else []
+        return [(int(source_id), int(target_id)) for source_id, target_id in pairs or []]
+    except Exception as e:
+        print(f"⚠️ Erreur lecture des paires planifiées: {e}")
+        return []
+
+def restore_scheduler_channels() -> int:
+    """Charge les paires sauvegardées absentes du moteur: partitions en mémoire et, sur le leader, rattrapage des créneaux manqués
+
+    Appelée au démarrage et à la prise du rôle de leader, sur chaque instance:
+    un suiveur garde ainsi les mêmes canaux que le leader.
+    """
+    active = set(scheduler_engine.channels) if scheduler_engine else set()
+    pairs = [pair for pair in load_scheduler_channels() if pair not in active]
+    for source_id, target_id in pairs:
+        start_scheduler_channel(source_id, target_id, persist=False)
+    if pairs:
+        print(f"📅 {len(pairs)} paire(s) planifiée(s) rechargée(s)")
+    return len(pairs)
+
+def on_leadership_change(is_leader: bool):
+    """Nouveau leader: paires ajoutées depuis son démarrage chargées avant la resynchronisation du moteur
+
+    La prise du bail au lancement (avant start_bot) est ignorée: le démarrage recharge lui-même les paires.
+    """
+    if is_leader and startup_metrics["start_seconds"] is not None:
+        restore_scheduler_channels()
+
+async def watch_scheduler_channels(interval: float = 30):
+    """Aligne régulièrement les paires en mémoire sur l'ensemble sauvegardé (ajouts et arrêts décidés par le leader)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            restore_scheduler_channels()
+            saved = set(load_scheduler_channels())
+            for source_id, target_id in list(scheduler_engine.channels if scheduler_engine else []):
+                if (source_id, target_id) not in saved:
+                    await stop_scheduler_channel(source_id, target_id, persist=False)
+        except Exception as e:
+            print(f"❌ Erreur synchronisation des paires planifiées: {e}")
+
+def start_scheduler_channel(source_id: int, target_id: int, persist: bool = True) -> PredictionScheduler:
+    """Ajoute une paire de canaux au moteur partagé et démarre sa boucle si besoin
+
+    Args:
+        persist: Ajoute la paire à l'ensemble sauvegardé (False lors du rechargement au démarrage)
+    """
+    global scheduler, scheduler_engine, scheduler_task
+
+    if scheduler_engine is None:
+        scheduler_engine = SchedulerEngine(
+            client, CardPredictor,
+            catch_up_policy=CatchUpPolicy(CATCHUP_GRACE_MINUTES, CATCHUP_EXPIRE_MINUTES),
+            lease=leader_lease,
+            store=database.schedule_store if database else None,
+            outbound=outbound,
+            events=event_feed
+        )
+
+    # La paire configurée partage l'état du predictor principal (anti-doublons manuels)
+    is_primary = (source_id, target_id) == (detected_stat_channel, detected_display_channel)
+    channel = scheduler_engine.add_channel(source_id, target_id, predictor if is_primary else None)
+    if is_primary:
+        scheduler = channel
+
+    if scheduler_task is None or scheduler_task.done():
+        scheduler_task = asyncio.create_task(scheduler_engine.run())
+    if persist:
+        save_scheduler_channels()
+    refresh_routes()
+    return channel
+
+async def stop_scheduler_channel(source_id, target_id, persist: bool = True) -> bool:
+    """Retire une paire de canaux (toutes si source_id est None) du moteur partagé
+
+    Sans canal restant, la boucle du moteur est annulée et attendue: un
+    `/scheduler start` immédiat ne peut pas réveiller une seconde boucle.
+
+    Args:
+        persist: Retire aussi la paire de l'ensemble sauvegardé (False quand un suiveur se synchronise)
+    """
+    global scheduler, scheduler_task
+
+    if not scheduler_engine:
+        return False
+
+    if source_id is None:
+        keys = list(scheduler_engine.channels)
+    else:
+        keys = [(source_id, target_id)]
+
+    removed = False
+    for key in keys:
+        channel = scheduler_engine.get_channel(*key)
+        if scheduler_engine.remove_channel(*key):
+            removed = True
+            if channel is scheduler:
+                scheduler = None
+    if removed and persist:
+        save_scheduler_channels()
+
+    if not scheduler_engine.channels:
+        scheduler_engine.stop()
+        task, scheduler_task = scheduler_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    refresh_routes()
+    return removed
+
 async def manage_scheduler(event):
     """Gestion du planificateur automatique (admin uniquement)"""
-    global scheduler
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         # Parse command arguments
-        message_parts = event.message.message.split()
+        message_parts = event.command_parts
         if len(message_parts) < 2:
             await event.respond("""🤖 **Commandes du Planificateur Automatique**
 
 **Usage**: `/scheduler [commande]`
 
 **Commandes disponibles**:
-• `start` - Démarre le planificateur automatique
-• `stop` - Arrête le planificateur
+• `start [source_id] [target_id]` - Démarre la planification d'une paire de canaux
+• `stop [source_id] [target_id]` - Arrête une paire (`stop all` pour toutes)
+• `list` - Liste les paires de canaux planifiées
 • `status` - Affiche le statut actuel
 • `generate` - Génère une nouvelle planification
 • `config [source_id] [target_id]` - Configure les canaux
@@ -504,29 +698,44 @@ async def manage_scheduler(event):
 
         command = message_parts[1].lower()
 
-        if command == "start":
-            if not scheduler:
-                if detected_stat_channel and detected_display_channel:
-                    scheduler = PredictionScheduler(
-                        client, predictor,
-                        detected_stat_channel, detected_display_channel
-                    )
-                    # Démarre le planificateur en arrière-plan
-                    asyncio.create_task(scheduler.run_scheduler())
-                    await event.respond("✅ **Planificateur démarré**\n\nLe système de prédictions automatiques est maintenant actif.")
-                else:
-                    await event.respond("❌ **Configuration manquante**\n\nVeuillez d'abord configurer les canaux source et cible avec `/set_stat` et `/set_display`.")
+        if command in ("start", "stop"):
+            # Paire explicite `/scheduler start [source_id] [target_id]`, sinon la paire configurée
+            if len(message_parts) >= 4:
+                source_id, target_id = int(message_parts[2]), int(message_parts[3])
             else:
-                await event.respond("⚠️ **Planificateur déjà actif**\n\nUtilisez `/scheduler stop` pour l'arrêter.")
+                source_id, target_id = detected_stat_channel, detected_display_channel
+
+        if command == "start":
+            if not (source_id and target_id):
+                await event.respond("❌ **Configuration manquante**\n\nVeuillez d'abord configurer les canaux source et cible avec `/set_stat` et `/set_display`.")
+                return
+
+            if scheduler_engine and scheduler_engine.get_channel(source_id, target_id):
+                await event.respond("⚠️ **Planificateur déjà actif** pour ce canal\n\nUtilisez `/scheduler stop` pour l'arrêter.")
+                return
+
+            start_scheduler_channel(source_id, target_id)
+            await event.respond(f"✅ **Planificateur démarré**\n\n📥 {source_id} → 📤 {target_id}\nCanaux planifiés: {len(scheduler_engine.channels)}")
 
         elif command == "stop":
-            if scheduler:
-                scheduler.stop_scheduler()
-                scheduler = None
-                await event.respond("🛑 **Planificateur arrêté**\n\nLes prédictions automatiques sont désactivées.")
+            if len(message_parts) < 4 and message_parts[-1].lower() == "all":
+                await stop_scheduler_channel(None, None)
+                await event.respond("🛑 **Planificateur arrêté**\n\nToutes les prédictions automatiques sont désactivées.")
+            elif scheduler_engine and await stop_scheduler_channel(source_id, target_id):
+                await event.respond(f"🛑 **Planificateur arrêté** pour {source_id} → {target_id}\n\nCanaux restants: {len(scheduler_engine.channels)}")
             else:
                 await event.respond("ℹ️ **Planificateur non actif**\n\nUtilisez `/scheduler start` pour le démarrer.")
 
+        elif command == "list":
+            if scheduler_engine and scheduler_engine.channels:
+                msg = f"📡 **Canaux planifiés** ({len(scheduler_engine.channels)})\n\n"
+                for (source_id, target_id), channel in list(scheduler_engine.channels.items())[:50]:
+                    channel_status = channel.get_schedule_status()
+                    msg += f"• {source_id} → {target_id}: {channel_status.get('launched', 0)}/{channel_status.get('total', 0)} lancées\n"
+                await event.respond(msg)
+            else:
+                await event.respond("ℹ️ **Aucun canal planifié**")
+
         elif command == "status":
             if scheduler:
                 status = scheduler.get_schedule_status()
@@ -543,7 +752,8 @@ async def manage_scheduler(event):
 
 🔧 **Configuration**:
 • Canal source: {detected_stat_channel}
-• Canal cible: {detected_display_channel}"""
+• Canal cible: {detected_display_channel}
+• Canaux planifiés: {len(scheduler_engine.channels) if scheduler_engine else 0}"""
                 await event.respond(status_msg)
             else:
                 await event.respond("ℹ️ **Planificateur non configuré**\n\nUtilisez `/scheduler start` pour l'activer.")
@@ -552,11 +762,17 @@ async def manage_scheduler(event):
             if scheduler:
                 scheduler.regenerate_schedule()
                 await event.respond("🔄 **Nouvelle planification générée**\n\nLa planification quotidienne a été régénérée avec succès.")
-            else:
-                # Crée un planificateur temporaire pour générer
-                temp_scheduler = PredictionScheduler(client, predictor, 0, 0)
+            elif detected_stat_channel and detected_display_channel:
+                # Génère directement dans la partition que le moteur chargera au `/scheduler start`
+                key = (detected_stat_channel, detected_display_channel)
+                store = database.schedule_store if database else ScheduleStore(os.path.join("data", "schedules"))
+                temp_scheduler = PredictionScheduler(client, predictor, *key,
+                                                     schedule_file=schedule_file_for(str(store.directory), key),
+                                                     store=store)
                 temp_scheduler.regenerate_schedule()
-                await event.respond("✅ **Planification générée**\n\nFichier `prediction.yaml` créé. Utilisez `/scheduler start` pour activer.")
+                await event.respond(f"✅ **Planification générée**\n\n📥 {key[0]} → 📤 {key[1]}\nUtilisez `/scheduler start` pour activer.")
+            else:
+                await event.respond("❌ **Configuration manquante**\n\nVeuillez d'abord configurer les canaux source et cible avec `/set_stat` et `/set_display`.")
 
         elif command == "config" and len(message_parts) >= 4:
             source_id = int(message_parts[2])
@@ -579,32 +795,19 @@ Utilisez `/scheduler start` pour activer le planificateur.""")
         print(f"Erreur dans manage_scheduler: {e}")
         await event.respond(f"❌ Erreur: {e}")
 
-@client.on(events.NewMessage(pattern='/schedule_info'))
 async def schedule_info(event):
     """Affiche les informations détaillées de la planification (admin uniquement)"""
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         if scheduler and scheduler.schedule_data:
-            # Affiche les 10 prochaines prédictions
-            current_time = scheduler.get_current_time_slot()
-            upcoming = []
-
-            for numero, data in scheduler.schedule_data.items():
-                if (not data["launched"] and
-                    data["heure_lancement"] >= current_time):
-                    upcoming.append((numero, data["heure_lancement"]))
-
-            upcoming.sort(key=lambda x: x[1])
-            upcoming = upcoming[:10]  # Limite à 10
+            # Affiche les 10 prochaines prédictions (index trié par heure de lancement)
+            upcoming = scheduler.get_upcoming(10)
 
             msg = "📅 **Prochaines Prédictions Automatiques**\n\n"
-            for numero, heure in upcoming:
-                msg += f"🔵 {numero} → {heure}\n"
+            for numero, data in upcoming:
+                msg += f"🔵 {numero} → {data.get('launch_at') or data['heure_lancement']}\n"
 
             if not upcoming:
-                msg += "ℹ️ Aucune prédiction en attente pour aujourd'hui."
+                msg += "ℹ️ Aucune prédiction en attente."
 
             await event.respond(msg)
         else:
@@ -614,16 +817,12 @@ async def schedule_info(event):
         print(f"Erreur dans schedule_info: {e}")
         await event.respond(f"❌ Erreur: {e}")
 
-@client.on(events.NewMessage(pattern='/intervalle'))
 async def set_prediction_interval(event):
     """Configure l'intervalle avant que le système cherche 'A' (admin uniquement)"""
     global prediction_interval
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         # Parse command arguments
-        message_parts = event.message.message.split()
+        message_parts = event.command_parts
         
         if len(message_parts) < 2:
             await event.respond(f"""⏱️ **Configuration de l'Intervalle de Prédiction**
@@ -673,13 +872,9 @@ Configuration sauvegardée automatiquement.""")
         print(f"Erreur dans set_prediction_interval: {e}")
         await event.respond(f"❌ Erreur: {e}")
 
-@client.on(events.NewMessage(pattern='/deploy'))
 async def generate_deploy_package(event):
     """Génère le package de déploiement 2026 pour Render.com (admin uniquement)"""
     try:
-        if event.sender_id != ADMIN_ID:
-            return
-
         await event.respond("🚀 **Génération Package deployment_2026.zip...**")
         
         try:
@@ -731,7 +926,7 @@ pyyaml==6.0.1"""
 ## Architecture YAML:
 - bot_config.yaml: Configuration persistante
 - predictions.yaml: Historique prédictions
-- auto_predictions.yaml: Planification automatique  
+- schedules/: Planification automatique (une partition YAML indexée par canal ou par jour)
 - message_log.yaml: Logs avec nettoyage automatique
 
 ## Variables Render.com:
@@ -775,67 +970,186 @@ pyyaml==6.0.1"""
     except Exception as e:
         print(f"Erreur deploy: {e}")
 
-# --- TRAITEMENT DES MESSAGES DU CANAL DE STATISTIQUES ---
+async def show_memory(event):
+    """Rapport mémoire (admin only): /mem, /mem reset (nouvelle référence), /mem stop"""
+    try:
+        action = event.command_parts[1].lower() if len(event.command_parts) > 1 else ""
+        loop = asyncio.get_running_loop()
+        if action == "stop":
+            memory_profiler.stop()
+            await event.respond("🧠 tracemalloc arrêté")
+            return
+        if action == "reset":
+            await loop.run_in_executor(None, memory_profiler.reset_baseline)
+        report = await loop.run_in_executor(None, memory_profiler.report)
+        await event.respond(format_report(report))
+    except Exception as e:
+        print(f"Erreur dans show_memory: {e}")
+
+async def profile_command(event):
+    """Profil CPU de N secondes envoyé en document (admin only): /profile N"""
+    try:
+        seconds = float(event.pattern_match.group(1) or 10)
+        await event.respond(f"🔥 Profilage CPU pendant {seconds:.0f}s...")
+        try:
+            result = await cpu_profiler.profile(seconds)
+        except RuntimeError as e:
+            await event.respond(f"❌ {e}")
+            return
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(cpu_profiler.collapsed(result))
+            await client.send_file(event.chat_id, path, caption=cpu_profiler.summary(result))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    except Exception as e:
+        print(f"Erreur dans profile_command: {e}")
+
+# --- ROUTAGE DES MISES À JOUR ---
+# Commandes: contrôle admin et arguments gérés par le répartiteur
+CHANNEL_DENY = "❌ Seul l'administrateur peut configurer les canaux"
+commands.register('start', start_command, admin_only=False)
+commands.register('status', show_status)
+commands.register('reset', reset_bot)
+commands.register('test_invite', test_invite)
+commands.register('sta', show_trigger_numbers)
+commands.register('report', show_report_status)
+commands.register('scheduler', manage_scheduler)
+commands.register('schedule_info', schedule_info)
+commands.register('intervalle', set_prediction_interval)
+commands.register('deploy', generate_deploy_package)
+commands.register('mem', show_memory, usage='/mem [reset|stop]')
+commands.register('profile', profile_command, args_pattern=r'(\d+)?', usage='/profile [secondes]')
+commands.register('set_stat', set_stat_channel, args_pattern=r'(-?\d+)',
+                  usage='/set_stat [ID]', deny_message=CHANNEL_DENY)
+commands.register('set_display', set_display_channel, args_pattern=r'(-?\d+)',
+                  usage='/set_display [ID]', deny_message=CHANNEL_DENY)
+
 @client.on(events.NewMessage())
 @client.on(events.MessageEdited())
+async def route_update(event):
+    """Point d'entrée unique: distribue chaque mise à jour selon son chat"""
+    kind = KIND_EDITED if isinstance(event, events.MessageEdited.Event) else KIND_NEW
+    event.received_at = time.perf_counter()
+    if not await router.dispatch(event, kind):
+        DROPPED_MESSAGES.inc()
+
+def refresh_routes():
+    """Reconstruit la table de routage à partir de la configuration courante"""
+    routes = {}
+    if scheduler_engine:
+        # Canaux sources des paires planifiées: vérification des prédictions automatiques
+        for source_id in scheduler_engine.by_source:
+            routes[(source_id, KIND_NEW)] = handle_scheduler_source
+            routes[(source_id, KIND_EDITED)] = handle_scheduler_source
+    if detected_stat_channel is not None:
+        routes[(detected_stat_channel, KIND_NEW)] = handle_messages
+        routes[(detected_stat_channel, KIND_EDITED)] = handle_messages
+    if ADMIN_ID:
+        routes[(ADMIN_ID, KIND_NEW)] = handle_commands
+    router.set_routes(routes)
+    # Autres messages privés: le répartiteur applique admin_only (/start ouvert, refus explicites)
+    router.set_private_route(handle_commands)
+    publish_status()
+    print(f"🧭 Routage mis à jour: Stats={detected_stat_channel}, Admin={ADMIN_ID}, {len(routes)} route(s)")
+
+# Durées des handlers mesurées en ligne (perf_counter + observe: ~0.5µs par échantillon)
+ADMIN_SECONDS = HANDLER_SECONDS.labels("admin")
+SCHEDULER_SOURCE_SECONDS = HANDLER_SECONDS.labels("scheduler_source")
+STAT_SECONDS = HANDLER_SECONDS.labels("stat")
+
+async def handle_commands(event):
+    """Exécute les commandes reçues en message privé (admin_only contrôlé par le répartiteur)"""
+    started_at = time.perf_counter()
+    ADMIN_MESSAGES.inc()
+    try:
+        await commands.dispatch(event)
+    finally:
+        ADMIN_SECONDS.observe(time.perf_counter() - started_at)
+
+async def handle_scheduler_source(event):
+    """Canal source d'une paire planifiée (hors canal stats): prédictions automatiques uniquement"""
+    started_at = time.perf_counter()
+    SCHEDULER_SOURCE_MESSAGES.inc()
+    try:
+        message_text = event.message.message if event.message else ""
+        if message_text:
+            await verify_auto_predictions(event.chat_id, message_text)
+    finally:
+        SCHEDULER_SOURCE_SECONDS.observe(time.perf_counter() - started_at)
+
+async def catch_up_stat_channel():
+    """Rejoue les messages du canal stats manqués pendant l'interruption, avant le direct"""
+    if not detected_stat_channel:
+        return
+    chat_id = detected_stat_channel
+    router.hold(chat_id)
+    try:
+        await router.join(chat_id)  # Les messages du canal stats déjà en file passent avant le rattrapage
+        # Premier message reçu en direct depuis la pause: borne haute de l'écart à relire
+        upper_bound = router.first_held_id(chat_id, history_backfill.last_processed(chat_id) or 0)
+        await history_backfill.catch_up(chat_id, handle_messages, upper_bound)
+    finally:
+        await router.release(chat_id)
+
+# --- TRAITEMENT DES MESSAGES DU CANAL DE STATISTIQUES ---
 async def handle_messages(event):
     """Handle messages from statistics channel"""
+    STAT_MESSAGES.inc()
+    trace = tracer.new_trace()
+    # Span "route": de la réception par Telethon au début du traitement (file du chat comprise)
+    span_started = handler_started = tracer.record(
+        trace, STAGE_ROUTE, 0, getattr(event, 'received_at', None) or time.perf_counter())
     try:
-        # Debug: Log ALL incoming messages first
-        message_text = event.message.message if event.message else "Pas de texte"
-        print(f"📬 TOUS MESSAGES: Canal {event.chat_id} | Texte: {message_text[:100]}")
-        print(f"🔧 Canal stats configuré: {detected_stat_channel}")
-
-        # Check if stat channel is configured
-        if detected_stat_channel is None:
-            print("⚠️ PROBLÈME: Canal de statistiques non configuré!")
-            return
-
-        # Check if message is from the configured channel
-        if event.chat_id != detected_stat_channel:
-            print(f"❌ Message ignoré: Canal {event.chat_id} ≠ Canal stats {detected_stat_channel}")
+        message_text = event.message.message if event.message else ""
+        if event.message:
+            history_backfill.mark_processed(event.chat_id, event.message.id)
+            span_started = tracer.record(trace, STAGE_PERSIST, 0, span_started)
+        if not message_text:
             return
 
-        if not message_text:
-            print("❌ Message vide ignoré")
+        # Édition qui ne change ni le numéro, ni les groupes, ni les marqueurs: rien à refaire
+        if edit_dedup.is_unchanged(event.chat_id, event.message.id, message_digest(message_text)):
+            tracer.record(trace, STAGE_PARSE, 0, span_started)
             return
 
-        print(f"✅ Message accepté du canal stats {event.chat_id}: {message_text}")
+        game_number = predictor.extract_game_number(message_text)
+        span_started = tracer.record(trace, STAGE_PARSE, game_number, span_started)
 
         # 1. Vérifier si c'est un message en cours d'édition (⏰ ou 🕐)
+        parse_started = time.perf_counter()
         is_pending, game_num = predictor.is_pending_edit_message(message_text)
         if is_pending:
+            PARSE_SECONDS.observe(time.perf_counter() - parse_started)
+            tracer.record(trace, STAGE_PENDING_EDIT, game_num, span_started)
             print(f"⏳ Message #{game_num} mis en attente d'édition finale")
             return  # Ignorer pour le moment, attendre l'édition finale
 
         # 2. Vérifier si c'est l'édition finale d'un message en attente (🔰 ou ✅)
         predicted, predicted_game, suit = predictor.process_final_edit_message(message_text)
+        span_started = tracer.record(trace, STAGE_PENDING_EDIT, game_number, span_started)
         if predicted:
             print(f"🎯 Message édité finalisé, traitement de la prédiction #{predicted_game}")
             # Message de prédiction selon le nouveau format
             prediction_text = f"🔵{predicted_game}— JOKER 2D| ⏳"
 
-            sent_messages = await broadcast(prediction_text)
-
-            # Store message IDs for later editing
-            if sent_messages and predicted_game:
-                for chat_id, message_id in sent_messages:
-                    predictor.store_prediction_message(predicted_game, message_id, chat_id)
+            await broadcast_prediction(predicted_game, prediction_text)
+            span_started = tracer.record(trace, STAGE_BROADCAST, predicted_game, span_started)
 
             print(f"✅ Prédiction générée après édition finale pour le jeu #{predicted_game}: {suit}")
         else:
             # 3. Traitement normal des messages (pas d'édition en cours)
             predicted, predicted_game, suit = predictor.should_predict(message_text)
+            span_started = tracer.record(trace, STAGE_SHOULD_PREDICT, predicted_game or game_number, span_started)
             if predicted:
                 # Message de prédiction manuelle selon le nouveau format demandé
                 prediction_text = f"🔵{predicted_game}— JOKER 2D| ⏳"
 
-                sent_messages = await broadcast(prediction_text)
-
-                # Store message IDs for later editing
-                if sent_messages and predicted_game:
-                    for chat_id, message_id in sent_messages:
-                        predictor.store_prediction_message(predicted_game, message_id, chat_id)
+                await broadcast_prediction(predicted_game, prediction_text)
+                span_started = tracer.record(trace, STAGE_BROADCAST, predicted_game, span_started)
 
                 print(f"✅ Prédiction manuelle générée pour le jeu #{predicted_game}: {suit}")
 
@@ -843,101 +1157,237 @@ async def handle_messages(event):
         verified, number = predictor.verify_prediction(message_text)
         if verified is not None and number is not None:
             statut = predictor.prediction_status.get(number, 'Inconnu')
+            VERIFICATIONS.labels(statut).inc()
+            event_feed.publish(EVENT_PREDICTION_VERIFIED, {"game": number, "source": "manual", "status": statut})
             # Edit the original prediction message instead of sending new message
             success = await edit_prediction_message(number, statut)
             if success:
-                print(f"✅ Message de prédiction #{number} mis à jour avec statut: {statut}")
+                print(f"✅ Mise à jour du message de prédiction #{number} planifiée: {statut}")
             else:
-                print(f"⚠️ Impossible de mettre à jour le message #{number}, envoi d'un nouveau message")
+                print(f"⚠️ Message de prédiction #{number} inconnu, envoi d'un nouveau message")
                 status_text = f"🔵{number}— JOKER 2D| {statut}"
-                await broadcast(status_text)
+                await broadcast(status_text, key=outbox_key("status", number), game_number=number)
+        span_started = tracer.record(trace, STAGE_VERIFY, number or game_number, span_started)
         
         # Check for expired predictions on every valid result message
-        game_number = predictor.extract_game_number(message_text)
         if game_number and not ("⏰" in message_text or "🕐" in message_text):
             expired = predictor.check_expired_predictions(game_number)
+            if expired:
+                VERIFICATIONS.labels('❌❌').inc(len(expired))
             for expired_num in expired:
+                event_feed.publish(EVENT_PREDICTION_EXPIRED, {"game": expired_num, "source": "manual", "status": '❌❌'})
                 # Edit expired prediction messages
                 success = await edit_prediction_message(expired_num, '❌❌')
                 if success:
-                    print(f"✅ Message de prédiction expirée #{expired_num} mis à jour avec ❌❌")
+                    print(f"✅ Mise à jour du message expiré #{expired_num} planifiée: ❌❌")
                 else:
-                    print(f"⚠️ Impossible de mettre à jour le message expiré #{expired_num}")
+                    print(f"⚠️ Message expiré #{expired_num} inconnu, envoi d'un nouveau message")
                     status_text = f"🔵{expired_num}— JOKER 2D| ❌❌"
-                    await broadcast(status_text)
+                    await broadcast(status_text, key=outbox_key("status", expired_num), game_number=expired_num)
+                span_started = tracer.record(trace, STAGE_EXPIRY, expired_num, span_started)
+            if not expired:
+                span_started = tracer.record(trace, STAGE_EXPIRY, game_number, span_started)
 
-        # Vérification des prédictions automatiques du scheduler
-        if scheduler and scheduler.schedule_data:
-            # Récupère les numéros des prédictions automatiques en attente
-            pending_auto_predictions = []
-            for numero_str, data in scheduler.schedule_data.items():
-                if data["launched"] and not data["verified"]:
-                    numero_int = int(numero_str.replace('N', ''))
-                    pending_auto_predictions.append(numero_int)
+        PARSE_SECONDS.observe(time.perf_counter() - parse_started)
+
+        # Vérification des prédictions automatiques de chaque paire planifiée sur ce canal
+        await verify_auto_predictions(event.chat_id, message_text)
+        span_started = tracer.record(trace, STAGE_SCHEDULER_VERIFY, game_number, span_started)
+
+        # Generate periodic report every 20 predictions
+        if len(predictor.status_log) > 0 and len(predictor.status_log) % 20 == 0:
+            await generate_report()
+            tracer.record(trace, STAGE_REPORT, game_number, span_started)
+
+    except Exception as e:
+        print(f"Erreur dans handle_messages: {e}")
+    finally:
+        publish_status()
+        STAT_SECONDS.observe(time.perf_counter() - handler_started)
+
+async def verify_auto_predictions(chat_id: int, message_text: str):
+    """Vérifie les prédictions automatiques des paires planifiées ayant ce canal pour source
+
+    Le leader seul écrit les partitions de planification.
+    """
+    try:
+        auto_schedulers = []
+        if scheduler_engine and leader_lease.is_leader:
+            auto_schedulers = scheduler_engine.channels_for_source(chat_id)
+        for auto_scheduler in auto_schedulers:
+            if not auto_scheduler.schedule_data:
+                continue
+
+            # Numéros de jeu des prédictions automatiques en attente → clé datée (la plus récente)
+            pending_auto_predictions = {}
+            for numero_str, data in auto_scheduler.partition.awaiting_verification():
+                game_number = game_number_of(numero_str)
+                current = pending_auto_predictions.get(game_number)
+                if current is None or auto_scheduler.launch_at_key(data) > auto_scheduler.launch_at_key(auto_scheduler.schedule_data[current]):
+                    pending_auto_predictions[game_number] = numero_str
 
             if pending_auto_predictions:
                 # Vérifie si ce message correspond à une prédiction automatique
-                predicted_num, status = scheduler.verify_prediction_from_message(message_text, pending_auto_predictions)
+                predicted_num, status = auto_scheduler.verify_prediction_from_message(message_text, list(pending_auto_predictions))
 
                 if predicted_num and status:
                     # Met à jour la prédiction automatique
-                    numero_str = f"N{predicted_num:03d}"
-                    if numero_str in scheduler.schedule_data:
-                        data = scheduler.schedule_data[numero_str]
-                        data["verified"] = True
-                        data["statut"] = status
+                    numero_str = pending_auto_predictions.get(predicted_num)
+                    if numero_str in auto_scheduler.schedule_data:
+                        data = auto_scheduler.schedule_data[numero_str]
+                        auto_scheduler.mark_verified(numero_str, status)
+                        VERIFICATIONS.labels(status).inc()
+                        event_feed.publish(EVENT_PREDICTION_VERIFIED, {
+                            "game": predicted_num, "source": "auto", "status": status,
+                            "chat_id": auto_scheduler.target_channel_id
+                        })
 
                         # Met à jour le message
-                        await scheduler.update_prediction_message(numero_str, data, status)
+                        await auto_scheduler.update_prediction_message(numero_str, data, status)
 
                         # Ajouter une nouvelle prédiction pour maintenir la continuité
-                        scheduler.add_next_prediction()
+                        auto_scheduler.add_next_prediction()
 
                         # Sauvegarde
-                        scheduler.save_schedule(scheduler.schedule_data)
+                        auto_scheduler.save_schedule(auto_scheduler.schedule_data)
                         print(f"📝 Prédiction automatique {numero_str} vérifiée: {status}")
                         print(f"🔄 Nouvelle prédiction générée pour maintenir la continuité")
-
-        # Generate periodic report every 20 predictions
-        if len(predictor.status_log) > 0 and len(predictor.status_log) % 20 == 0:
-            await generate_report()
-
     except Exception as e:
-        print(f"Erreur dans handle_messages: {e}")
+        print(f"Erreur dans verify_auto_predictions: {e}")
+
+async def broadcast(message, priority: int = PRIORITY_STATUS, on_sent=None,
+                    key: str = None, game_number: int = None, match_text: str = None):
+    """Broadcast message to display channel
 
-async def broadcast(message):
-    """Broadcast message to display channel"""
+    L'envoi est déposé dans la file sortante et retourne immédiatement la liste
+    des Futures; `on_sent(chat_id, message_id)` est appelé une fois le message envoyé.
+    Avec une clé d'idempotence `key`, l'envoi est d'abord inscrit dans l'outbox;
+    s'il y figure déjà comme terminé, il n'est pas renvoyé.
+    """
     global detected_display_channel
 
-    sent_messages = []
+    futures = []
+    if not leader_lease.is_leader:
+        print("⏸️ Instance suiveuse: diffusion laissée au leader")
+        return futures
+
     if detected_display_channel:
-        try:
-            sent_message = await client.send_message(detected_display_channel, message)
-            sent_messages.append((detected_display_channel, sent_message.id))
-            print(f"Message diffusé: {message}")
-        except Exception as e:
-            print(f"Erreur lors de l'envoi: {e}")
+        chat_id = detected_display_channel
+        if key:
+            done = outbox.append(key, key.split(':')[0], chat_id, message, game_number, match_text)
+            if done:
+                print(f"📮 Envoi {key} déjà effectué (message {done['message_id']}), non renvoyé")
+                if on_sent and done['message_id']:
+                    on_sent(done['chat_id'], done['message_id'])
+                return futures
+        future = outbound.send_message(chat_id, message, priority)
+        if key:
+            on_result(future, lambda sent_message: outbox.complete(key, sent_message.id, message),
+                      lambda e: outbox.fail(key, e))
+        if on_sent:
+            on_result(future, lambda sent_message: on_sent(chat_id, sent_message.id))
+        on_result(future, lambda _: print(f"Message diffusé: {message}"),
+                  lambda e: print(f"Erreur lors de l'envoi: {e}"))
+        futures.append(future)
     else:
         print("⚠️ Canal d'affichage non configuré")
 
-    return sent_messages
+    return futures
+
+async def broadcast_prediction(game_number: int, prediction_text: str):
+    """Diffuse une prédiction et mémorise l'ID du message pour les éditions futures"""
+    MANUAL_PREDICTIONS.inc()
+    event_feed.publish(EVENT_PREDICTION_CREATED, {"game": game_number, "source": "manual"})
+    def store(chat_id, message_id):
+        predictor.store_prediction_message(game_number, message_id, chat_id)
+        pending_prediction_sends.pop(game_number, None)
+
+    futures = await broadcast(prediction_text, PRIORITY_PREDICTION, on_sent=store,
+                              key=outbox_key("prediction", game_number), game_number=game_number,
+                              match_text=f"🔵{game_number}—")
+    if futures:
+        pending_prediction_sends[game_number] = futures[0]
+        on_result(futures[0], lambda _: None, lambda _: pending_prediction_sends.pop(game_number, None))
 
 async def edit_prediction_message(game_number: int, new_status: str):
-    """Edit prediction message with new status"""
+    """Edit prediction message with new status
+
+    L'édition est déposée dans la file sortante (sans attendre le réseau). Retourne
+    False seulement si le message de prédiction est inconnu; un échec ultérieur de
+    l'édition n'entraîne pas de nouvelle diffusion.
+    """
+    if not leader_lease.is_leader:
+        return False
+
     try:
+        new_text = f"🔵{game_number}— JOKER 2D| {new_status}"
         message_info = predictor.get_prediction_message(game_number)
         if message_info:
-            chat_id = message_info['chat_id']
-            message_id = message_info['message_id']
-            new_text = f"🔵{game_number}— JOKER 2D| {new_status}"
-
-            await client.edit_message(chat_id, message_id, new_text)
-            print(f"Message de prédiction #{game_number} mis à jour avec statut: {new_status}")
-            return True
+            submit_edit(message_info['chat_id'], message_info['message_id'], game_number, new_text)
+        elif game_number in pending_prediction_sends:
+            # La prédiction est encore en cours d'envoi: éditer dès que son ID est connu
+            sent_future = pending_prediction_sends[game_number]
+            on_result(sent_future, lambda sent_message: submit_edit(
+                sent_message.chat_id, sent_message.id, game_number, new_text))
+        else:
+            return False
+        return True
     except Exception as e:
         print(f"Erreur lors de la modification du message: {e}")
     return False
 
+def submit_edit(chat_id: int, message_id: int, game_number: int, new_text: str):
+    """Inscrit l'édition d'un message de prédiction dans l'outbox puis la dépose dans la file"""
+    key = outbox_key("edit", game_number)
+    if outbox.append(key, "edit", chat_id, new_text, game_number, target_message_id=message_id):
+        return  # Même texte déjà appliqué
+    future = outbound.edit_message(chat_id, message_id, new_text)
+    on_result(future,
+              lambda _: (outbox.complete(key, message_id, new_text),
+                         print(f"Message de prédiction #{game_number} mis à jour: {new_text}")),
+              lambda e: (outbox.fail(key, e), print(f"Erreur lors de la modification du message: {e}")))
+
+def replay_outbox_entry(entry: dict):
+    """Renvoie une entrée interrompue sous sa propre clé (sans métriques ni événement de création)"""
+    key, chat_id, text = entry["key"], entry["chat_id"], entry["text"]
+    if entry["kind"] == "edit":
+        future = outbound.edit_message(chat_id, entry["target_message_id"], text)
+        on_result(future, lambda _: outbox.complete(key, entry["target_message_id"], text),
+                  lambda e: outbox.fail(key, e))
+        return
+    priority = PRIORITY_PREDICTION if entry["kind"] == "prediction" else PRIORITY_STATUS
+    future = outbound.send_message(chat_id, text, priority)
+    on_result(future, lambda sent_message: outbox.complete(key, sent_message.id, text),
+              lambda e: outbox.fail(key, e))
+    if entry["kind"] == "prediction":
+        game_number = entry["game_number"]
+        pending_prediction_sends[game_number] = future
+        on_result(future, lambda sent_message: (
+            predictor.store_prediction_message(game_number, sent_message.id, chat_id),
+            pending_prediction_sends.pop(game_number, None)),
+            lambda _: pending_prediction_sends.pop(game_number, None))
+
+async def reconcile_outbox():
+    """Après un redémarrage: retrouve les envois interrompus et restaure les IDs de prédictions"""
+    try:
+        outbox.prune()
+        if leader_lease.is_leader and detected_display_channel:
+            remaining = await outbox.reconcile(client, detected_display_channel)
+            for entry in remaining:
+                replay_outbox_entry(entry)
+
+        restored = 0
+        for entry in outbox.entries("done", kind="prediction"):
+            if entry["key"] != outbox_key("prediction", entry["game_number"]):
+                continue  # Prédiction d'un autre jour
+            if entry["message_id"] and not predictor.get_prediction_message(entry["game_number"]):
+                predictor.store_prediction_message(entry["game_number"], entry["message_id"], entry["chat_id"])
+                restored += 1
+        if restored:
+            print(f"📮 {restored} ID(s) de messages de prédiction restauré(s) depuis l'outbox")
+    except Exception as e:
+        print(f"❌ Erreur rapprochement outbox: {e}")
+
 async def generate_report():
     """Generate and broadcast periodic report with updated format"""
     try:
@@ -954,7 +1404,7 @@ async def generate_report():
 
         bilan += f"\n📈 Statistiques: {wins}/{total} ({win_rate:.1f}% de réussite)"
 
-        await broadcast(bilan)
+        await broadcast(bilan, PRIORITY_REPORT, key=outbox_key("report", len(predictor.status_log)))
         print(f"Rapport généré: {wins}/{total} prédictions réussies")
 
     except Exception as e:
@@ -974,21 +1424,175 @@ async def handle_connection_error():
     except Exception as e:
         print(f"Échec de la reconnexion: {e}")
 
+def connection_generation() -> Optional[int]:
+    """Identifiant de la connexion MTProto en cours (None si déconnecté)
+
+    Telethon tire un nouvel ID de session MTProto à chaque (re)connexion, y
+    compris ses reconnexions automatiques qui ne passent jamais par
+    is_connected() == False.
+    """
+    if not client.is_connected():
+        return None
+    state = getattr(getattr(client, '_sender', None), '_state', None)
+    return getattr(state, 'id', 0)
+
+async def watch_reconnections(interval: float = 1.0):
+    """Rattrape le canal stats après chaque reconnexion (automatique ou non) du client"""
+    current = connection_generation()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            generation = connection_generation()
+            if generation is None or generation == current:
+                if generation is None and current is not None:
+                    print("🔌 Connexion Telegram perdue, rattrapage à la reconnexion")
+                current = generation
+                continue
+            current = generation
+            print("🔌 Connexion Telegram rétablie, rattrapage du canal stats")
+            await catch_up_stat_channel()
+        except Exception as e:
+            print(f"❌ Erreur rattrapage après reconnexion: {e}")
+
 # --- SERVEUR WEB POUR MONITORING ---
 async def health_check(request):
-    """Health check endpoint"""
+    """Health check endpoint (dégradé si la boucle asyncio prend du retard)"""
+    health = loop_monitor.health()
+    if health["status"] == "degraded":
+        return web.Response(
+            text=f"Bot is degraded: event loop lag p99 = {health['lag_p99_ms']}ms", status=503
+        )
     return web.Response(text="Bot is running!", status=200)
 
+def debug_authorized(request) -> bool:
+    """Endpoints sensibles: jeton DEBUG_TOKEN en en-tête X-Debug-Token ou paramètre ?token="""
+    if not DEBUG_TOKEN:
+        return False
+    return (request.headers.get('X-Debug-Token') or request.query.get('token')) == DEBUG_TOKEN
+
+async def debug_memory(request):
+    """Instantané mémoire comparé à la référence (?reset=1 pour reprendre une référence)"""
+    if not debug_authorized(request):
+        return web.json_response({"error": "accès refusé"}, status=403)
+    loop = asyncio.get_running_loop()
+    if request.query.get('reset') == '1':
+        await loop.run_in_executor(None, memory_profiler.reset_baseline)
+    report = await loop.run_in_executor(None, memory_profiler.report)
+    return web.json_response(report)
+
+async def debug_profile(request):
+    """Profil CPU de la boucle pendant ?seconds=N, téléchargé au format collapsed stacks"""
+    if not debug_authorized(request):
+        return web.json_response({"error": "accès refusé"}, status=403)
+    try:
+        seconds = float(request.query.get('seconds', '10'))
+        result = await cpu_profiler.profile(seconds)
+    except ValueError:
+        return web.json_response({"error": "seconds doit être un nombre"}, status=400)
+    except RuntimeError as e:
+        return web.json_response({"error": str(e)}, status=409)
+    filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+    return web.Response(
+        text=cpu_profiler.collapsed(result), content_type='text/plain', charset='utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+async def debug_trace(request):
+    """Spans du pipeline pour un jeu (?game=N) ou des derniers messages traités"""
+    try:
+        game = int(request.query['game']) if 'game' in request.query else None
+        limit = int(request.query.get('limit', '20'))
+    except ValueError:
+        return web.json_response({"error": "game et limit doivent être des entiers"}, status=400)
+    return web.json_response({"game": game, "buffer": tracer.get_status(), "traces": tracer.traces(game, limit)})
+
+async def debug_slow(request):
+    """Sites d'appel ayant le plus bloqué la boucle asyncio (?capture=N: chronomètre les rappels N secondes)"""
+    try:
+        limit = int(request.query.get('limit', '20'))
+        capture = float(request.query.get('capture', '0'))
+    except ValueError:
+        return web.json_response({"error": "limit et capture doivent être numériques"}, status=400)
+    if capture > 0:
+        loop_monitor.capture(min(capture, LOOP_CAPTURE_MAX_SECONDS))
+    return web.json_response({
+        "loop": loop_monitor.health(),
+        "slow_callback_threshold_ms": LOOP_SLOW_CALLBACK_MS,
+        "capturing_until": loop_monitor.capturing_until,
+        "sites": loop_monitor.worst_sites(limit)
+    })
+
 async def bot_status(request):
-    """Bot status endpoint"""
-    status = {
-        "bot_online": True,
-        "stat_channel": detected_stat_channel,
-        "display_channel": detected_display_channel,
-        "predictions_active": len(predictor.prediction_status),
-        "total_predictions": len(predictor.status_log)
-    }
-    return web.json_response(status)
+    """Bot status endpoint (instantané pré-encodé, 304 si le client a déjà cette version)"""
+    body, etag = status_snapshot.encoded()
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if status_snapshot.not_modified(request.headers.get('If-None-Match'), etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type='application/json', charset='utf-8', headers=headers)
+
+async def events_stream(request):
+    """Flux SSE des prédictions (créées, vérifiées, expirées) et des changements de leader
+
+    Reprise après coupure via l'en-tête Last-Event-ID; un commentaire de maintien
+    est envoyé toutes les 15 s sans événement.
+    """
+    subscriber = event_feed.subscribe(request.headers.get('Last-Event-ID'))
+    if subscriber is None:
+        return web.json_response({"error": "trop d'abonnés"}, status=503)
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'
+    })
+    try:
+        await response.prepare(request)
+        await response.write(b"retry: 3000\n\n")
+        while True:
+            frame = await subscriber.next(timeout=15)
+            if frame is None:
+                break
+            await response.write(frame)
+    except ConnectionResetError:
+        pass
+    finally:
+        event_feed.unsubscribe(subscriber)
+    return response
+
+def publish_status():
+    """Publie les champs du pipeline dans l'instantané de /status (sans effet s'ils n'ont pas changé)"""
+    status_snapshot.update(
+        is_leader=leader_lease.is_leader,
+        stat_channel=detected_stat_channel,
+        display_channel=detected_display_channel,
+        predictions_active=len(predictor.prediction_status),
+        total_predictions=len(predictor.status_log)
+    )
+
+# Instantané de /status: champs du pipeline publiés à chaque changement, sections des composants relues au plus une fois par seconde
+status_snapshot = StatusSnapshot()
+status_snapshot.update(bot_online=True)
+publish_status()
+status_snapshot.provide("outbound", outbound.get_status)
+status_snapshot.provide("router", router.get_status)
+status_snapshot.provide("commands", commands.get_status)
+status_snapshot.provide("edit_dedup", edit_dedup.get_status)
+status_snapshot.provide("entity_cache", entity_cache.get_status)
+status_snapshot.provide("startup", lambda: dict(startup_metrics))
+status_snapshot.provide("backfill", history_backfill.get_status)
+status_snapshot.provide("outbox", outbox.get_status)
+status_snapshot.provide("loop", loop_monitor.health)
+status_snapshot.provide("events", event_feed.get_status)
+leader_lease.on_change.append(lambda is_leader: publish_status())
+leader_lease.on_change.append(on_leadership_change)
+leader_lease.on_change.append(lambda is_leader: event_feed.publish(EVENT_LEADER_CHANGED, {"is_leader": is_leader}))
+
+# Jauges lues à chaque export /metrics
+registry.gauge("bot_outbound_queue_depth", "Actions sortantes en attente", outbound.queue_depth)
+registry.gauge("bot_router_queue_depth", "Mises à jour en attente de traitement", router.queue_depth)
+registry.gauge("bot_is_leader", "1 si cette instance détient le bail de leader",
+               lambda: 1 if leader_lease.is_leader else 0)
+
+async def metrics_endpoint(request):
+    """Export des métriques au format texte Prometheus"""
+    return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
 
 async def create_web_server():
     """Create and start web server"""
@@ -996,6 +1600,12 @@ async def create_web_server():
     app.router.add_get('/', health_check)
     app.router.add_get('/health', health_check)
     app.router.add_get('/status', bot_status)
+    app.router.add_get('/metrics', metrics_endpoint)
+    app.router.add_get('/events', events_stream)
+    app.router.add_get('/debug/slow', debug_slow)
+    app.router.add_get('/debug/trace', debug_trace)
+    app.router.add_get('/debug/memory', debug_memory)
+    app.router.add_get('/debug/profile', debug_profile)
     
     runner = web.AppRunner(app)
     await runner.setup()
@@ -1018,11 +1628,20 @@ async def main():
         return
 
     try:
+        # Sonde de latence de la boucle (avant tout le reste pour couvrir le démarrage)
+        asyncio.create_task(loop_monitor.run())
+
         # Start web server first
         web_runner = await create_web_server()
+
+        # Prise du bail de leader puis heartbeat en arrière-plan
+        leader_lease.try_acquire()
+        asyncio.create_task(leader_lease.run())
         
         # Start the bot
         if await start_bot():
+            asyncio.create_task(watch_scheduler_channels())
+            asyncio.create_task(watch_reconnections())
             print("✅ Bot en ligne et en attente de messages...")
             print(f"🌐 Accès web: http://0.0.0.0:{PORT}")
             await client.run_until_disconnected()
@@ -1035,6 +1654,14 @@ async def main():
         print(f"❌ Erreur critique: {e}")
         await handle_connection_error()
     finally:
+        leader_lease.stop()
+        loop_monitor.stop()
+        history_backfill.flush()
+        outbox.close()
+        if scheduler_engine:
+            scheduler_engine.store.flush_pending()
+        if database:
+            database.schedule_store.flush_pending()
         try:
             await client.disconnect()
             print("Bot déconnecté proprement")
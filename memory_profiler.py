@@ -0,0 +1,164 @@
+"""
+Profilage mémoire à la demande du processus du bot (/debug/memory, /mem).
+
+tracemalloc n'est démarré qu'à la première demande (son coût n'est payé
+qu'ensuite) et l'instantané pris à ce moment sert de référence. Les demandes
+suivantes comparent un nouvel instantané à cette référence : les sites
+d'allocation qui grossissent le plus sont ceux qui fuient. La taille des
+structures clés du bot (dictionnaires du predictor, caches...) est mesurée
+en parallèle, sans tracemalloc.
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Mémoire résidente du processus (Linux: /proc/self/status)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss: pic en Ko sous Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return None
+
+
+def deep_size(obj, max_items: int = 100000) -> int:
+    """Taille approximative d'un objet et de son contenu (conteneurs parcourus, objets partagés comptés une fois)"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    visited = 0
+    while stack and visited < max_items:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        visited += 1
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, type):
+            stack.append(vars(current))
+    return total
+
+
+class MemoryProfiler:
+    """Instantanés tracemalloc comparés à une référence, et taille des structures suivies"""
+
+    def __init__(self, frames: int = 5, top: int = 15):
+        """
+        Args:
+            frames: Profondeur de pile enregistrée par allocation
+            top: Nombre de sites d'allocation rapportés
+        """
+        self.frames = frames
+        self.top = top
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.baseline_at: Optional[str] = None
+        self.structures: Dict[str, Any] = {}
+
+    def track(self, name: str, obj):
+        """Ajoute une structure dont la taille est rapportée à chaque demande"""
+        self.structures[name] = obj
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def reset_baseline(self):
+        """Démarre tracemalloc si besoin et prend un nouvel instantané de référence"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline = self._snapshot()
+        self.baseline_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def stop(self):
+        """Arrête tracemalloc et oublie la référence"""
+        tracemalloc.stop()
+        self.baseline = None
+        self.baseline_at = None
+
+    def structure_sizes(self) -> List[Dict[str, Any]]:
+        sizes = []
+        for name, obj in self.structures.items():
+            try:
+                sizes.append({
+                    "name": name,
+                    "items": len(obj) if hasattr(obj, "__len__") else None,
+                    "bytes": deep_size(obj),
+                })
+            except Exception as e:
+                sizes.append({"name": name, "error": str(e)})
+        return sorted(sizes, key=lambda entry: entry.get("bytes", 0), reverse=True)
+
+    def report(self) -> Dict[str, Any]:
+        """Rapport complet (bloquant: à exécuter hors de la boucle asyncio)"""
+        report: Dict[str, Any] = {
+            "rss_bytes": process_rss_bytes(),
+            "gc_objects": len(gc.get_objects()),
+            "structures": self.structure_sizes(),
+        }
+        if self.baseline is None:
+            self.reset_baseline()
+            report["note"] = "tracemalloc démarré: référence prise, redemander plus tard pour la croissance"
+
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        report["tracemalloc"] = {"current_bytes": current, "peak_bytes": peak, "baseline_at": self.baseline_at}
+        report["growth_since_baseline"] = [{
+            "site": str(stat.traceback[0]) if stat.traceback else "?",
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+        } for stat in snapshot.compare_to(self.baseline, "lineno")[:self.top]]
+        report["top_sites"] = [{
+            "site": str(stat.traceback[0]) if stat.traceback else "?",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        } for stat in snapshot.statistics("lineno")[:self.top]]
+        return report
+
+
+def format_report(report: Dict[str, Any], limit: int = 8) -> str:
+    """Résumé lisible pour un message Telegram"""
+    mb = 1024 * 1024
+    lines = ["🧠 **Mémoire du bot**", ""]
+    if report.get("rss_bytes"):
+        lines.append(f"RSS: {report['rss_bytes'] / mb:.1f} Mo")
+    traced = report.get("tracemalloc", {})
+    lines.append(f"tracemalloc: {traced.get('current_bytes', 0) / mb:.1f} Mo "
+                 f"(pic {traced.get('peak_bytes', 0) / mb:.1f} Mo, référence {traced.get('baseline_at')})")
+    lines.append(f"Objets suivis par le GC: {report.get('gc_objects')}")
+    if report.get("note"):
+        lines.append(f"ℹ️ {report['note']}")
+
+    lines += ["", "📦 **Structures**"]
+    for entry in report.get("structures", [])[:limit]:
+        if "error" in entry:
+            lines.append(f"• {entry['name']}: erreur {entry['error']}")
+        else:
+            lines.append(f"• {entry['name']}: {entry['items']} élément(s), {entry['bytes'] / 1024:.1f} Ko")
+
+    lines += ["", "📈 **Croissance depuis la référence**"]
+    for entry in report.get("growth_since_baseline", [])[:limit]:
+        lines.append(f"• {os.path.basename(entry['site'])}: {entry['size_diff_bytes'] / 1024:+.1f} Ko "
+                     f"({entry['count_diff']:+d} blocs)")
+    return "\n".join(lines)
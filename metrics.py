@@ -0,0 +1,193 @@
+"""
+Métriques du bot au format texte Prometheus (endpoint /metrics).
+
+Compteurs et histogrammes à seaux fixes, sans dépendance externe. Les
+variantes étiquetées sont résolues une fois (`labels(...)`) puis gardées par
+l'appelant : un échantillon coûte un incrément ou une recherche `bisect` sur
+quelques seaux, bien en dessous de la microseconde.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seaux en secondes, de 100µs à 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Dernier seau: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimation d'un quantile (borne supérieure du seau atteint)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self.children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """Variante pour ces valeurs d'étiquettes (à garder en variable sur le chemin critique)"""
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self._new_child()
+        return child
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.children[()].inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, child in self.children.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {child.value:g}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.children[()].observe(value)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, child in self.children.items():
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {child.sum:g}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Jauge lue au moment de l'export via une fonction"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.read = read
+        super().__init__(name, help_text)
+
+    def _new_child(self):
+        return None
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.read())
+        except Exception as e:
+            print(f"⚠️ Jauge {self.name} illisible: {e}")
+            return []
+        return self.header() + [f"{self.name} {value:g}"]
+
+
+class Registry:
+    """Ensemble des métriques exportées"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.metrics.get(name) or self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.get(name) or self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, help_text, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registre global partagé par les modules du bot
+registry = Registry()
+
+MESSAGES = registry.counter("bot_messages_total", "Mises à jour reçues par classe de chat", ["chat_class"])
+PREDICTIONS = registry.counter("bot_predictions_total", "Prédictions diffusées", ["source"])
+VERIFICATIONS = registry.counter("bot_verifications_total", "Prédictions vérifiées par statut", ["status"])
+HANDLER_SECONDS = registry.histogram("bot_handler_seconds", "Durée de traitement d'une mise à jour", ["chat_class"])
+PARSE_SECONDS = registry.histogram("bot_parse_seconds", "Durée des décisions du predictor par message")
+STORAGE_SECONDS = registry.histogram("bot_storage_write_seconds", "Durée des écritures sur disque", ["store"])
+TELEGRAM_SECONDS = registry.histogram("bot_telegram_request_seconds", "Durée des appels Telegram sortants", ["method"])
+
@@ -0,0 +1,305 @@
+"""
+File d'envoi sortante vers Telegram (send_message / edit_message).
+
+Les handlers déposent une action et reçoivent immédiatement un Future : ils
+n'attendent jamais le réseau. Chaque chat a sa propre file à priorités, vidée
+par une tâche dédiée qui respecte un seau à jetons par chat et un seau global,
+applique les FloodWait demandés par Telegram et réessaie un nombre borné de fois
+les erreurs passagères (réseau, erreur serveur Telegram). Une requête refusée
+(message introuvable, texte inchangé...) échoue immédiatement, sans pause du chat.
+
+Les éditions d'un même message sont regroupées pendant une courte fenêtre : seul
+le dernier texte part, et une édition dont le texte est inchangé n'est pas envoyée.
+"""
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from telethon.errors import FloodWaitError, ServerError, TimedOutError
+
+from metrics import TELEGRAM_SECONDS
+
+SEND_SECONDS = TELEGRAM_SECONDS.labels("send_message")
+EDIT_SECONDS = TELEGRAM_SECONDS.labels("edit_message")
+
+# Priorités (plus petit = plus urgent)
+PRIORITY_PREDICTION = 0
+PRIORITY_STATUS = 1
+PRIORITY_REPORT = 2
+
+
+def is_transient(error: Exception) -> bool:
+    """Erreur qui peut disparaître en réessayant: réseau, délai dépassé, erreur serveur (5xx)"""
+    return isinstance(error, (ServerError, TimedOutError, OSError, asyncio.TimeoutError))
+
+
+class TokenBucket:
+    """Seau à jetons: `rate` jetons par seconde, au plus `burst` accumulés"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """Consomme un jeton et retourne l'attente nécessaire avant de l'utiliser (0 si disponible)"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class OutboundJob:
+    """Action sortante en attente"""
+
+    __slots__ = ("kind", "chat_id", "args", "priority", "sequence", "future", "attempts", "created_at")
+
+    def __init__(self, kind: str, chat_id: int, args: tuple, priority: int, sequence: int, future: asyncio.Future):
+        self.kind = kind
+        self.chat_id = chat_id
+        self.args = args
+        self.priority = priority
+        self.sequence = sequence
+        self.future = future
+        self.attempts = 0
+        self.created_at = time.monotonic()
+
+
+class OutboundDispatcher:
+    """Répartiteur des envois sortants avec limitation de débit par chat"""
+
+    def __init__(self, client, chat_rate: float = 1.0, chat_burst: float = 3.0,
+                 global_rate: float = 25.0, global_burst: float = 30.0,
+                 max_retries: int = 3, max_flood_wait: float = 300.0,
+                 max_queue_per_chat: int = 1000, idle_timeout: float = 60.0,
+                 edit_window: float = 1.0, max_tracked_texts: int = 5000):
+        """
+        Args:
+            client: Client Telegram (send_message / edit_message)
+            chat_rate, chat_burst: Débit soutenu et rafale autorisés par chat
+            global_rate, global_burst: Débit soutenu et rafale pour tout le bot
+            max_retries: Nombre maximal de nouvelles tentatives par action
+            max_flood_wait: FloodWait au-delà duquel l'action est abandonnée (secondes)
+            max_queue_per_chat: Taille maximale de la file d'un chat
+            idle_timeout: Durée d'inactivité après laquelle la tâche d'un chat s'arrête
+            edit_window: Fenêtre de regroupement des éditions d'un même message (secondes)
+            max_tracked_texts: Nombre de derniers textes mémorisés pour ignorer les éditions inchangées
+        """
+        self.client = client
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.max_retries = max_retries
+        self.max_flood_wait = max_flood_wait
+        self.max_queue_per_chat = max_queue_per_chat
+        self.idle_timeout = idle_timeout
+        self.edit_window = edit_window
+        self.max_tracked_texts = max_tracked_texts
+
+        self._queues: Dict[int, asyncio.PriorityQueue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._paused_until: Dict[int, float] = {}
+        self._sequence = itertools.count()
+        # Éditions en attente de la fin de leur fenêtre, par (chat_id, message_id)
+        self._pending_edits: Dict[Tuple[int, int], OutboundJob] = {}
+        # Dernier texte connu de chaque message (LRU borné)
+        self._last_texts: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        self.stats = {
+            "submitted": 0, "sent": 0, "edited": 0, "failed": 0,
+            "retries": 0, "flood_waits": 0, "flood_wait_seconds": 0.0, "dropped": 0,
+            "edits_coalesced": 0, "edits_unchanged": 0,
+        }
+
+    # --- Soumission (non bloquante) ---
+    def send_message(self, chat_id: int, text: str, priority: int = PRIORITY_STATUS) -> asyncio.Future:
+        """Dépose un envoi; le Future se résout avec le message envoyé"""
+        return self._submit("send", chat_id, (text,), priority)
+
+    def edit_message(self, chat_id: int, message_id: int, text: str, priority: int = PRIORITY_STATUS) -> asyncio.Future:
+        """Dépose une édition; le Future se résout avec le message édité
+
+        Les éditions d'un même message soumises pendant `edit_window` partagent
+        le même Future et seul le dernier texte est envoyé. Une édition dont le
+        texte est identique au dernier texte envoyé se résout immédiatement (None).
+        """
+        key = (chat_id, message_id)
+        pending = self._pending_edits.get(key)
+        if pending is not None:
+            # Le dernier texte remplace le précédent; la priorité la plus urgente l'emporte
+            pending.args = (message_id, text)
+            pending.priority = min(pending.priority, priority)
+            self.stats["edits_coalesced"] += 1
+            return pending.future
+
+        loop = asyncio.get_running_loop()
+        if self._last_texts.get(key) == text:
+            self.stats["edits_unchanged"] += 1
+            future = loop.create_future()
+            future.set_result(None)
+            return future
+
+        job = self._new_job("edit", chat_id, (message_id, text), priority)
+        if self.edit_window <= 0:
+            return self._enqueue(job)
+        self._pending_edits[key] = job
+        loop.call_later(self.edit_window, self._release_edit, key, job)
+        return job.future
+
+    def _release_edit(self, key: Tuple[int, int], job: OutboundJob):
+        """Fin de la fenêtre de regroupement: l'édition rejoint la file de son chat"""
+        if self._pending_edits.get(key) is job:
+            del self._pending_edits[key]
+        if self._last_texts.get(key) == job.args[1]:
+            self.stats["edits_unchanged"] += 1
+            if not job.future.done():
+                job.future.set_result(None)
+            return
+        self._enqueue(job)
+
+    def _submit(self, kind: str, chat_id: int, args: tuple, priority: int) -> asyncio.Future:
+        return self._enqueue(self._new_job(kind, chat_id, args, priority))
+
+    def _new_job(self, kind: str, chat_id: int, args: tuple, priority: int) -> OutboundJob:
+        future = asyncio.get_running_loop().create_future()
+        self.stats["submitted"] += 1
+        return OutboundJob(kind, chat_id, args, priority, next(self._sequence), future)
+
+    def _enqueue(self, job: OutboundJob) -> asyncio.Future:
+        chat_id = job.chat_id
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.PriorityQueue(self.max_queue_per_chat)
+
+        try:
+            queue.put_nowait((job.priority, job.sequence, job))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            job.future.set_exception(RuntimeError(f"File d'envoi pleine pour le chat {chat_id}"))
+            return job.future
+
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.get_running_loop().create_task(self._run_chat(chat_id, queue))
+        return job.future
+
+    def _remember_text(self, chat_id: int, message_id: int, text: str):
+        key = (chat_id, message_id)
+        self._last_texts[key] = text
+        self._last_texts.move_to_end(key)
+        if len(self._last_texts) > self.max_tracked_texts:
+            self._last_texts.popitem(last=False)
+
+    # --- Exécution ---
+    async def _run_chat(self, chat_id: int, queue: asyncio.PriorityQueue):
+        """Tâche d'un chat: exécute ses actions dans l'ordre de priorité puis d'arrivée"""
+        bucket = self._buckets.setdefault(chat_id, TokenBucket(self.chat_rate, self.chat_burst))
+        while True:
+            try:
+                _, _, job = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._workers.pop(chat_id, None)
+                    return
+                continue
+
+            if job.future.done():
+                continue  # Annulé par l'appelant
+
+            paused = self._paused_until.get(chat_id, 0.0) - time.monotonic()
+            if paused > 0:
+                await asyncio.sleep(paused)
+            wait = max(bucket.reserve(), self.global_bucket.reserve())
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            await self._execute(job, queue)
+
+    async def _execute(self, job: OutboundJob, queue: asyncio.PriorityQueue):
+        job.attempts += 1
+        started_at = time.perf_counter()
+        try:
+            if job.kind == "send":
+                result = await self.client.send_message(job.chat_id, *job.args)
+                SEND_SECONDS.observe(time.perf_counter() - started_at)
+                self.stats["sent"] += 1
+                message_id = getattr(result, "id", None)
+                if message_id is not None:
+                    self._remember_text(job.chat_id, message_id, job.args[0])
+            else:
+                result = await self.client.edit_message(job.chat_id, *job.args)
+                EDIT_SECONDS.observe(time.perf_counter() - started_at)
+                self.stats["edited"] += 1
+                self._remember_text(job.chat_id, *job.args)
+            if not job.future.done():
+                job.future.set_result(result)
+        except FloodWaitError as e:
+            seconds = float(getattr(e, "seconds", 0) or 0)
+            self.stats["flood_waits"] += 1
+            self.stats["flood_wait_seconds"] += seconds
+            print(f"⏳ FloodWait {seconds:.0f}s sur le chat {job.chat_id}")
+            if seconds > self.max_flood_wait or job.attempts > self.max_retries:
+                self._fail(job, e)
+                return
+            # Tout le chat est en pause; l'action repasse en tête de sa priorité
+            self._paused_until[job.chat_id] = time.monotonic() + seconds
+            self._requeue(job, queue)
+        except Exception as e:
+            if not is_transient(e) or job.attempts > self.max_retries:
+                self._fail(job, e)
+                return
+            print(f"⚠️ Échec {job.kind} sur {job.chat_id} (tentative {job.attempts}): {e}")
+            self._paused_until[job.chat_id] = time.monotonic() + min(2 ** (job.attempts - 1), 30)
+            self._requeue(job, queue)
+
+    def _requeue(self, job: OutboundJob, queue: asyncio.PriorityQueue):
+        self.stats["retries"] += 1
+        try:
+            # Même numéro de séquence: l'action reprend sa place d'origine dans la file
+            queue.put_nowait((job.priority, job.sequence, job))
+        except asyncio.QueueFull:
+            self._fail(job, RuntimeError(f"File d'envoi pleine pour le chat {job.chat_id}"))
+
+    def _fail(self, job: OutboundJob, error: Exception):
+        self.stats["failed"] += 1
+        print(f"❌ Abandon {job.kind} sur {job.chat_id} après {job.attempts} tentative(s): {error}")
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    # --- Observabilité ---
+    def queue_depth(self) -> int:
+        """Nombre total d'actions en attente, tous chats confondus"""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Compteurs et profondeur des files"""
+        status = dict(self.stats)
+        status["queue_depth"] = self.queue_depth()
+        status["pending_edits"] = len(self._pending_edits)
+        status["active_chats"] = len(self._workers)
+        status["api_calls_saved"] = self.stats["edits_coalesced"] + self.stats["edits_unchanged"]
+        return status
+
+
+def on_result(future: asyncio.Future, callback: Callable[[Any], None],
+              on_error: Optional[Callable[[Exception], None]] = None):
+    """Appelle `callback(résultat)` quand le Future réussit (sans jamais l'attendre)"""
+    def _done(done: asyncio.Future):
+        if done.cancelled():
+            return
+        error = done.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            return
+        try:
+            callback(done.result())
+        except Exception as e:
+            print(f"❌ Erreur callback envoi: {e}")
+    future.add_done_callback(_done)
@@ -0,0 +1,298 @@
+"""
+Journal persistant des envois sortants (outbox).
+
+Chaque action sortante est d'abord inscrite avec une clé d'idempotence
+(type + numéro de jeu), puis marquée terminée avec l'ID du message renvoyé par
+Telegram. Après un arrêt brutal :
+- les prédictions terminées redonnent les IDs de messages à éditer ;
+- les entrées incomplètes sont rapprochées des messages du canal de diffusion :
+  un message déjà publié est retrouvé au lieu d'être rediffusé, les autres
+  sont renvoyés.
+
+Les bots n'ont pas accès à l'historique (messages.getHistory) : chaque envoi
+note le dernier ID de message connu dans le canal (`after_id`), et le
+rapprochement relit la plage d'IDs qui suit avec `get_messages(ids=...)`.
+
+Les écritures SQLite (un commit par envoi) passent par un unique thread
+d'écriture, dans l'ordre, pour ne pas bloquer la boucle asyncio ; l'état des
+clés modifiées est gardé en mémoire pour les relectures immédiates.
+"""
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def outbox_key(kind: str, game_number, day: Optional[str] = None) -> str:
+    """Clé d'idempotence d'une action: `type:jour:numéro` (les numéros de jeu repartent chaque jour)"""
+    return f"{kind}:{day or datetime.now().strftime('%Y-%m-%d')}:{game_number}"
+
+
+def outbox_day(key: str) -> Optional[str]:
+    """Jour d'une clé `type:jour:numéro` (None pour une clé d'un autre format)"""
+    parts = key.split(":")
+    return parts[1] if len(parts) == 3 else None
+
+
+class Outbox:
+    """Journal SQLite des actions sortantes et de leur résultat"""
+
+    def __init__(self, db_path: str = os.path.join("data", "outbox.db")):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=5.0, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, game_number INTEGER, chat_id INTEGER NOT NULL, "
+            "text TEXT NOT NULL, match_text TEXT, target_message_id INTEGER, message_id INTEGER, "
+            "status TEXT NOT NULL, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "after_id INTEGER)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "after_id" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN after_id INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status)")
+        # Dernier ID de message connu par chat: borne basse de la recherche d'un envoi interrompu
+        self.last_ids: Dict[int, int] = {
+            row[0]: row[1] for row in self.conn.execute(
+                "SELECT chat_id, MAX(message_id) FROM outbox WHERE message_id IS NOT NULL GROUP BY chat_id")
+        }
+        self._entries: Dict[str, Dict[str, Any]] = {}  # Clés modifiées par ce processus (état à jour)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox-writer")
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self.stats = {"appended": 0, "deduplicated": 0, "completed": 0, "failed": 0,
+                      "reconciled_found": 0, "reconciled_resent": 0, "reconciled_expired": 0, "write_errors": 0}
+
+    # --- Thread d'écriture ---
+    def _execute(self, sql: str, params: tuple, label: str) -> int:
+        """Exécute une écriture dans le thread d'écriture (connexion dédiée)"""
+        try:
+            if self._writer_conn is None:
+                self._writer_conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            return self._writer_conn.execute(sql, params).rowcount
+        except sqlite3.Error as e:
+            self.stats["write_errors"] += 1
+            print(f"❌ Erreur outbox ({label}): {e}")
+            return 0
+
+    def _write(self, sql: str, params: tuple, label: str):
+        """Dépose une écriture dans la file du thread d'écriture (sans attendre le disque)"""
+        return self._writer.submit(self._execute, sql, params, label)
+
+    def sync(self):
+        """Attend que les écritures déjà déposées soient sur disque"""
+        self._writer.submit(lambda: None).result()
+
+    def close(self):
+        """Termine les écritures en attente (arrêt du bot)"""
+        self._writer.shutdown(wait=True)
+
+    # --- Écriture ---
+    def append(self, key: str, kind: str, chat_id: int, text: str, game_number: Optional[int] = None,
+               match_text: Optional[str] = None, target_message_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Inscrit une action avant son envoi
+
+        Retourne l'entrée existante si une action identique est déjà terminée
+        (rien à renvoyer), sinon None. Une entrée existante avec un autre texte
+        (nouvelle édition) repasse en attente.
+        """
+        now = time.time()
+        try:
+            existing = self.get(key)
+        except sqlite3.Error as e:
+            print(f"❌ Erreur outbox (lecture {key}): {e}")
+            existing = None
+        if existing and existing["status"] == STATUS_DONE and existing["text"] == text:
+            self.stats["deduplicated"] += 1
+            return existing
+        after_id = self.last_ids.get(chat_id)
+        entry = dict(existing or {"key": key, "message_id": None, "created_at": now})
+        entry.update(kind=kind, game_number=game_number, chat_id=chat_id, text=text, match_text=match_text,
+                     target_message_id=target_message_id, status=STATUS_PENDING, error=None,
+                     updated_at=now, after_id=after_id)
+        self._entries[key] = entry
+        self._write(
+            "INSERT INTO outbox (key, kind, game_number, chat_id, text, match_text, target_message_id, "
+            "message_id, status, error, created_at, updated_at, after_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, NULL, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET text = excluded.text, match_text = excluded.match_text, "
+            "chat_id = excluded.chat_id, target_message_id = excluded.target_message_id, "
+            "status = excluded.status, error = NULL, updated_at = excluded.updated_at, after_id = excluded.after_id",
+            (key, kind, game_number, chat_id, text, match_text, target_message_id, STATUS_PENDING, now, now, after_id),
+            f"inscription {key}"
+        )
+        self.stats["appended"] += 1
+        return None
+
+    def complete(self, key: str, message_id: Optional[int], text: Optional[str] = None):
+        """Marque une action terminée avec l'ID du message obtenu"""
+        now = time.time()
+        entry = self._cached(key)
+        if entry is not None and (text is None or entry["text"] == text):
+            entry["status"], entry["updated_at"] = STATUS_DONE, now
+            if message_id is not None:
+                entry["message_id"] = message_id
+        if message_id is not None and entry is not None:
+            chat_id = entry["chat_id"]
+            self.last_ids[chat_id] = max(self.last_ids.get(chat_id, 0), message_id)
+        if text is None:
+            self._write(
+                "UPDATE outbox SET status = ?, message_id = COALESCE(?, message_id), updated_at = ? WHERE key = ?",
+                (STATUS_DONE, message_id, now, key), f"terminaison {key}"
+            )
+        else:
+            # Ne termine que si aucune version plus récente n'a été inscrite entre-temps
+            self._write(
+                "UPDATE outbox SET status = ?, message_id = COALESCE(?, message_id), updated_at = ? "
+                "WHERE key = ? AND text = ?",
+                (STATUS_DONE, message_id, now, key, text), f"terminaison {key}"
+            )
+        self.stats["completed"] += 1
+
+    def fail(self, key: str, error: Exception):
+        now = time.time()
+        entry = self._cached(key)
+        if entry is not None and entry["status"] == STATUS_PENDING:
+            entry.update(status=STATUS_FAILED, error=str(error)[:500], updated_at=now)
+        self._write(
+            "UPDATE outbox SET status = ?, error = ?, updated_at = ? WHERE key = ? AND status = ?",
+            (STATUS_FAILED, str(error)[:500], now, key, STATUS_PENDING), f"échec {key}"
+        )
+        self.stats["failed"] += 1
+
+    def prune(self, max_age_seconds: float = 7 * 86400) -> int:
+        """Supprime les entrées plus anciennes que max_age_seconds
+
+        Les entrées restées en attente aussi longtemps sont abandonnées: leur
+        rapprochement n'a plus de sens.
+        """
+        cutoff = time.time() - max_age_seconds
+        self._entries = {key: entry for key, entry in self._entries.items() if entry["updated_at"] >= cutoff}
+        return self._write("DELETE FROM outbox WHERE updated_at < ?", (cutoff,), "purge").result()
+
+    # --- Lecture ---
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """État à jour d'une clé: mémoire si ce processus l'a modifiée, sinon base (mis en mémoire)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            try:
+                entry = self.get(key)
+            except sqlite3.Error as e:
+                print(f"❌ Erreur outbox (lecture {key}): {e}")
+            if entry is not None:
+                self._entries[key] = entry
+        return entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return dict(entry)
+        row = self.conn.execute("SELECT * FROM outbox WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, status: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entrées d'un statut (attend les écritures en cours: réservé au démarrage et au diagnostic)"""
+        self.sync()
+        if kind is None:
+            rows = self.conn.execute(
+                "SELECT * FROM outbox WHERE status = ? ORDER BY created_at", (status,)
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM outbox WHERE status = ? AND kind = ? ORDER BY created_at", (status, kind)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def incomplete(self) -> List[Dict[str, Any]]:
+        """Actions inscrites mais jamais confirmées (arrêt pendant l'envoi)"""
+        return self.entries(STATUS_PENDING)
+
+    # --- Rapprochement après redémarrage ---
+    async def _read_range(self, client, chat_id: int, first_id: int, last_id: int, known_id: int,
+                          batch_size: int) -> List[Any]:
+        """Messages du bot aux IDs `first_id`..`last_id`, lus par lots d'IDs explicites
+
+        S'arrête au premier lot vide au-delà de `known_id` (fin du canal).
+        """
+        own = []
+        for cursor in range(first_id, last_id + 1, batch_size):
+            batch = await client.get_messages(chat_id, ids=list(range(cursor, min(cursor + batch_size, last_id + 1))))
+            found = [m for m in batch if m is not None]
+            own.extend(m for m in found if getattr(m, 'out', True) and getattr(m, 'message', None))
+            if not found and cursor > known_id:
+                break
+        return own
+
+    async def reconcile(self, client, chat_id: int, search_window: int = 200, batch_size: int = 100,
+                        day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rapproche les envois incomplets des messages du canal
+
+        Chaque envoi est cherché parmi les `search_window` IDs qui suivent le
+        dernier message connu au moment de son inscription. Les messages
+        retrouvés (même début de texte, envoyés par le bot) sont marqués
+        terminés. Retourne les entrées restantes, à renvoyer; un envoi inscrit
+        avant tout ID connu dans ce chat ne peut pas être cherché et est renvoyé.
+
+        Les entrées d'un jour antérieur à `day` (défaut: aujourd'hui) concernent
+        des jeux terminés: elles sont marquées en échec, jamais renvoyées.
+        """
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        pending = []
+        for entry in self.incomplete():
+            if entry["chat_id"] != chat_id:
+                continue
+            entry_day = outbox_day(entry["key"])
+            if entry_day is not None and entry_day < day:
+                self.fail(entry["key"], RuntimeError(f"entrée du {entry_day} non rejouée"))
+                self.stats["reconciled_expired"] += 1
+                continue
+            pending.append(entry)
+        if not pending:
+            return []
+
+        sends = [entry for entry in pending
+                 if entry["target_message_id"] is None and entry["after_id"] is not None]
+        if sends:
+            known_id = max(entry["after_id"] for entry in sends)
+            try:
+                own = await self._read_range(client, chat_id, min(entry["after_id"] for entry in sends) + 1,
+                                             known_id + search_window, known_id, batch_size)
+            except Exception as e:
+                # Sans lecture du canal, on ne peut pas exclure un doublon: les envois restent en attente
+                print(f"❌ Erreur lecture des messages pour l'outbox: {e}")
+                return [entry for entry in pending if entry not in sends]
+            used = set()
+            for entry in sends:
+                prefix = entry["match_text"] or entry["text"]
+                found = next((m for m in own if m.id > entry["after_id"] and m.id not in used
+                              and m.message.startswith(prefix)), None)
+                if found is not None:
+                    used.add(found.id)
+                    self.complete(entry["key"], found.id)
+                    entry["status"], entry["message_id"] = STATUS_DONE, found.id
+                    self.stats["reconciled_found"] += 1
+
+        remaining = [entry for entry in pending if entry["status"] == STATUS_PENDING]
+        self.stats["reconciled_resent"] += len(remaining)
+        if pending:
+            print(f"📮 Outbox: {len(pending) - len(remaining)} envoi(s) retrouvé(s), {len(remaining)} à renvoyer")
+        return remaining
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        try:
+            for row in self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"):
+                status[row[0]] = row[1]
+        except sqlite3.Error as e:
+            status["error"] = str(e)
+        return status
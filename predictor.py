@@ -1,7 +1,57 @@
 import re
 import random
+import hashlib
+from collections import OrderedDict
 from typing import Tuple, Optional, List
 
+# Champs du message utiles aux prédictions (numéro de jeu, groupes, marqueurs d'état)
+GAME_NUMBER_PATTERN = re.compile(r"#N\s*(\d+)\.?|jeu\s*#?\s*(\d+)", re.IGNORECASE)
+PARENTHESES_PATTERN = re.compile(r"\(([^)]*)\)")
+STATE_MARKERS = ("⏰", "🕐", "🔰", "✅", "❌", "⭕")
+
+
+def message_digest(message: str) -> bytes:
+    """Empreinte des champs du message lus par le predictor (le reste du texte est ignoré)"""
+    match = GAME_NUMBER_PATTERN.search(message)
+    game = (match.group(1) or match.group(2)) if match else ""
+    groups = PARENTHESES_PATTERN.findall(message)
+    markers = "".join(marker for marker in STATE_MARKERS if marker in message)
+    relevant = "\x1f".join([game, markers] + groups)
+    return hashlib.blake2b(relevant.encode("utf-8"), digest_size=8).digest()
+
+
+class MessageDigestCache:
+    """LRU borné {(chat_id, message_id): empreinte} pour ignorer les éditions sans effet"""
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self.entries: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def is_unchanged(self, chat_id: int, message_id: int, digest: bytes) -> bool:
+        """True si le message a déjà été traité avec la même empreinte; sinon la mémorise"""
+        key = (chat_id, message_id)
+        if self.entries.get(key) == digest:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        self.entries[key] = digest
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return False
+
+    def get_status(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
 class CardPredictor:
     """Card game prediction engine with pattern matching and result verification"""
     
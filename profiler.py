@@ -0,0 +1,108 @@
+"""
+Profileur CPU par échantillonnage, lancé à la demande (/debug/profile, /profile).
+
+Un thread lit la pile du thread de la boucle asyncio (`sys._current_frames`)
+toutes les `interval` secondes pendant la durée demandée et compte les piles
+identiques. Rien n'est installé dans la boucle : hors profilage le coût est
+nul, pendant le profilage il se limite à un échantillon par intervalle.
+
+Le résultat est au format « collapsed stacks » (une pile par ligne,
+`racine;...;feuille nombre`), lisible par flamegraph.pl ou speedscope.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Fonctions où la boucle attend des événements: échantillons comptés comme inactifs
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "_run_once"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Échantillonneur de pile du thread de la boucle, un profilage à la fois"""
+
+    def __init__(self, interval: float = 0.005, max_seconds: float = 60.0):
+        """
+        Args:
+            interval: Période d'échantillonnage (secondes)
+            max_seconds: Durée maximale d'un profilage
+        """
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.is_active = False
+        self.last_profile_at: Optional[str] = None
+
+    def _sample(self, thread_id: int, seconds: float) -> Dict[str, Any]:
+        """Boucle d'échantillonnage (exécutée dans un thread)"""
+        stacks: Counter = Counter()
+        samples = idle = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                labels = []
+                leaf = frame.f_code.co_name
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                if leaf in IDLE_FUNCTIONS:
+                    idle += 1
+            time.sleep(self.interval)
+        return {"stacks": stacks, "samples": samples, "idle": idle}
+
+    async def profile(self, seconds: float) -> Dict[str, Any]:
+        """Profile le thread de la boucle courante pendant `seconds` secondes"""
+        if self.is_active:
+            raise RuntimeError("un profilage est déjà en cours")
+        seconds = max(1.0, min(float(seconds), self.max_seconds))
+        thread_id = threading.get_ident()
+        self.is_active = True
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, self._sample, thread_id, seconds)
+        finally:
+            self.is_active = False
+        self.last_profile_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        result["seconds"] = seconds
+        return result
+
+    @staticmethod
+    def collapsed(result: Dict[str, Any]) -> str:
+        """Piles au format collapsed (flamegraph.pl, speedscope)"""
+        return "".join(f"{stack} {count}\n" for stack, count in result["stacks"].most_common())
+
+    @staticmethod
+    def top_functions(result: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """Fonctions les plus présentes en feuille de pile (temps propre), hors attente de la boucle"""
+        own: Counter = Counter()
+        for stack, count in result["stacks"].items():
+            leaf = stack.rsplit(";", 1)[-1]
+            if leaf.split(" ", 1)[0] not in IDLE_FUNCTIONS:
+                own[leaf] += count
+        samples = result["samples"] or 1
+        return [{"function": leaf, "samples": count, "percent": round(count * 100 / samples, 1)}
+                for leaf, count in own.most_common(limit)]
+
+    def summary(self, result: Dict[str, Any], limit: int = 8) -> str:
+        """Résumé lisible pour un message Telegram"""
+        samples = result["samples"] or 1
+        lines = [
+            f"🔥 **Profil CPU** ({result['seconds']:.0f}s, {result['samples']} échantillons)",
+            f"Boucle inactive: {result['idle'] * 100 / samples:.0f}%",
+            "",
+        ]
+        for entry in self.top_functions(result, limit):
+            lines.append(f"• {entry['percent']}% {entry['function']}")
+        return "\n".join(lines)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"active": self.is_active, "interval": self.interval, "last_profile_at": self.last_profile_at}
@@ -7,6 +7,7 @@ from telethon import TelegramClient, events
 from predictor import CardPredictor
 from yaml_manager import init_database, db
 from aiohttp import web
+from session_store import build_session, cleanup_legacy_sessions
 import time
 
 # Configuration des logs pour Render.com
@@ -34,9 +35,10 @@ confirmation_pending = {}
 # Gestionnaire de prédictions
 predictor = CardPredictor()
 
-# Initialize Telegram client with unique session name
-session_name = f'bot_session_{int(time.time())}'
-client = TelegramClient(session_name, API_ID, API_HASH)
+# Session stable (TELEGRAM_SESSION recommandé sur Render: le disque est effacé au redémarrage)
+cleanup_legacy_sessions()
+session, session_is_warm = build_session()
+client = TelegramClient(session, API_ID, API_HASH)
 
 # Health check server for Render
 async def health_check(request):
@@ -58,13 +60,15 @@ async def start_web_server():
 async def start_bot():
     """Start the bot with proper error handling"""
     try:
+        started_at = time.perf_counter()
         await client.start(bot_token=BOT_TOKEN)
         logger.info("Bot démarré avec succès...")
         
         # Get bot info
         me = await client.get_me()
         username = getattr(me, 'username', 'Unknown') or f"ID:{me.id}"
-        logger.info(f"Bot connecté: @{username}")
+        logger.info(f"Bot connecté: @{username} (session {'existante' if session_is_warm else 'nouvelle'}, "
+                    f"{time.perf_counter() - started_at:.2f}s)")
         
     except Exception as e:
         logger.error(f"Erreur lors du démarrage du bot: {e}")
@@ -0,0 +1,170 @@
+"""
+Routage des mises à jour Telegram par chat.
+
+Un seul handler Telethon reçoit tous les messages (nouveaux et édités) et les
+distribue via une table {(chat_id, type): handler}. Un message d'un chat absent
+de la table est ignoré immédiatement, sans formatage ni journalisation, sauf
+les nouveaux messages privés quand une route privée est définie (commandes
+ouvertes à tous les utilisateurs, comme /start).
+
+Chaque chat routé a sa file bornée et sa tâche consommatrice : le traitement est
+strictement ordonné au sein d'un chat (nouveaux messages et éditions compris),
+tandis que des chats différents avancent en parallèle. Une file pleine fait
+attendre le handler Telethon (contre-pression) au lieu de perdre des messages.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Types de message
+KIND_NEW = "new"
+KIND_EDITED = "edited"
+
+Handler = Callable[[Any], Awaitable[None]]
+RouteKey = Tuple[int, str]
+
+
+class ChatRouter:
+    """Table de routage des mises à jour par (chat_id, type de message)"""
+
+    def __init__(self, max_queue_per_chat: int = 1000, idle_timeout: float = 60.0):
+        """
+        Args:
+            max_queue_per_chat: Taille maximale de la file d'un chat
+            idle_timeout: Durée d'inactivité après laquelle la tâche d'un chat s'arrête
+        """
+        self.routes: Dict[RouteKey, Handler] = {}
+        self.private_handler: Optional[Handler] = None
+        self.max_queue_per_chat = max_queue_per_chat
+        self.idle_timeout = idle_timeout
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._held: Dict[int, List[Tuple[Handler, Any]]] = {}  # Chats en pause (rattrapage en cours)
+        self.stats = {
+            "dispatched": 0, "dropped": 0, "errors": 0, "processed": 0,
+            "backpressure_waits": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+        }
+
+    def set_routes(self, routes: Dict[RouteKey, Handler]):
+        """Remplace toute la table (échange atomique pour les handlers en cours)"""
+        self.routes = dict(routes)
+
+    def add_route(self, chat_id: int, handler: Handler, kinds: Iterable[str] = (KIND_NEW, KIND_EDITED)):
+        """Ajoute ou remplace la route d'un chat pour les types donnés"""
+        routes = dict(self.routes)
+        for kind in kinds:
+            routes[(chat_id, kind)] = handler
+        self.routes = routes
+
+    def set_private_route(self, handler: Optional[Handler]):
+        """Handler des nouveaux messages privés des chats absents de la table (None = ignorés)"""
+        self.private_handler = handler
+
+    def remove_route(self, chat_id: int):
+        """Retire toutes les routes d'un chat"""
+        self.routes = {key: handler for key, handler in self.routes.items() if key[0] != chat_id}
+
+    def resolve(self, chat_id: Optional[int], kind: str) -> Optional[Handler]:
+        return self.routes.get((chat_id, kind))
+
+    async def dispatch(self, event, kind: str) -> bool:
+        """Dépose un événement dans la file de son chat; retourne False s'il est ignoré (non routé)"""
+        chat_id = event.chat_id
+        handler = self.routes.get((chat_id, kind))
+        if handler is None:
+            if self.private_handler is None or kind != KIND_NEW or not getattr(event, "is_private", False):
+                self.stats["dropped"] += 1
+                return False
+            handler = self.private_handler
+        self.stats["dispatched"] += 1
+
+        held = self._held.get(chat_id)
+        if held is not None:
+            held.append((handler, event))
+            return True
+        await self._enqueue(chat_id, handler, event)
+        return True
+
+    async def _enqueue(self, chat_id: int, handler: Handler, event):
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.Queue(self.max_queue_per_chat)
+        item = (handler, event, time.monotonic())
+        if queue.full():
+            self.stats["backpressure_waits"] += 1
+            await queue.put(item)
+        else:
+            queue.put_nowait(item)
+
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.get_running_loop().create_task(self._run_chat(chat_id, queue))
+
+    async def _run_chat(self, chat_id: int, queue: asyncio.Queue):
+        """Tâche d'un chat: traite ses événements un par un, dans l'ordre d'arrivée"""
+        while True:
+            try:
+                handler, event, enqueued_at = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._workers.pop(chat_id, None)
+                    return
+                continue
+
+            waited = time.monotonic() - enqueued_at
+            self.stats["wait_seconds_total"] += waited
+            if waited > self.stats["wait_seconds_max"]:
+                self.stats["wait_seconds_max"] = waited
+            try:
+                await handler(event)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ Erreur routage chat {chat_id}: {e}")
+            finally:
+                self.stats["processed"] += 1
+                queue.task_done()
+
+    def hold(self, chat_id: int):
+        """Met un chat en pause: ses événements en direct sont retenus jusqu'à release()"""
+        self._held.setdefault(chat_id, [])
+
+    def first_held_id(self, chat_id: int, after: int = 0) -> Optional[int]:
+        """Plus petit ID de message retenu pour ce chat au-delà de `after` (premier message en direct)"""
+        ids = [event.message.id for _, event in self._held.get(chat_id, ())
+               if getattr(event, "message", None) is not None and event.message.id > after]
+        return min(ids) if ids else None
+
+    async def release(self, chat_id: int):
+        """Reprend un chat: les événements retenus passent dans sa file, dans l'ordre"""
+        held = self._held.pop(chat_id, [])
+        for handler, event in held:
+            await self._enqueue(chat_id, handler, event)
+
+    async def join(self, chat_id: Optional[int] = None):
+        """Attend que la file de `chat_id` (toutes les files par défaut) soit vidée"""
+        if chat_id is not None:
+            queue = self._queues.get(chat_id)
+            if queue is not None:
+                await queue.join()
+            return
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    def queue_depth(self) -> int:
+        """Nombre total d'événements en attente, tous chats confondus"""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        processed = self.stats["processed"]
+        status["wait_seconds_avg"] = self.stats["wait_seconds_total"] / processed if processed else 0.0
+        status["queue_depth"] = self.queue_depth()
+        status["queue_depth_by_chat"] = {
+            str(chat_id): queue.qsize() for chat_id, queue in self._queues.items() if queue.qsize()
+        }
+        status["active_chats"] = len(self._workers)
+        status["held_chats"] = len(self._held)
+        status["routes"] = len(self.routes)
+        status["private_route"] = self.private_handler is not None
+        status["chats"] = len({chat_id for chat_id, _ in self.routes})
+        return status
@@ -1,15 +1,32 @@
 import random
 import asyncio
-import yaml
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Callable, List
 from telethon import TelegramClient
+from yaml_manager import ScheduleStore, PLAN_TIME_FORMAT, entry_datetime
+from outbound import PRIORITY_PREDICTION
+from metrics import PREDICTIONS
+from event_feed import EVENT_PREDICTION_CREATED
+
+AUTO_PREDICTIONS = PREDICTIONS.labels("auto")
+
+
+def plan_numero(moment: datetime) -> str:
+    """Clé d'une entrée: numéro de jeu (HHMM) et jour de la prédiction, unique sur tout l'horizon"""
+    return f"N{moment.hour:02d}{moment.minute:02d}@{moment:%Y-%m-%d}"
+
+
+def game_number_of(numero: str) -> int:
+    """Numéro de jeu d'une clé de planification (N1430@2026-10-19, N1430_1 ou ancien N1430 → 1430)"""
+    return int(numero[1:].split("@", 1)[0].split("_", 1)[0])
 
 class PredictionScheduler:
     """Système de planification automatique des prédictions"""
     
-    def __init__(self, client: TelegramClient, predictor, source_channel_id: int, target_channel_id: int):
+    def __init__(self, client: TelegramClient, predictor, source_channel_id: int, target_channel_id: int,
+                 schedule_file: str = "prediction.yaml", plan_days: int = 0,
+                 store: Optional[ScheduleStore] = None):
         """
         Initialise le planificateur
         
@@ -18,14 +35,25 @@ class PredictionScheduler:
             predictor: Instance du CardPredictor
             source_channel_id: ID du canal source pour vérification
             target_channel_id: ID du canal cible pour diffusion
+            schedule_file: Fichier YAML de persistance de cette paire de canaux
+            plan_days: Horizon de précalcul en jours (0 = une prédiction ajoutée après chaque vérification)
+            store: Stockage unique des planifications (par défaut, le répertoire de schedule_file)
         """
         self.client = client
         self.predictor = predictor
         self.source_channel_id = source_channel_id
         self.target_channel_id = target_channel_id
-        self.schedule_file = "prediction.yaml"
+        self.schedule_file = schedule_file
         self.is_running = False
-        self.schedule_data = {}
+        self.plan_days = plan_days
+        # Partition indexée (numéro, statut, heure de lancement) dans le stockage unique
+        self.store = store or ScheduleStore(os.path.dirname(schedule_file) or ".")
+        self.partition_name = os.path.splitext(os.path.basename(schedule_file))[0]
+        self.partition = self.store.partition(self.partition_name, load=False)
+        # Moteur multi-canaux propriétaire (None en mode autonome)
+        self.engine = None
+        # Numéro de jeu -> entrée datée lancée par ce planificateur (le même HHMM revient chaque jour)
+        self.auto_games: Dict[int, str] = {}
         
     def generate_next_prediction_time(self, current_time: Optional[datetime] = None) -> Dict[str, Any]:
         """Génère la prochaine prédiction avec lancement variable (1-4 min avant)"""
@@ -35,9 +63,9 @@ class PredictionScheduler:
         # Ajouter un intervalle fixe pour la prochaine prédiction (ex: 1 heure)
         next_time = current_time + timedelta(hours=1)
         
-        # Générer un numéro de prédiction basé sur l'heure
-        # Format: heure + minutes (ex: 7:30 -> N730)
-        numero_predit = f"N{next_time.hour:02d}{next_time.minute:02d}"
+        # Générer un numéro de prédiction basé sur l'heure et daté
+        # Format: heure + minutes @ jour (ex: 7:30 -> N0730@2026-10-19)
+        numero_predit = plan_numero(next_time)
         
         # VARIABLE: Heure de lancement entre 1-4 minutes avant la prédiction
         launch_offset_minutes = random.randint(1, 4)  # 1-4 minutes avant comme demandé
@@ -53,7 +81,9 @@ class PredictionScheduler:
             "launched": False,
             "verified": False,
             "generated_at": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "launch_offset": launch_offset_minutes
+            "launch_offset": launch_offset_minutes,
+            "launch_at": launch_time.strftime(PLAN_TIME_FORMAT),
+            "prediction_at": next_time.strftime(PLAN_TIME_FORMAT)
         }
         
         return prediction_data
@@ -70,8 +100,8 @@ class PredictionScheduler:
             # Calculer l'heure de prédiction (toutes les heures)
             prediction_time = current_time + timedelta(hours=i+1)
             
-            # Générer numéro basé sur l'heure de prédiction
-            numero = f"N{prediction_time.hour:02d}{prediction_time.minute:02d}"
+            # Générer numéro basé sur l'heure et le jour de prédiction
+            numero = plan_numero(prediction_time)
             
             # VARIABLE: Lancement entre 1-4 minutes avant comme demandé
             launch_offset_minutes = random.randint(1, 4)
@@ -93,28 +123,45 @@ class PredictionScheduler:
                 "launched": False,
                 "verified": False,
                 "generated_at": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "launch_offset": launch_offset_minutes
+                "launch_offset": launch_offset_minutes,
+                "launch_at": launch_time.strftime(PLAN_TIME_FORMAT),
+                "prediction_at": prediction_time.strftime(PLAN_TIME_FORMAT)
             }
         
         print(f"✅ Planification avec lancement variable générée: {num_predictions} prédictions")
         print(f"    Variations de lancement: 1-4 minutes avant chaque prédiction")
         return planification
     
+    @property
+    def schedule_data(self) -> Dict[str, Any]:
+        """Entrées de la planification, indexées par numéro"""
+        return self.partition.entries
+
+    @schedule_data.setter
+    def schedule_data(self, schedule_data: Dict[str, Any]):
+        self.set_schedule_data(schedule_data)
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        """Compteurs total/launched/verified maintenus par la partition"""
+        return self.partition.counters
+
     def save_schedule(self, schedule_data: Dict[str, Any]):
-        """Sauvegarde la planification dans le fichier YAML"""
+        """Sauvegarde la planification dans le fichier YAML (regroupée et hors boucle asyncio)"""
         try:
-            with open(self.schedule_file, "w", encoding='utf-8') as f:
-                yaml.dump(schedule_data, f, allow_unicode=True, default_flow_style=False)
-            print(f"✅ Planification sauvegardée dans {self.schedule_file}")
+            if schedule_data is not self.schedule_data:
+                self.set_schedule_data(schedule_data)
+            self.store.save_later(self.partition_name)
         except Exception as e:
             print(f"❌ Erreur sauvegarde planification: {e}")
     
     def load_schedule(self) -> Dict[str, Any]:
-        """Charge la planification depuis le fichier YAML"""
+        """Charge la planification depuis le fichier YAML (la version en mémoire si une écriture est en attente)"""
         try:
-            if os.path.exists(self.schedule_file):
-                with open(self.schedule_file, "r", encoding='utf-8') as f:
-                    data = yaml.safe_load(f) or {}
+            if self.partition_name in self.store.dirty:
+                return self.schedule_data
+            if self.store.path_for(self.partition_name).exists():
+                data = self.store.read(self.partition_name)
                 print(f"✅ Planification chargée: {len(data)} entrées")
                 return data
             else:
@@ -139,22 +186,27 @@ class PredictionScheduler:
                 pending.append((numero, data))
         return pending
     
+    def _unique_numero(self, numero: str) -> str:
+        """Suffixe la clé si elle existe déjà (le numéro de jeu reste celui de l'heure)"""
+        counter = 1
+        original_numero = numero
+        while numero in self.schedule_data:
+            numero = f"{original_numero}_{counter}"
+            counter += 1
+        return numero
+
     def add_next_prediction(self):
         """Ajoute une nouvelle prédiction à la planification"""
+        if self.plan_days:
+            # Planification précalculée: compléter l'horizon plutôt qu'ajouter à +1h
+            added = self.extend_plan(self.plan_days)
+            return added[-1] if added else None
+
         try:
             new_prediction = self.generate_next_prediction_time()
-            numero = new_prediction.pop("numero")
-            
-            # Éviter les doublons
-            counter = 1
-            original_numero = numero
-            while numero in self.schedule_data:
-                # Modifier légèrement le numéro si doublon
-                base_num = int(original_numero[1:])
-                numero = f"N{base_num + counter:04d}"
-                counter += 1
+            numero = self._unique_numero(new_prediction.pop("numero"))
             
-            self.schedule_data[numero] = new_prediction
+            self._add_entry(numero, new_prediction)
             self.save_schedule(self.schedule_data)
             
             print(f"✅ Nouvelle prédiction ajoutée: {numero} à {new_prediction['heure_lancement']}")
@@ -164,22 +216,109 @@ class PredictionScheduler:
             print(f"❌ Erreur ajout prédiction: {e}")
             return None
     
-    def get_predictions_to_verify(self) -> list:
-        """Retourne les prédictions à vérifier"""
-        to_verify = []
+    def launch_at_key(self, data: Dict[str, Any]) -> str:
+        """Date absolue de lancement d'une entrée (format PLAN_TIME_FORMAT)"""
+        return self.partition.launch_key(data)
+
+    def set_schedule_data(self, schedule_data: Dict[str, Any]):
+        """Remplace la planification et reconstruit les index de la partition (O(n log n))"""
+        self.partition.replace(schedule_data)
+        if self.engine:
+            self.engine.reindex_channel(self)
+
+    def _add_entry(self, numero: str, data: Dict[str, Any]):
+        """Insère une entrée dans la partition indexée et dans la roue du moteur"""
+        self.partition.add(numero, data)
+        if self.engine:
+            self.engine.index_entry(self, numero, data)
+
+    def mark_launched(self, numero: str):
+        """Marque une entrée comme lancée"""
+        if not self.schedule_data[numero].get("launched"):
+            self.partition.update(numero, {"launched": True})
+
+    def mark_verified(self, numero: str, status: str):
+        """Marque une entrée comme vérifiée avec son statut final"""
+        self.partition.update(numero, {"verified": True, "statut": status})
+
+    def mark_skipped(self, numero: str):
+        """Marque une entrée non lancée comme ignorée (⏭️)"""
+        self.partition.update(numero, {"statut": "⏭️"})
+
+    def remove_entry(self, numero: str):
+        """Retire une entrée de la planification"""
+        self.partition.remove(numero)
+        if self.engine:
+            self.engine.unindex_entry(self, numero)
+
+    def prune_past(self, before: datetime) -> int:
+        """Retire les entrées dont l'heure de prédiction précède `before` (une sauvegarde si besoin)"""
+        stale = []
         for numero, data in self.schedule_data.items():
-            if (data["launched"] and 
-                not data["verified"] and 
-                data["message_id"] is not None):
-                to_verify.append((numero, data))
-        return to_verify
+            try:
+                if self.get_entry_datetime(data, "heure_prediction", before) < before:
+                    stale.append(numero)
+            except (KeyError, ValueError):
+                continue
+        for numero in stale:
+            self.remove_entry(numero)
+        if stale:
+            self.save_schedule(self.schedule_data)
+            print(f"🧹 {len(stale)} entrée(s) passée(s) retirée(s) de {self.partition_name}")
+        return len(stale)
+
+    def get_upcoming(self, count: int = 10, now: Optional[datetime] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Les `count` prochains lancements à partir de maintenant, en O(log n + count)"""
+        return self.partition.get_upcoming(count, now)
+
+    def extend_plan(self, days: int, now: Optional[datetime] = None) -> List[str]:
+        """
+        Précalcule des prédictions horaires jusqu'à `days` jours devant maintenant.
+        Persiste une seule fois si des entrées sont ajoutées.
+        """
+        if now is None:
+            now = datetime.now()
+        horizon = now + timedelta(days=days)
+
+        last_prediction = now
+        for data in self.schedule_data.values():
+            try:
+                last_prediction = max(last_prediction, self.get_entry_datetime(data, "heure_prediction", now))
+            except (KeyError, ValueError):
+                continue
+
+        added = []
+        while last_prediction + timedelta(hours=1) <= horizon:
+            new_prediction = self.generate_next_prediction_time(last_prediction)
+            new_prediction["generated_at"] = now.strftime("%Y-%m-%d %H:%M:%S")
+            numero = self._unique_numero(new_prediction.pop("numero"))
+            self._add_entry(numero, new_prediction)
+            added.append(numero)
+            last_prediction += timedelta(hours=1)
+
+        if added:
+            self.save_schedule(self.schedule_data)
+            print(f"📆 Plan étendu sur {days} jour(s): {len(added)} prédictions ajoutées ({len(self.schedule_data)} au total)")
+        return added
+
+    def get_predictions_to_verify(self) -> list:
+        """Retourne les prédictions à vérifier (index des statuts ⌛ de la partition)"""
+        return [(numero, data) for numero, data in self.partition.awaiting_verification()
+                if data["message_id"] is not None]
     
-    async def launch_prediction(self, numero: str, data: Dict[str, Any]):
-        """Lance une prédiction automatique selon le nouveau format"""
+    async def launch_prediction(self, numero: str, data: Dict[str, Any], persist: bool = True):
+        """Lance une prédiction automatique selon le nouveau format
+
+        Args:
+            persist: Sauvegarde immédiate (False quand l'appelant persiste un lot en une fois)
+        """
         try:
-            # Vérifier les doublons avant de lancer
-            game_number = int(numero.replace('N', ''))
-            if game_number in self.predictor.prediction_status:
+            # Vérifier les doublons avant de lancer: l'entrée datée elle-même, ou une
+            # prédiction manuelle encore en attente sur ce numéro de jeu
+            game_number = game_number_of(numero)
+            manual_pending = (game_number not in self.auto_games
+                              and self.predictor.prediction_status.get(game_number) == '⌛')
+            if data.get("launched") or manual_pending:
                 print(f"❌ Prédiction déjà existante pour {numero}, abandon du lancement automatique")
                 return False
             
@@ -190,23 +329,36 @@ class PredictionScheduler:
             suit_prediction = self.generate_suit_prediction()
             
             # Message de prédiction automatique selon le nouveau format demandé
-            game_number = int(numero.replace('N', ''))
             prediction_text = f"🔵{game_number} 🔵2D: {suit_prediction} :⏳"
             
-            # Envoie le message au canal cible
-            sent_message = await self.client.send_message(self.target_channel_id, prediction_text)
+            # Envoie le message au canal cible (via la file sortante du moteur si disponible)
+            outbound = self.engine.outbound if self.engine else None
+            if outbound:
+                sent_message = await outbound.send_message(self.target_channel_id, prediction_text, PRIORITY_PREDICTION)
+            else:
+                sent_message = await self.client.send_message(self.target_channel_id, prediction_text)
             
             # Met à jour les données
-            data["launched"] = True
+            AUTO_PREDICTIONS.inc()
+            self.mark_launched(numero)
             data["message_id"] = sent_message.id
             data["chat_id"] = self.target_channel_id
             data["prediction_format"] = suit_prediction
             
             # Ajouter à la prédiction status pour éviter les doublons
             self.predictor.prediction_status[game_number] = '⌛'
+            self.auto_games[game_number] = numero
+
+            events = self.engine.events if self.engine else None
+            if events:
+                events.publish(EVENT_PREDICTION_CREATED, {
+                    "game": game_number, "source": "auto", "prediction": suit_prediction,
+                    "chat_id": self.target_channel_id
+                })
             
             # Sauvegarde
-            self.save_schedule(self.schedule_data)
+            if persist:
+                self.save_schedule(self.schedule_data)
             
             print(f"🚀 Prédiction automatique lancée: {numero} ({suit_prediction}) à {data['heure_lancement']}")
             return True
@@ -215,6 +367,73 @@ class PredictionScheduler:
             print(f"❌ Erreur lancement prédiction {numero}: {e}")
             return False
     
+    def get_entry_datetime(self, data: Dict[str, Any], field: str, now: datetime) -> datetime:
+        """Date absolue d'une heure HH:MM de la planification (première occurrence après génération)"""
+        return entry_datetime(data, field, now)
+
+    def reconcile_missed_slots(self, policy: "CatchUpPolicy", now: Optional[datetime] = None) -> list:
+        """
+        Classe en une passe les entrées non lancées dont l'heure de lancement est dépassée.
+
+        - launch : encore dans la fenêtre de grâce, à lancer immédiatement
+        - skip   : trop tard pour lancer, marquée ⏭️ et conservée pour l'historique
+        - expire : heure de prédiction dépassée depuis trop longtemps, retirée
+
+        Les modifications skip/expire sont persistées en une seule sauvegarde.
+        Retourne la liste [(numero, data)] à lancer maintenant.
+        """
+        if now is None:
+            now = datetime.now()
+        current_minute = now.replace(second=0, microsecond=0)
+
+        to_launch, skipped, expired = [], [], []
+        for numero, data in self.schedule_data.items():
+            if data.get("launched") or data.get("statut") != "⌛":
+                continue
+            try:
+                launch_at = self.get_entry_datetime(data, "heure_lancement", now)
+                predict_at = self.get_entry_datetime(data, "heure_prediction", now)
+            except (KeyError, ValueError):
+                continue
+            if launch_at >= current_minute:
+                continue
+
+            decision = policy.classify(now, launch_at, predict_at)
+            if decision == CatchUpPolicy.LAUNCH:
+                to_launch.append((numero, data))
+            elif decision == CatchUpPolicy.SKIP:
+                skipped.append(numero)
+            else:
+                expired.append(numero)
+
+        for numero in skipped:
+            self.mark_skipped(numero)
+        for numero in expired:
+            self.remove_entry(numero)
+
+        if skipped or expired:
+            self.save_schedule(self.schedule_data)
+        if to_launch or skipped or expired:
+            print(f"🔁 Rattrapage {self.target_channel_id}: {len(to_launch)} à lancer, "
+                  f"{len(skipped)} ignorées, {len(expired)} expirées")
+        return to_launch
+
+    async def launch_batch(self, entries: list) -> int:
+        """Lance un lot de prédictions en parallèle puis persiste une seule fois"""
+        if not entries:
+            return 0
+        results = await asyncio.gather(
+            *(self.launch_prediction(numero, data, persist=False) for numero, data in entries)
+        )
+        launched = sum(1 for result in results if result)
+        if launched:
+            self.save_schedule(self.schedule_data)
+        return launched
+
+    async def catch_up(self, policy: "CatchUpPolicy", now: Optional[datetime] = None) -> int:
+        """Rattrape les créneaux manqués pendant un arrêt (redémarrage, mise en veille Render)"""
+        return await self.launch_batch(self.reconcile_missed_slots(policy, now))
+
     def generate_suit_prediction(self) -> str:
         """Génère une prédiction au format 2K/2K"""
         # Formats possibles pour les prédictions automatiques
@@ -243,11 +462,19 @@ class PredictionScheduler:
     async def update_prediction_message(self, numero: str, data: Dict[str, Any], new_status: str):
         """Met à jour le message de prédiction avec le nouveau statut"""
         try:
+            if self.engine and not self.engine.is_leader:
+                return
             if data["message_id"] and data["chat_id"]:
                 # Message mis à jour selon le nouveau format demandé
-                game_number = int(numero.replace('N', ''))
+                game_number = game_number_of(numero)
                 new_text = f"🔵{game_number} 🔵2D: statut :{new_status}"
 
+                outbound = self.engine.outbound if self.engine else None
+                if outbound:
+                    # Édition déposée dans la file sortante, sans attendre le réseau
+                    outbound.edit_message(data["chat_id"], data["message_id"], new_text)
+                    print(f"📝 Mise à jour du message automatique {numero} planifiée: {new_status}")
+                    return
                 await self.client.edit_message(
                     data["chat_id"], 
                     data["message_id"], 
@@ -346,10 +573,12 @@ class PredictionScheduler:
         print("🚀 Démarrage du planificateur automatique")
         
         # Charge ou génère la planification
-        self.schedule_data = self.load_schedule()
+        self.set_schedule_data(self.load_schedule())
         if not self.schedule_data:
-            self.schedule_data = self.generate_daily_schedule()
+            self.set_schedule_data(self.generate_daily_schedule())
             self.save_schedule(self.schedule_data)
+        else:
+            await self.catch_up(CatchUpPolicy())
         
         self.is_running = True
         
@@ -382,18 +611,18 @@ class PredictionScheduler:
         if not self.schedule_data:
             return {"error": "Aucune planification chargée"}
         
-        total = len(self.schedule_data)
-        launched = sum(1 for data in self.schedule_data.values() if data["launched"])
-        verified = sum(1 for data in self.schedule_data.values() if data["verified"])
+        # Compteurs maintenus à chaque mutation, prochain lancement par bisection
+        total = self.counters["total"]
+        launched = self.counters["launched"]
+        verified = self.counters["verified"]
         pending = total - launched
         
         # Prochaine prédiction
-        current_time = self.get_current_time_slot()
         next_launch = None
-        for numero, data in self.schedule_data.items():
-            if not data["launched"] and data["heure_lancement"] > current_time:
-                next_launch = f"{numero} à {data['heure_lancement']}"
-                break
+        upcoming = self.get_upcoming(1)
+        if upcoming:
+            numero, data = upcoming[0]
+            next_launch = f"{numero} à {data['heure_lancement']}"
         
         return {
             "total": total,
@@ -406,10 +635,363 @@ class PredictionScheduler:
     
     def regenerate_schedule(self):
         """Régénère une nouvelle planification quotidienne"""
-        self.schedule_data = self.generate_daily_schedule()
+        self.set_schedule_data(self.generate_daily_schedule())
+        if self.plan_days:
+            self.extend_plan(self.plan_days)
         self.save_schedule(self.schedule_data)
         print("🔄 Nouvelle planification générée")
 
+
+ChannelKey = Tuple[int, int]
+
+
+def schedule_file_for(directory: str, key: ChannelKey) -> str:
+    """Chemin du fichier YAML de la partition d'une paire de canaux"""
+    source_id, target_id = key
+    return os.path.join(directory, f"prediction_{source_id}_{target_id}.yaml")
+
+
+class CatchUpPolicy:
+    """Politique de rattrapage des créneaux dépassés lors d'un redémarrage"""
+
+    LAUNCH = "launch"
+    SKIP = "skip"
+    EXPIRE = "expire"
+
+    def __init__(self, launch_grace_minutes: int = 10, expire_after_minutes: int = 120):
+        """
+        Args:
+            launch_grace_minutes: Retard maximal toléré pour lancer quand même la prédiction
+            expire_after_minutes: Au-delà de ce délai après l'heure de prédiction, l'entrée est retirée
+        """
+        self.launch_grace_minutes = launch_grace_minutes
+        self.expire_after_minutes = expire_after_minutes
+
+    def classify(self, now: datetime, launch_at: datetime, predict_at: datetime) -> str:
+        """Décide du sort d'une entrée en retard"""
+        if now - predict_at > timedelta(minutes=self.expire_after_minutes):
+            return self.EXPIRE
+        if now - launch_at <= timedelta(minutes=self.launch_grace_minutes) and now < predict_at:
+            return self.LAUNCH
+        return self.SKIP
+
+
+def minute_of_day(heure: str) -> int:
+    """Convertit une heure HH:MM en index de minute dans la journée (0-1439)"""
+    hours, minutes = heure.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class TimerWheel:
+    """
+    Roue temporelle à 1440 emplacements (une par minute de la journée).
+
+    Chaque emplacement contient les clés (canal, numéro) à lancer à cette minute,
+    ce qui rend le coût d'un tick proportionnel au nombre de lancements dus
+    et non au nombre total de canaux ou d'entrées planifiées.
+    """
+
+    SLOTS = 24 * 60
+
+    def __init__(self):
+        self.slots = [None] * self.SLOTS
+        self.size = 0
+
+    def schedule(self, minute: int, key: Tuple[ChannelKey, str]):
+        """Ajoute une clé dans l'emplacement d'une minute"""
+        slot = self.slots[minute]
+        if slot is None:
+            slot = self.slots[minute] = set()
+        if key not in slot:
+            slot.add(key)
+            self.size += 1
+
+    def cancel(self, minute: int, key: Tuple[ChannelKey, str]):
+        """Retire une clé de l'emplacement d'une minute"""
+        slot = self.slots[minute]
+        if slot and key in slot:
+            slot.discard(key)
+            self.size -= 1
+
+    def pop_slot(self, minute: int) -> set:
+        """Retire et retourne toutes les clés d'un emplacement"""
+        slot = self.slots[minute]
+        if not slot:
+            return set()
+        self.slots[minute] = None
+        self.size -= len(slot)
+        return slot
+
+
+class SchedulerEngine:
+    """
+    Moteur de planification partagé pour plusieurs paires de canaux.
+
+    Chaque paire (source, cible) conserve son propre PredictionScheduler
+    (état et fichier YAML dédiés), mais une seule boucle et une seule roue
+    temporelle pilotent tous les lancements.
+    """
+
+    def __init__(self, client: TelegramClient, predictor_factory: Callable[[], Any],
+                 data_dir: str = os.path.join("data", "schedules"), tick_seconds: int = 30,
+                 catch_up_policy: Optional[CatchUpPolicy] = None, lease=None, plan_days: int = 3,
+                 store: Optional[ScheduleStore] = None, outbound=None, events=None,
+                 retention_hours: int = 24):
+        """
+        Args:
+            client: Client Telegram partagé
+            predictor_factory: Fabrique d'état de prédiction pour les canaux sans predictor dédié
+            data_dir: Répertoire des partitions de persistance (un fichier par paire)
+            tick_seconds: Intervalle maximal entre deux ticks de la roue
+            catch_up_policy: Politique appliquée aux créneaux manqués au chargement d'un canal
+            lease: LeaderLease optionnel ; sans bail détenu, l'instance reste suiveuse
+            plan_days: Horizon de précalcul des plans de chaque canal, en jours
+            store: Stockage unique partagé (celui de YAMLDataManager), sinon créé sur data_dir
+            outbound: OutboundDispatcher optionnel pour les envois et éditions
+            events: EventFeed optionnel, notifié des prédictions automatiques lancées
+            retention_hours: Entrées conservées après leur heure de prédiction (vérification tardive, historique)
+        """
+        self.client = client
+        self.predictor_factory = predictor_factory
+        self.store = store or ScheduleStore(data_dir)
+        self.outbound = outbound
+        self.events = events
+        self.data_dir = str(self.store.directory)
+        self.tick_seconds = tick_seconds
+        self.wheel = TimerWheel()
+        self.channels: Dict[ChannelKey, PredictionScheduler] = {}
+        self.by_source: Dict[int, Dict[ChannelKey, PredictionScheduler]] = {}
+        self._entries: Dict[ChannelKey, Dict[str, int]] = {}
+        self._last_minute: Optional[int] = None
+        self.catch_up_policy = catch_up_policy or CatchUpPolicy()
+        self._catch_up: Dict[ChannelKey, list] = {}
+        self.is_running = False
+        self.lease = lease
+        self.plan_days = plan_days
+        self.retention = timedelta(hours=retention_hours)
+        self._last_horizon_check: Optional[datetime] = None
+        if lease is not None:
+            lease.on_change.append(self._on_leadership_change)
+
+    @property
+    def is_leader(self) -> bool:
+        """Vrai si cette instance peut lancer et éditer (toujours vrai sans bail)"""
+        return self.lease is None or self.lease.is_leader
+
+    def _on_leadership_change(self, is_leader: bool):
+        if is_leader:
+            self.resync_from_disk()
+
+    def _load_channel(self, scheduler: PredictionScheduler):
+        """Charge la partition d'un canal, rattrape les créneaux manqués et l'indexe dans la roue"""
+        key = (scheduler.source_channel_id, scheduler.target_channel_id)
+        data = scheduler.load_schedule()
+        if data:
+            scheduler.set_schedule_data(data)
+        elif not scheduler.schedule_data:
+            scheduler.set_schedule_data(scheduler.generate_daily_schedule())
+            if self.is_leader and not scheduler.plan_days:
+                scheduler.save_schedule(scheduler.schedule_data)
+        if self.is_leader:
+            scheduler.prune_past(datetime.now() - self.retention)
+        if self.is_leader and scheduler.plan_days:
+            # Précalcul de l'horizon (sauvegarde unique incluant une planification neuve)
+            if not scheduler.extend_plan(scheduler.plan_days) and not data:
+                scheduler.save_schedule(scheduler.schedule_data)
+
+        # Seul le leader réconcilie: les créneaux à rattraper partent au prochain tick
+        self._catch_up.pop(key, None)
+        missed = scheduler.reconcile_missed_slots(self.catch_up_policy) if self.is_leader else []
+        self.reindex_channel(scheduler)
+        for numero, _ in missed:
+            self.wheel.cancel(self._entries[key].pop(numero), (key, numero))
+        if missed:
+            self._catch_up[key] = missed
+
+    def resync_from_disk(self):
+        """
+        Recharge chaque partition écrite par l'ancien leader, puis rattrape
+        les créneaux tombés pendant la bascule.
+        """
+        for scheduler in self.channels.values():
+            self._load_channel(scheduler)
+        self._last_minute = None
+        print(f"🔄 Planification resynchronisée depuis le disque ({len(self.channels)} canaux)")
+
+    def schedule_file_for(self, key: ChannelKey) -> str:
+        """Chemin du fichier YAML de la partition d'une paire de canaux"""
+        return schedule_file_for(self.data_dir, key)
+
+    def add_channel(self, source_channel_id: int, target_channel_id: int, predictor=None) -> PredictionScheduler:
+        """Démarre (ou retourne) la planification d'une paire de canaux"""
+        key = (source_channel_id, target_channel_id)
+        if key in self.channels:
+            return self.channels[key]
+
+        scheduler = PredictionScheduler(
+            self.client, predictor or self.predictor_factory(),
+            source_channel_id, target_channel_id,
+            schedule_file=self.schedule_file_for(key),
+            plan_days=self.plan_days,
+            store=self.store
+        )
+        scheduler.engine = self
+        scheduler.is_running = True
+        self.channels[key] = scheduler
+        self.by_source.setdefault(source_channel_id, {})[key] = scheduler
+        self._load_channel(scheduler)
+        print(f"✅ Canal planifié: {source_channel_id} → {target_channel_id} ({len(self.channels)} actifs)")
+        return scheduler
+
+    def remove_channel(self, source_channel_id: int, target_channel_id: int) -> bool:
+        """Arrête la planification d'une paire de canaux"""
+        key = (source_channel_id, target_channel_id)
+        scheduler = self.channels.pop(key, None)
+        if not scheduler:
+            return False
+
+        self._unindex_channel(key)
+        self._catch_up.pop(key, None)
+        siblings = self.by_source.get(source_channel_id, {})
+        siblings.pop(key, None)
+        if not siblings:
+            self.by_source.pop(source_channel_id, None)
+        scheduler.is_running = False
+        scheduler.engine = None
+        print(f"🛑 Canal retiré du planificateur: {source_channel_id} → {target_channel_id}")
+        return True
+
+    def get_channel(self, source_channel_id: int, target_channel_id: int) -> Optional[PredictionScheduler]:
+        """Retourne le planificateur d'une paire de canaux"""
+        return self.channels.get((source_channel_id, target_channel_id))
+
+    def channels_for_source(self, source_channel_id: int) -> list:
+        """Planificateurs dont les prédictions se vérifient sur ce canal source"""
+        return list(self.by_source.get(source_channel_id, {}).values())
+
+    def index_entry(self, scheduler: PredictionScheduler, numero: str, data: Dict[str, Any]):
+        """Inscrit une entrée non lancée dans la roue temporelle"""
+        if data.get("launched") or data.get("statut") != "⌛":
+            return
+        key = (scheduler.source_channel_id, scheduler.target_channel_id)
+        minute = minute_of_day(data["heure_lancement"])
+        entries = self._entries.setdefault(key, {})
+        previous = entries.get(numero)
+        if previous is not None and previous != minute:
+            self.wheel.cancel(previous, (key, numero))
+        entries[numero] = minute
+        self.wheel.schedule(minute, (key, numero))
+
+    def unindex_entry(self, scheduler: PredictionScheduler, numero: str):
+        """Retire une entrée de la roue temporelle"""
+        key = (scheduler.source_channel_id, scheduler.target_channel_id)
+        minute = self._entries.get(key, {}).pop(numero, None)
+        if minute is not None:
+            self.wheel.cancel(minute, (key, numero))
+
+    def _unindex_channel(self, key: ChannelKey):
+        for numero, minute in self._entries.pop(key, {}).items():
+            self.wheel.cancel(minute, (key, numero))
+
+    def reindex_channel(self, scheduler: PredictionScheduler):
+        """Reconstruit les entrées de la roue pour une paire de canaux"""
+        key = (scheduler.source_channel_id, scheduler.target_channel_id)
+        self._unindex_channel(key)
+        for numero, data in scheduler.schedule_data.items():
+            self.index_entry(scheduler, numero, data)
+
+    async def tick(self, now: Optional[datetime] = None) -> int:
+        """Lance toutes les entrées dues depuis le dernier tick, retourne le nombre de lancements"""
+        if not self.is_leader:
+            # Suiveur: la planification reste en mémoire, le leader lance
+            return 0
+        if self.lease is not None and not self.lease.check_fencing_token():
+            return 0
+
+        if now is None:
+            now = datetime.now()
+        current = now.hour * 60 + now.minute
+        if self._last_minute is None:
+            self._last_minute = (current - 1) % TimerWheel.SLOTS
+
+        due: Dict[ChannelKey, list] = self._catch_up
+        self._catch_up = {}
+        now_key = now.strftime(PLAN_TIME_FORMAT)
+        deferred = []
+        minute = self._last_minute
+        while minute != current:
+            minute = (minute + 1) % TimerWheel.SLOTS
+            for key, numero in self.wheel.pop_slot(minute):
+                entries = self._entries.get(key)
+                if entries is not None:
+                    entries.pop(numero, None)
+                scheduler = self.channels.get(key)
+                if not scheduler:
+                    continue
+                data = scheduler.schedule_data.get(numero)
+                if data and not data["launched"] and data["statut"] == "⌛":
+                    if scheduler.launch_at_key(data) > now_key:
+                        # Même minute mais un jour suivant du plan: reste dans la roue
+                        deferred.append((scheduler, numero, data))
+                    else:
+                        due.setdefault(key, []).append((numero, data))
+        self._last_minute = current
+        for scheduler, numero, data in deferred:
+            self.index_entry(scheduler, numero, data)
+
+        # Envois en parallèle, une seule sauvegarde par canal touché
+        results = await asyncio.gather(*(
+            self.channels[key].launch_batch(entries)
+            for key, entries in due.items() if key in self.channels
+        ))
+        return sum(results)
+
+    def extend_horizons(self, now: Optional[datetime] = None):
+        """Retire les entrées passées et complète l'horizon de chaque canal, au plus une fois par heure"""
+        if now is None:
+            now = datetime.now()
+        if not self.is_leader:
+            return
+        if self._last_horizon_check and now - self._last_horizon_check < timedelta(hours=1):
+            return
+        self._last_horizon_check = now
+        for scheduler in self.channels.values():
+            scheduler.prune_past(now - self.retention)
+            if self.plan_days:
+                scheduler.extend_plan(self.plan_days, now)
+
+    async def run(self):
+        """Boucle unique pilotant tous les canaux planifiés"""
+        print(f"🚀 Démarrage du moteur de planification ({len(self.channels)} canaux)")
+        self.is_running = True
+        while self.is_running:
+            try:
+                self.extend_horizons()
+                await self.tick()
+                # Se réveiller au plus tard au début de la minute suivante
+                now = datetime.now()
+                await asyncio.sleep(min(self.tick_seconds, 60 - now.second))
+            except Exception as e:
+                print(f"❌ Erreur dans le moteur de planification: {e}")
+                await asyncio.sleep(60)
+
+    def stop(self):
+        """Arrête la boucle du moteur (les canaux restent enregistrés)"""
+        self.is_running = False
+        for scheduler in self.channels.values():
+            scheduler.is_running = False
+        print("🛑 Moteur de planification arrêté")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Statut global du moteur et de chaque paire de canaux"""
+        return {
+            "is_running": self.is_running,
+            "is_leader": self.is_leader,
+            "channels": len(self.channels),
+            "wheel_entries": self.wheel.size,
+            "per_channel": {key: scheduler.get_schedule_status() for key, scheduler in self.channels.items()}
+        }
+
 # Exemple d'utilisation
 if __name__ == "__main__":
     # Génération d'un exemple de planification
@@ -418,6 +1000,6 @@ if __name__ == "__main__":
     mock_predictor = Mock()
     scheduler = PredictionScheduler(mock_client, mock_predictor, 0, 0)
     schedule = scheduler.generate_daily_schedule()
-    scheduler.schedule_data = schedule
+    scheduler.set_schedule_data(schedule)
     scheduler.save_schedule(schedule)
     print("✅ Exemple de planification généré dans prediction.yaml")
\ No newline at end of file
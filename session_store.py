@@ -0,0 +1,115 @@
+"""
+Session Telegram stable entre redémarrages.
+
+Une session réutilisée garde la clé d'autorisation : le démarrage évite une
+nouvelle autorisation complète du bot. Un fichier de session (SQLite) garde en
+plus le cache d'entités de Telethon et l'état des mises à jour ; une
+StringSession ne contient que le centre de données et la clé d'autorisation
+(les entités du bot et des canaux sont persistées par entity_cache, les
+messages manqués rattrapés par backfill).
+
+Configuration (variables d'environnement) :
+- TELEGRAM_SESSION : session encodée (StringSession), pour les hébergeurs dont
+  le disque est effacé à chaque redémarrage (Render free).
+- SESSION_NAME : nom du fichier de session sinon (défaut: bot_session).
+
+Plusieurs instances lancées depuis le même répertoire (bail de leader) ne
+partagent jamais une session : chacune prend un verrou exclusif sur la sienne.
+La première garde `SESSION_NAME` (ou TELEGRAM_SESSION), les suivantes prennent
+le premier emplacement libre `SESSION_NAME-2`, `SESSION_NAME-3`... réutilisé
+au redémarrage suivant.
+
+`python session_store.py` ouvre une session avec BOT_TOKEN et affiche la
+valeur à placer dans TELEGRAM_SESSION.
+"""
+import glob
+import os
+import re
+from typing import Optional, TextIO, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou, une instance par répertoire
+    fcntl = None
+
+from telethon.sessions import StringSession
+
+DEFAULT_SESSION_NAME = "bot_session"
+LEGACY_SESSION_PATTERN = re.compile(r"bot_session_\d+\.session(-journal)?$")
+MAX_REPLICAS = 16
+
+_session_lock: Optional[TextIO] = None  # Gardé ouvert: le verrou dure autant que le processus
+
+
+def _lock_session(name: str) -> bool:
+    """Verrou exclusif non bloquant sur `name.lock`; False si une autre instance l'utilise"""
+    global _session_lock
+    if fcntl is None:
+        return True
+    handle = open(f"{name}.lock", "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    if _session_lock is not None:
+        _session_lock.close()
+    _session_lock = handle
+    return True
+
+
+def build_session(default_name: str = DEFAULT_SESSION_NAME) -> Tuple[Union[str, StringSession], bool]:
+    """Retourne (session pour TelegramClient, démarrage à chaud)
+
+    Le démarrage est « à chaud » quand une session authentifiée existe déjà.
+    """
+    session_name = os.getenv('SESSION_NAME') or default_name
+    session_string = (os.getenv('TELEGRAM_SESSION') or '').strip()
+    if session_string and _lock_session(f"{session_name}.string"):
+        return StringSession(session_string), True
+
+    for slot in range(1, MAX_REPLICAS + 1):
+        name = session_name if slot == 1 else f"{session_name}-{slot}"
+        if _lock_session(name):
+            if slot > 1 or session_string:
+                print(f"🔐 Session {session_name} déjà utilisée par une autre instance, fichier {name}.session")
+            return name, os.path.exists(f"{name}.session")
+    raise RuntimeError(f"Aucune session libre parmi {MAX_REPLICAS} instances ({session_name})")
+
+
+def cleanup_legacy_sessions(directory: str = ".") -> int:
+    """Supprime les fichiers `bot_session_<horodatage>.session` laissés par les anciens démarrages"""
+    removed = 0
+    for path in glob.glob(os.path.join(directory, "bot_session_*.session*")):
+        if LEGACY_SESSION_PATTERN.search(os.path.basename(path)):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                print(f"⚠️ Impossible de supprimer {path}: {e}")
+    if removed:
+        print(f"🧹 {removed} ancien(s) fichier(s) de session supprimé(s)")
+    return removed
+
+
+async def export_session_string(api_id: int, api_hash: str, bot_token: str) -> str:
+    """Authentifie le bot une fois et retourne la session encodée"""
+    from telethon import TelegramClient
+
+    client = TelegramClient(StringSession(), api_id, api_hash)
+    await client.start(bot_token=bot_token)
+    try:
+        return client.session.save()
+    finally:
+        await client.disconnect()
+
+
+if __name__ == "__main__":
+    import asyncio
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    value = asyncio.run(export_session_string(
+        int(os.getenv('API_ID') or '0'), os.getenv('API_HASH') or '', os.getenv('BOT_TOKEN') or ''
+    ))
+    print("TELEGRAM_SESSION=" + value)
@@ -0,0 +1,89 @@
+"""
+Instantané JSON de /status, tenu à jour par le pipeline et servi pré-encodé.
+
+Deux sources de champs :
+- les champs publiés par le pipeline (`update`) au moment où ils changent ;
+- les sections des composants (`provide`), relues au plus une fois par
+  `refresh_interval` et seulement quand /status est demandé.
+
+Le JSON n'est ré-encodé que si une valeur a changé depuis le dernier encodage ;
+les requêtes servent le même tampon d'octets, avec un ETag qui permet au client
+de recevoir un 304 sans corps (If-None-Match).
+"""
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class StatusSnapshot:
+    """Statut du bot encodé une fois par changement"""
+
+    def __init__(self, refresh_interval: float = 1.0):
+        """
+        Args:
+            refresh_interval: Intervalle minimal entre deux relectures des sections des composants (secondes)
+        """
+        self.refresh_interval = refresh_interval
+        self.fields: Dict[str, Any] = {}
+        self.providers: Dict[str, Callable[[], Any]] = {}
+        self.version = 0
+        self._refreshed_at = 0.0
+        self._encoded_version = -1
+        self._body = b""
+        self._etag = ""
+        self.stats = {"requests": 0, "not_modified": 0, "encodes": 0, "refreshes": 0}
+
+    def update(self, **fields):
+        """Publie des champs; la version n'avance que si une valeur change"""
+        for key, value in fields.items():
+            if self.fields.get(key, _MISSING) != value:
+                self.fields[key] = value
+                self.version += 1
+
+    def provide(self, key: str, read: Callable[[], Any]):
+        """Section relue à la demande (au plus une fois par refresh_interval)"""
+        self.providers[key] = read
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = now
+        self.stats["refreshes"] += 1
+        for key, read in self.providers.items():
+            try:
+                value = read()
+            except Exception as e:
+                value = {"error": str(e)}
+            self.update(**{key: value})
+
+    def encoded(self) -> Tuple[bytes, str]:
+        """(corps JSON, ETag) de la version courante, encodés au plus une fois par version"""
+        self.stats["requests"] += 1
+        self._refresh()
+        if self._encoded_version != self.version:
+            self._body = json.dumps(self.fields, ensure_ascii=False, default=str).encode("utf-8")
+            self._etag = '"' + hashlib.blake2b(self._body, digest_size=8).hexdigest() + '"'
+            self._encoded_version = self.version
+            self.stats["encodes"] += 1
+        return self._body, self._etag
+
+    def not_modified(self, if_none_match: Optional[str], etag: str) -> bool:
+        """Vrai si l'en-tête If-None-Match du client désigne déjà cette version"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags or f"W/{etag}" in tags:
+            self.stats["not_modified"] += 1
+            return True
+        return False
+
+    def get_status(self) -> Dict[str, Any]:
+        status = dict(self.stats)
+        status["version"] = self.version
+        status["bytes"] = len(self._body)
+        return status
+
+
+_MISSING = object()
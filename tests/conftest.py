@@ -0,0 +1,7 @@
+"""Configuration commune des tests: modules du bot et client Telegram factice importables"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
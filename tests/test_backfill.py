@@ -0,0 +1,56 @@
+"""Tests du rattrapage d'historique par IDs explicites"""
+import asyncio
+
+from backfill import HistoryBackfill
+from fake_telegram import FakeTelegramClient
+
+CHAT = -1001
+
+
+def setup(tmp_path, messages: int, last_id: int, **options):
+    client = FakeTelegramClient(latency=0, jitter=0)
+    for index in range(messages):
+        client._store(CHAT, f"#N{index}. message")
+    backfill = HistoryBackfill(client, path=str(tmp_path / "ids.json"), **options)
+    backfill.last_ids[str(CHAT)] = last_id
+    return client, backfill
+
+
+def replay(backfill: HistoryBackfill, upper_bound=None):
+    seen = []
+
+    async def handler(event):
+        seen.append(event.message.id)
+    count = asyncio.run(backfill.catch_up(CHAT, handler, upper_bound))
+    return count, seen
+
+
+def test_small_gap_is_replayed_in_order_with_overlap(tmp_path):
+    _, backfill = setup(tmp_path, 130, 100, max_gap=500, batch_size=50, overlap=5)
+    count, seen = replay(backfill)
+    assert seen == list(range(96, 131))
+    assert count == 35
+    assert backfill.last_processed(CHAT) == 130
+
+
+def test_upper_bound_excludes_live_messages(tmp_path):
+    _, backfill = setup(tmp_path, 130, 100, max_gap=500, batch_size=50, overlap=0)
+    _, seen = replay(backfill, upper_bound=121)
+    assert seen == list(range(101, 121))
+
+
+def test_large_gap_keeps_most_recent_with_few_requests(tmp_path):
+    client, backfill = setup(tmp_path, 20000, 10, max_gap=200, batch_size=100, overlap=5)
+    count, seen = replay(backfill)
+    assert count == 200
+    assert seen == list(range(19801, 20001))
+    # Sondage de la fin puis lecture des 200 derniers IDs, pas un appel par lot de 100 IDs
+    assert client.stats["get_messages"] < 15
+    assert backfill.stats["skipped_over_gap"] == 19790
+
+
+def test_first_run_on_channel_reads_nothing(tmp_path):
+    client, backfill = setup(tmp_path, 50, 0)
+    backfill.last_ids.clear()
+    assert replay(backfill) == (0, [])
+    assert client.stats["get_messages"] == 0
@@ -0,0 +1,73 @@
+"""Tests du répartiteur de commandes: correspondance exacte, suggestions et contrôle admin"""
+import asyncio
+
+from commands import CommandDispatcher
+from fake_telegram import FakeEvent, FakeTelegramClient
+
+ADMIN_ID = 42
+
+
+def new_dispatcher():
+    client = FakeTelegramClient(latency=0, jitter=0)
+    dispatcher = CommandDispatcher(ADMIN_ID, bot_username="CardBot")
+    calls = []
+
+    async def record(event):
+        calls.append((event.command_parts[0], event.pattern_match))
+
+    dispatcher.register("status", record)
+    dispatcher.register("start", record, admin_only=False)
+    dispatcher.register("stats", record)
+    dispatcher.register("set_channel", record, args_pattern=r"(-?\d+)", usage="/set_channel <id>",
+                        deny_message="⛔ Réservé à l'administrateur")
+    return client, dispatcher, calls
+
+
+def send(client, dispatcher, text: str, sender_id: int = ADMIN_ID):
+    event = FakeEvent(client, sender_id, text, 1, sender_id=sender_id)
+    return asyncio.run(dispatcher.dispatch(event))
+
+
+def replies(client, chat_id: int = ADMIN_ID):
+    return [message.message for message in client.history.get(chat_id, []) if message.out]
+
+
+def test_exact_match_only():
+    client, dispatcher, calls = new_dispatcher()
+
+    assert send(client, dispatcher, "/status")
+    assert send(client, dispatcher, "/STATS@cardbot extra")
+    assert not send(client, dispatcher, "/sta")
+    assert not send(client, dispatcher, "/statusx")
+    assert not send(client, dispatcher, "/status@otherbot")
+    assert not send(client, dispatcher, "status")
+
+    assert [parts for parts, _ in calls] == ["/status", "/STATS@cardbot"]
+    assert dispatcher.stats["dispatched"] == 2
+    assert dispatcher.stats["unknown"] == 2
+
+
+def test_unknown_command_suggests_to_admin_only():
+    client, dispatcher, calls = new_dispatcher()
+
+    send(client, dispatcher, "/sta")
+    send(client, dispatcher, "/sta", sender_id=7)
+
+    assert replies(client) == ["❓ Commande inconnue /sta. Vouliez-vous dire: /start, /stats, /status ?"]
+    assert replies(client, 7) == []
+    assert not calls
+
+
+def test_admin_only_and_argument_checks():
+    client, dispatcher, calls = new_dispatcher()
+
+    assert not send(client, dispatcher, "/set_channel -100", sender_id=7)
+    assert not send(client, dispatcher, "/status", sender_id=7)
+    assert send(client, dispatcher, "/start", sender_id=7)
+    assert not send(client, dispatcher, "/set_channel abc")
+    assert send(client, dispatcher, "/set_channel -100")
+
+    assert replies(client, 7) == ["⛔ Réservé à l'administrateur"]
+    assert replies(client) == ["❌ Usage: /set_channel <id>"]
+    assert calls[-1][1].group(1) == "-100"
+    assert dispatcher.stats == {"dispatched": 2, "unknown": 0, "denied": 2, "bad_args": 1}
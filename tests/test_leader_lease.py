@@ -0,0 +1,53 @@
+"""Tests du bail de leader: passation et jeton de fencing"""
+import time
+
+from leader_lease import LeaderLease
+
+
+def new_lease(tmp_path, holder_id: str, ttl_seconds: float = 15.0) -> LeaderLease:
+    return LeaderLease(str(tmp_path / "leader.db"), ttl_seconds=ttl_seconds, holder_id=holder_id)
+
+
+def test_second_instance_waits_while_lease_is_held(tmp_path):
+    first = new_lease(tmp_path, "a")
+    second = new_lease(tmp_path, "b")
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert first.try_acquire()  # Renouvellement: même jeton
+    assert first.token == 1
+    assert first.check_fencing_token()
+
+
+def test_release_hands_over_with_new_token(tmp_path):
+    first = new_lease(tmp_path, "a")
+    second = new_lease(tmp_path, "b")
+    changes = []
+    first.on_change.append(changes.append)
+
+    assert first.try_acquire()
+    first.release()
+    assert second.try_acquire()
+
+    assert second.token == 2
+    assert not first.is_leader
+    assert not first.check_fencing_token()
+    assert second.check_fencing_token()
+    assert changes == [True, False]
+
+
+def test_stale_leader_is_fenced_after_expiry(tmp_path):
+    first = new_lease(tmp_path, "a", ttl_seconds=0.2)
+    second = new_lease(tmp_path, "b", ttl_seconds=0.2)
+
+    assert first.try_acquire()
+    time.sleep(0.25)
+    assert second.try_acquire()
+    # L'ancien leader se réveille avec un bail local encore valide: le jeton le bloque
+    first.expires_at = time.time() + 60
+    assert first.is_leader
+    assert not first.check_fencing_token()
+    assert second.check_fencing_token()
+    assert second.token == first.token + 1
+    # Sa tentative de renouvellement échoue tant que le nouveau bail est valide
+    assert not first.try_acquire()
@@ -0,0 +1,36 @@
+"""Tests de la surveillance de boucle: capture des rappels lents limitée dans le temps"""
+import asyncio
+import time
+
+from loop_monitor import LoopMonitor
+
+ORIGINAL_RUN = asyncio.events.Handle._run
+
+
+def test_callbacks_are_not_wrapped_outside_capture():
+    monitor = LoopMonitor(interval=0.01)
+
+    async def probe():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        monitor.stop()
+        await task
+    asyncio.run(probe())
+
+    assert asyncio.events.Handle._run is ORIGINAL_RUN
+    assert monitor.health()["samples"] > 0
+
+
+def test_capture_records_slow_callback_then_uninstalls():
+    monitor = LoopMonitor(slow_threshold=0.02)
+
+    async def capture():
+        monitor.capture(0.2)
+        assert asyncio.events.Handle._run is not ORIGINAL_RUN
+        asyncio.get_running_loop().call_soon(time.sleep, 0.05)
+        await asyncio.sleep(0.3)
+    asyncio.run(capture())
+
+    assert asyncio.events.Handle._run is ORIGINAL_RUN
+    assert monitor.capturing_until is None
+    assert sum(site["count"] for site in monitor.worst_sites()) == 1
@@ -0,0 +1,63 @@
+"""Tests de la file sortante: nouvelles tentatives réservées aux erreurs passagères"""
+import asyncio
+
+import pytest
+from telethon.errors import MessageIdInvalidError
+
+from fake_telegram import FakeTelegramClient
+from outbound import OutboundDispatcher, is_transient
+
+CHAT = -1002
+
+
+class ScriptedClient(FakeTelegramClient):
+    """Client factice dont les premiers envois lèvent les erreurs données"""
+
+    def __init__(self, errors):
+        super().__init__(latency=0, jitter=0)
+        self.errors = list(errors)
+
+    async def send_message(self, entity, message: str, **kwargs):
+        self.stats["send_message"] += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self._store(int(entity), message)
+
+
+def run_send(client) -> OutboundDispatcher:
+    dispatcher = OutboundDispatcher(client, chat_rate=1000, chat_burst=1000, max_retries=3)
+
+    async def send():
+        return await dispatcher.send_message(CHAT, "🔵12— JOKER")
+    try:
+        asyncio.run(send())
+    except Exception as e:
+        dispatcher.error = e
+    return dispatcher
+
+
+def test_transient_error_is_retried():
+    client = ScriptedClient([ConnectionError("réseau")])
+    dispatcher = run_send(client)
+    assert client.stats["send_message"] == 2
+    assert dispatcher.stats["sent"] == 1
+    assert dispatcher.stats["retries"] == 1
+
+
+def test_rejected_request_fails_without_retry():
+    client = ScriptedClient([MessageIdInvalidError(request=None)])
+    dispatcher = run_send(client)
+    assert client.stats["send_message"] == 1
+    assert dispatcher.stats["retries"] == 0
+    assert isinstance(dispatcher.error, MessageIdInvalidError)
+    assert not dispatcher._paused_until.get(CHAT)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ConnectionError("réseau"), True),
+    (asyncio.TimeoutError(), True),
+    (MessageIdInvalidError(request=None), False),
+    (ValueError("entité inconnue"), False),
+])
+def test_is_transient(error, expected):
+    assert is_transient(error) is expected
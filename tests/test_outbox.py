@@ -0,0 +1,71 @@
+"""Tests du journal des envois: déduplication et rapprochement après redémarrage"""
+import asyncio
+
+from fake_telegram import FakeTelegramClient
+from outbox import Outbox, STATUS_DONE, STATUS_FAILED, outbox_key, outbox_day
+
+TODAY = "2026-10-19"
+CHAT = -1002
+
+
+def new_client(noise: int = 5) -> FakeTelegramClient:
+    client = FakeTelegramClient(latency=0, jitter=0)
+    for index in range(noise):
+        client._store(CHAT, f"autre message {index}")
+    return client
+
+
+def sent(outbox: Outbox, client: FakeTelegramClient, key: str, text: str, game_number: int):
+    outbox.append(key, "prediction", CHAT, text, game_number, f"🔵{game_number}—")
+    outbox.complete(key, client._store(CHAT, text).id, text)
+
+
+def test_outbox_day():
+    assert outbox_day(outbox_key("prediction", 12, TODAY)) == TODAY
+    assert outbox_day("autre") is None
+
+
+def test_completed_send_is_deduplicated(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    client = new_client()
+    key = outbox_key("prediction", 1, TODAY)
+    sent(outbox, client, key, "🔵1— JOKER", 1)
+
+    assert outbox.append(key, "prediction", CHAT, "🔵1— JOKER", 1)["status"] == STATUS_DONE
+    outbox.close()
+
+
+def test_reconcile_finds_sent_message_and_returns_unsent(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    client = new_client()
+    sent(outbox, client, outbox_key("prediction", 1, TODAY), "🔵1— JOKER", 1)
+    outbox.append(outbox_key("prediction", 2, TODAY), "prediction", CHAT, "🔵2— JOKER", 2, "🔵2—")
+    published = client._store(CHAT, "🔵2— JOKER")  # Envoyé, arrêt avant la confirmation
+    outbox.append(outbox_key("prediction", 3, TODAY), "prediction", CHAT, "🔵3— JOKER", 3, "🔵3—")
+    outbox.close()
+
+    outbox = Outbox(path)
+    remaining = asyncio.run(outbox.reconcile(client, CHAT, day=TODAY))
+
+    assert [entry["key"] for entry in remaining] == [outbox_key("prediction", 3, TODAY)]
+    assert outbox.get(outbox_key("prediction", 2, TODAY))["message_id"] == published.id
+    outbox.close()
+
+
+def test_reconcile_expires_entries_from_previous_days(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    client = new_client()
+    old_key = outbox_key("prediction", 7, "2026-10-18")
+    outbox.append(old_key, "prediction", CHAT, "🔵7— JOKER", 7, "🔵7—")
+    outbox.append(outbox_key("edit", 7, "2026-10-18"), "edit", CHAT, "🔵7— ✅", 7, target_message_id=3)
+    outbox.close()
+
+    outbox = Outbox(path)
+    assert asyncio.run(outbox.reconcile(client, CHAT, day=TODAY)) == []
+    assert outbox.get(old_key)["status"] == STATUS_FAILED
+    assert outbox.stats["reconciled_expired"] == 2
+    # Au redémarrage suivant, plus rien à rejouer
+    assert asyncio.run(outbox.reconcile(client, CHAT, day=TODAY)) == []
+    outbox.close()
@@ -0,0 +1,95 @@
+"""Tests du routeur: ordre de traitement par chat, pause/reprise et attente ciblée"""
+import asyncio
+import random
+
+from fake_telegram import FakeEvent, FakeTelegramClient
+from router import KIND_EDITED, KIND_NEW, ChatRouter
+
+CHATS = (-1001, -1002, -1003)
+
+
+def test_events_of_a_chat_are_processed_in_order():
+    client = FakeTelegramClient(latency=0, jitter=0)
+    router = ChatRouter(max_queue_per_chat=4)
+    seen = {chat_id: [] for chat_id in CHATS}
+    rng = random.Random(7)
+
+    async def handler(event):
+        # Durées variables: un chat lent ne doit pas réordonner les autres
+        await asyncio.sleep(rng.random() * 0.002)
+        seen[event.chat_id].append(event.message.id)
+
+    for chat_id in CHATS:
+        router.add_route(chat_id, handler)
+
+    async def run():
+        for message_id in range(1, 51):
+            for chat_id in CHATS:
+                kind = KIND_EDITED if message_id % 5 == 0 else KIND_NEW
+                await router.dispatch(FakeEvent(client, chat_id, "x", message_id), kind)
+        assert not await router.dispatch(FakeEvent(client, -1009, "x", 1), KIND_NEW)
+        await router.join()
+
+    asyncio.run(run())
+
+    assert all(ids == list(range(1, 51)) for ids in seen.values())
+    assert router.stats["processed"] == 150
+    assert router.stats["dropped"] == 1
+    assert router.stats["backpressure_waits"] > 0
+
+
+def test_held_events_run_after_catch_up():
+    client = FakeTelegramClient(latency=0, jitter=0)
+    router = ChatRouter()
+    seen = []
+
+    async def handler(event):
+        seen.append(event.message.id)
+
+    router.add_route(-1001, handler)
+
+    async def run():
+        router.hold(-1001)
+        for message_id in (12, 13):
+            await router.dispatch(FakeEvent(client, -1001, "x", message_id), KIND_NEW)
+        assert router.first_held_id(-1001, after=10) == 12
+        await asyncio.sleep(0)
+        assert seen == []
+        # Rattrapage traité avant la reprise des messages retenus
+        for message_id in (10, 11):
+            await handler(FakeEvent(client, -1001, "x", message_id))
+        await router.release(-1001)
+        await router.join(-1001)
+
+    asyncio.run(run())
+
+    assert seen == [10, 11, 12, 13]
+
+
+def test_join_waits_only_on_the_given_chat():
+    client = FakeTelegramClient(latency=0, jitter=0)
+    router = ChatRouter()
+    blocked = None
+    done = []
+
+    async def slow(event):
+        await blocked.wait()
+
+    async def fast(event):
+        done.append(event.message.id)
+
+    router.add_route(-1001, slow)
+    router.add_route(-1002, fast)
+
+    async def run():
+        nonlocal blocked
+        blocked = asyncio.Event()
+        await router.dispatch(FakeEvent(client, -1001, "x", 1), KIND_NEW)
+        await router.dispatch(FakeEvent(client, -1002, "x", 1), KIND_NEW)
+        await asyncio.wait_for(router.join(-1002), 1.0)
+        assert done == [1]
+        assert router.queue_depth() == 0 and router.stats["processed"] == 1
+        blocked.set()
+        await router.join()
+
+    asyncio.run(run())
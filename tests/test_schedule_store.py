@@ -0,0 +1,35 @@
+"""Tests du stockage des planifications: index par statut et compteurs par jour"""
+from yaml_manager import SchedulePartition, ScheduleStore
+
+
+def entry(launch_at: str, launched: bool = False, verified: bool = False, statut: str = "⌛") -> dict:
+    return {"launch_at": launch_at, "heure_lancement": launch_at[11:], "statut": statut,
+            "launched": launched, "verified": verified, "message_id": 1 if launched else None}
+
+
+def test_awaiting_verification_follows_status_updates():
+    partition = SchedulePartition("pair", {
+        "N0800@2026-10-19": entry("2026-10-19 07:58", launched=True),
+        "N0900@2026-10-19": entry("2026-10-19 08:57"),
+        "N0700@2026-10-19": entry("2026-10-19 06:59", launched=True, verified=True, statut="✅0️⃣"),
+    })
+    assert [numero for numero, _ in partition.awaiting_verification()] == ["N0800@2026-10-19"]
+
+    partition.update("N0800@2026-10-19", {"verified": True, "statut": "✅1️⃣"})
+    partition.update("N0900@2026-10-19", {"launched": True})
+    assert [numero for numero, _ in partition.awaiting_verification()] == ["N0900@2026-10-19"]
+
+
+def test_stats_by_launch_day(tmp_path):
+    store = ScheduleStore(str(tmp_path))
+    partition = store.partition("pair", load=False)
+    partition.add("N2350@2026-10-19", entry("2026-10-19 23:47", launched=True))
+    partition.add("N0050@2026-10-20", entry("2026-10-20 00:48"))
+    partition.add("N0150@2026-10-20", entry("2026-10-20 01:47"))
+
+    assert store.stats("2026-10-19") == {"total": 1, "launched": 1, "verified": 0, "partitions": 1}
+    assert store.stats("2026-10-20")["total"] == 2
+
+    partition.remove("N2350@2026-10-19")
+    assert store.stats("2026-10-19")["total"] == 0
+    assert store.stats()["total"] == 2
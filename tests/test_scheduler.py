@@ -0,0 +1,48 @@
+"""Tests du planificateur: lancements automatiques sur un plan de plusieurs jours"""
+import asyncio
+from datetime import datetime
+
+from fake_telegram import FakeTelegramClient
+from predictor import CardPredictor
+from scheduler import PredictionScheduler, game_number_of
+from yaml_manager import ScheduleStore
+
+
+def new_scheduler(tmp_path, plan_days: int = 0) -> PredictionScheduler:
+    client = FakeTelegramClient(latency=0, jitter=0)
+    return PredictionScheduler(client, CardPredictor(), -1001, -1002,
+                               schedule_file=str(tmp_path / "pair.yaml"), plan_days=plan_days,
+                               store=ScheduleStore(str(tmp_path)))
+
+
+def test_same_game_number_launches_on_each_day(tmp_path):
+    scheduler = new_scheduler(tmp_path, plan_days=3)
+    scheduler.extend_plan(3, datetime(2026, 10, 19, 8, 0))
+    entries = sorted(scheduler.schedule_data.items(), key=lambda item: scheduler.launch_at_key(item[1]))
+
+    async def launch_all():
+        return [await scheduler.launch_prediction(numero, data, persist=False) for numero, data in entries]
+
+    assert all(asyncio.run(launch_all()))
+    assert all(data["launched"] for data in scheduler.schedule_data.values())
+    # Le même HHMM est bien présent sur plusieurs jours
+    numbers = [game_number_of(numero) for numero, _ in entries]
+    assert len(numbers) > len(set(numbers))
+
+
+def test_entry_launched_twice_is_rejected(tmp_path):
+    scheduler = new_scheduler(tmp_path)
+    scheduler.extend_plan(1, datetime(2026, 10, 19, 8, 0))
+    numero, data = next(iter(scheduler.schedule_data.items()))
+
+    assert asyncio.run(scheduler.launch_prediction(numero, data, persist=False))
+    assert not asyncio.run(scheduler.launch_prediction(numero, data, persist=False))
+
+
+def test_pending_manual_prediction_blocks_auto_launch(tmp_path):
+    scheduler = new_scheduler(tmp_path)
+    scheduler.extend_plan(1, datetime(2026, 10, 19, 8, 0))
+    numero, data = next(iter(scheduler.schedule_data.items()))
+    scheduler.predictor.prediction_status[game_number_of(numero)] = '⌛'
+
+    assert not asyncio.run(scheduler.launch_prediction(numero, data, persist=False))
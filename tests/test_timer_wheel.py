@@ -0,0 +1,51 @@
+"""Tests de la roue temporelle: lancements au passage de minuit et sur un plan de plusieurs jours"""
+import asyncio
+from datetime import datetime, timedelta
+
+from fake_telegram import FakeTelegramClient
+from predictor import CardPredictor
+from scheduler import SchedulerEngine, TimerWheel
+from yaml_manager import PLAN_TIME_FORMAT
+
+
+def test_wheel_slots_pop_once():
+    wheel = TimerWheel()
+    wheel.schedule(1439, "a")
+    wheel.schedule(0, "b")
+    wheel.schedule(0, "c")
+    wheel.cancel(0, "c")
+
+    assert wheel.size == 2
+    assert list(wheel.pop_slot(1439)) == ["a"]
+    assert list(wheel.pop_slot(0)) == ["b"]
+    assert not list(wheel.pop_slot(0))
+    assert wheel.size == 0
+
+
+def test_engine_fires_each_entry_at_its_minute_across_days(tmp_path):
+    client = FakeTelegramClient(latency=0, jitter=0)
+    engine = SchedulerEngine(client, CardPredictor, str(tmp_path), plan_days=3)
+    scheduler = engine.add_channel(-1001, -1002)
+    start = datetime(2026, 10, 19, 22, 0)
+    scheduler.set_schedule_data({})
+    scheduler.extend_plan(3, start)
+    expected = {numero: scheduler.launch_at_key(data) for numero, data in scheduler.schedule_data.items()}
+    # Le plan franchit plusieurs minuits et répète des HHMM d'un jour à l'autre
+    assert len({key[:10] for key in expected.values()}) >= 3
+
+    fired = {}
+
+    async def run_minutes():
+        engine._last_minute = None
+        now = start
+        while now <= start + timedelta(days=3, hours=2):
+            await engine.tick(now)
+            for numero, data in scheduler.schedule_data.items():
+                if data["launched"] and numero not in fired:
+                    fired[numero] = now.strftime(PLAN_TIME_FORMAT)
+            now += timedelta(minutes=1)
+
+    asyncio.run(run_minutes())
+
+    assert fired == expected
+    assert engine.wheel.size == 0
@@ -0,0 +1,99 @@
+"""
+Spans de traçage du pipeline du canal stats (endpoint /debug/trace).
+
+Chaque message reçoit un identifiant de trace ; chaque étape de son traitement
+enregistre un span (étape, numéro de jeu concerné, début, durée) dans un
+tampon circulaire préalloué. L'enregistrement écrit dans des tableaux
+`array` existants : aucun objet n'est créé par span sur le chemin critique.
+"""
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+# Étapes de handle_messages (index stocké dans le tampon)
+STAGES = ("route", "parse", "pending_edit", "should_predict", "broadcast", "verify",
+          "expiry", "scheduler_verify", "persist", "report")
+(STAGE_ROUTE, STAGE_PARSE, STAGE_PENDING_EDIT, STAGE_SHOULD_PREDICT, STAGE_BROADCAST, STAGE_VERIFY,
+ STAGE_EXPIRY, STAGE_SCHEDULER_VERIFY, STAGE_PERSIST, STAGE_REPORT) = range(len(STAGES))
+
+
+class SpanRing:
+    """Tampon circulaire de spans à taille fixe"""
+
+    def __init__(self, size: int = 8192):
+        """
+        Args:
+            size: Nombre de spans conservés (les plus anciens sont écrasés)
+        """
+        self.size = size
+        self.trace_ids = array('q', [0]) * size
+        self.games = array('q', [0]) * size
+        self.stages = array('b', [0]) * size
+        self.starts = array('d', [0.0]) * size
+        self.durations = array('d', [0.0]) * size
+        self.written = 0  # Nombre total de spans enregistrés
+        self._last_trace = 0
+        # Conversion perf_counter -> horodatage
+        self._wall_offset = time.time() - time.perf_counter()
+
+    def new_trace(self) -> int:
+        self._last_trace += 1
+        return self._last_trace
+
+    def record(self, trace_id: int, stage: int, game: Optional[int], started_at: float) -> float:
+        """Enregistre un span terminé maintenant; retourne l'instant de fin (début du span suivant)"""
+        now = time.perf_counter()
+        i = self.written % self.size
+        self.trace_ids[i] = trace_id
+        self.games[i] = game or 0
+        self.stages[i] = stage
+        self.starts[i] = started_at
+        self.durations[i] = now - started_at
+        self.written += 1
+        return now
+
+    def _indexes(self):
+        """Index des spans présents, du plus ancien au plus récent"""
+        count = min(self.written, self.size)
+        first = self.written - count
+        return [(first + n) % self.size for n in range(count)]
+
+    def traces(self, game: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Traces les plus récentes (celles touchant le jeu `game` si précisé)"""
+        indexes = self._indexes()
+        if game is not None:
+            wanted = {self.trace_ids[i] for i in indexes if self.games[i] == game}
+        else:
+            wanted = set()
+            for i in reversed(indexes):
+                if len(wanted) >= limit:
+                    break
+                wanted.add(self.trace_ids[i])
+
+        grouped: Dict[int, List[int]] = {}
+        for i in indexes:
+            trace_id = self.trace_ids[i]
+            if trace_id in wanted:
+                grouped.setdefault(trace_id, []).append(i)
+
+        result = []
+        for trace_id in sorted(grouped)[-limit:]:
+            spans = grouped[trace_id]
+            origin = min(self.starts[i] for i in spans)
+            end = max(self.starts[i] + self.durations[i] for i in spans)
+            result.append({
+                "trace_id": trace_id,
+                "games": sorted({self.games[i] for i in spans if self.games[i]}),
+                "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(origin + self._wall_offset)),
+                "total_ms": round((end - origin) * 1000, 3),
+                "spans": [{
+                    "stage": STAGES[self.stages[i]],
+                    "game": self.games[i] or None,
+                    "offset_ms": round((self.starts[i] - origin) * 1000, 3),
+                    "duration_ms": round(self.durations[i] * 1000, 3),
+                } for i in spans],
+            })
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"size": self.size, "spans_recorded": self.written, "traces": self._last_trace}
@@ -3,12 +3,291 @@ Gestionnaire de données YAML pour le bot Telegram de prédiction
 Remplace complètement la base de données PostgreSQL par des fichiers YAML
 """
 import os
+import asyncio
+import threading
 import yaml
 import json
+import bisect
 import hashlib
 from datetime import datetime, date, time, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
+from time import perf_counter
+
+from metrics import STORAGE_SECONDS
+
+SCHEDULE_WRITE_SECONDS = STORAGE_SECONDS.labels("schedule")
+YAML_WRITE_SECONDS = STORAGE_SECONDS.labels("yaml")
+
+# Sérialisation native (libyaml) quand elle est disponible, même format de fichier
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Format des dates absolues de la planification (tri lexicographique = tri chronologique)
+PLAN_TIME_FORMAT = "%Y-%m-%d %H:%M"
+ABSOLUTE_FIELDS = {"heure_lancement": "launch_at", "heure_prediction": "prediction_at"}
+
+
+def entry_datetime(data: Dict[str, Any], field: str, now: Optional[datetime] = None) -> datetime:
+    """Date absolue d'une heure HH:MM de la planification (première occurrence après génération)"""
+    absolute = data.get(ABSOLUTE_FIELDS.get(field, ""))
+    if absolute:
+        return datetime.strptime(absolute, PLAN_TIME_FORMAT)
+    if now is None:
+        now = datetime.now()
+    try:
+        reference = datetime.strptime(data["generated_at"], "%Y-%m-%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        reference = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    slot = datetime.strptime(data[field], "%H:%M").time()
+    moment = datetime.combine(reference.date(), slot)
+    if moment < reference.replace(second=0, microsecond=0):
+        moment += timedelta(days=1)
+    return moment
+
+
+class SchedulePartition:
+    """
+    Planification d'une partition (paire de canaux ou jour) avec index en mémoire :
+    par numéro (le dict lui-même), par statut (les ⌛ sont celles à lancer ou à
+    vérifier) et par heure de lancement (liste triée des entrées encore à lancer).
+    Les compteurs, globaux et par jour de lancement, sont maintenus à chaque mutation.
+    """
+
+    def __init__(self, name: str, entries: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.entries: Dict[str, Any] = {}
+        self.by_status: Dict[str, set] = {}
+        self.upcoming: List[Tuple[str, str]] = []
+        self.counters = {"total": 0, "launched": 0, "verified": 0}
+        self.counters_by_day: Dict[str, Dict[str, int]] = {}
+        if entries:
+            self.replace(entries)
+
+    @staticmethod
+    def launch_key(data: Dict[str, Any]) -> str:
+        """Date absolue de lancement d'une entrée (format PLAN_TIME_FORMAT)"""
+        launch_at = data.get("launch_at")
+        if launch_at:
+            return launch_at
+        return entry_datetime(data, "heure_lancement").strftime(PLAN_TIME_FORMAT)
+
+    @staticmethod
+    def is_pending(data: Dict[str, Any]) -> bool:
+        """Entrée encore à lancer"""
+        return not data.get("launched") and data.get("statut") == "⌛"
+
+    def replace(self, entries: Dict[str, Any]):
+        """Remplace toutes les entrées et reconstruit les index (O(n log n))"""
+        self.entries = entries
+        self.by_status = {}
+        self.counters = {"total": 0, "launched": 0, "verified": 0}
+        self.counters_by_day = {}
+        upcoming = []
+        for numero, data in entries.items():
+            self._count(numero, data, 1)
+            if self.is_pending(data):
+                upcoming.append((self.launch_key(data), numero))
+        upcoming.sort()
+        self.upcoming = upcoming
+
+    def _count(self, numero: str, data: Dict[str, Any], delta: int):
+        # Jour stable (sans dépendre de l'heure courante): lancement daté, sinon date de génération
+        day = (data.get("launch_at") or data.get("generated_at") or "")[:10]
+        day_counters = self.counters_by_day.get(day)
+        if day_counters is None:
+            day_counters = self.counters_by_day[day] = {"total": 0, "launched": 0, "verified": 0}
+        for counters in (self.counters, day_counters):
+            counters["total"] += delta
+            if data.get("launched"):
+                counters["launched"] += delta
+            if data.get("verified"):
+                counters["verified"] += delta
+        if not day_counters["total"]:
+            del self.counters_by_day[day]
+        status = data.get("statut")
+        if delta > 0:
+            self.by_status.setdefault(status, set()).add(numero)
+        else:
+            numeros = self.by_status.get(status)
+            if numeros:
+                numeros.discard(numero)
+
+    def _index(self, numero: str, data: Dict[str, Any]):
+        self._count(numero, data, 1)
+        if self.is_pending(data):
+            bisect.insort(self.upcoming, (self.launch_key(data), numero))
+
+    def _unindex(self, numero: str, data: Dict[str, Any]):
+        self._count(numero, data, -1)
+        if self.is_pending(data):
+            item = (self.launch_key(data), numero)
+            index = bisect.bisect_left(self.upcoming, item)
+            if index < len(self.upcoming) and self.upcoming[index] == item:
+                del self.upcoming[index]
+
+    def add(self, numero: str, data: Dict[str, Any]):
+        """Ajoute (ou remplace) une entrée"""
+        if numero in self.entries:
+            self._unindex(numero, self.entries[numero])
+        self.entries[numero] = data
+        self._index(numero, data)
+
+    def update(self, numero: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Met à jour les champs d'une entrée en gardant les index cohérents"""
+        data = self.entries[numero]
+        self._unindex(numero, data)
+        data.update(updates)
+        self._index(numero, data)
+        return data
+
+    def remove(self, numero: str) -> Dict[str, Any]:
+        """Retire une entrée"""
+        data = self.entries.pop(numero)
+        self._unindex(numero, data)
+        return data
+
+    def with_status(self, status: str) -> set:
+        """Numéros des entrées ayant ce statut"""
+        return self.by_status.get(status, set())
+
+    def awaiting_verification(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Entrées lancées et pas encore vérifiées (parmi les ⌛, sans parcourir l'historique)"""
+        entries = self.entries
+        return [(numero, entries[numero]) for numero in self.with_status("⌛")
+                if entries[numero].get("launched") and not entries[numero].get("verified")]
+
+    def get_upcoming(self, count: int = 10, now: Optional[datetime] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Les `count` prochains lancements à partir de maintenant, en O(log n + count)"""
+        if now is None:
+            now = datetime.now()
+        start = bisect.bisect_left(self.upcoming, (now.strftime(PLAN_TIME_FORMAT), ""))
+        return [(numero, self.entries[numero]) for _, numero in self.upcoming[start:start + count]]
+
+
+class ScheduleStore:
+    """
+    Stockage unique des planifications automatiques : une partition par fichier YAML,
+    gardée en mémoire et indexée. Le planificateur et les statistiques lisent et
+    écrivent au même endroit, chaque planification n'est sérialisée qu'une fois.
+
+    Depuis la boucle asyncio, `save_later` regroupe les sauvegardes : les partitions
+    modifiées sont écrites `flush_delay` secondes plus tard, dans un thread, à partir
+    d'un instantané pris dans la boucle.
+    """
+
+    def __init__(self, directory, flush_delay: float = 1.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.partitions: Dict[str, SchedulePartition] = {}
+        self.flush_delay = flush_delay
+        self.dirty: set = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def path_for(self, name: str) -> Path:
+        """Fichier YAML d'une partition"""
+        return self.directory / f"{name}.yaml"
+
+    def read(self, name: str) -> Dict[str, Any]:
+        """Lit une partition depuis le disque (sans toucher à la version en mémoire)"""
+        path = self.path_for(name)
+        try:
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = yaml.load(f, Loader=YAML_LOADER) or {}
+                return data if isinstance(data, dict) else {}
+        except Exception as e:
+            print(f"❌ Erreur chargement {path}: {e}")
+        return {}
+
+    def partition(self, name: str, load: bool = True) -> SchedulePartition:
+        """Partition en mémoire, chargée depuis le disque au premier accès (vide si load=False)"""
+        partition = self.partitions.get(name)
+        if partition is None:
+            partition = self.partitions[name] = SchedulePartition(name, self.read(name) if load else None)
+        return partition
+
+    def _write(self, name: str, entries: Dict[str, Any]):
+        """Écrit une partition via un fichier temporaire (jamais de fichier à moitié écrit)"""
+        path = self.path_for(name)
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        started_at = perf_counter()
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                yaml.dump(entries, f, Dumper=YAML_DUMPER, allow_unicode=True, default_flow_style=False, indent=2)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde {path}: {e}")
+        SCHEDULE_WRITE_SECONDS.observe(perf_counter() - started_at)
+
+    def save(self, name: str):
+        """Sérialise une partition dans son fichier (synchrone)"""
+        self.dirty.discard(name)
+        self._write(name, self.partition(name).entries)
+
+    def save_later(self, name: str):
+        """Marque une partition à sauvegarder; hors boucle asyncio, l'écriture est immédiate"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save(name)
+            return
+        self.dirty.add(name)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_soon())
+
+    async def _flush_soon(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Écrit les partitions modifiées dans un thread, une à la fois (écritures jamais concurrentes)"""
+        loop = asyncio.get_running_loop()
+        async with self._flush_lock:
+            while self.dirty:
+                name = self.dirty.pop()
+                partition = self.partitions.get(name)
+                if partition is None:
+                    continue  # Supprimée entre-temps
+                snapshot = {numero: dict(data) for numero, data in partition.entries.items()}
+                await loop.run_in_executor(None, self._write, name, snapshot)
+
+    def flush_pending(self):
+        """Écrit immédiatement les partitions encore en attente (arrêt du bot)"""
+        while self.dirty:
+            name = self.dirty.pop()
+            if name in self.partitions:
+                self._write(name, self.partitions[name].entries)
+
+    def delete(self, name: str):
+        """Supprime une partition (mémoire et disque)"""
+        self.partitions.pop(name, None)
+        self.dirty.discard(name)
+        path = self.path_for(name)
+        if path.exists():
+            path.unlink()
+
+    def partition_names(self) -> List[str]:
+        """Noms des partitions connues (disque et mémoire)"""
+        names = {path.stem for path in self.directory.glob("*.yaml")}
+        names.update(self.partitions)
+        return sorted(names)
+
+    def stats(self, day: Optional[str] = None) -> Dict[str, int]:
+        """Compteurs des partitions chargées en mémoire (aucune lecture disque)
+
+        Args:
+            day: Jour AAAA-MM-JJ; seules les entrées dont le lancement est prévu ce
+                jour-là sont comptées (compteurs par jour des partitions, sans parcours)
+        """
+        totals = {"total": 0, "launched": 0, "verified": 0}
+        for partition in self.partitions.values():
+            counters = partition.counters if day is None else partition.counters_by_day.get(day, {})
+            for key, value in counters.items():
+                totals[key] += value
+        totals["partitions"] = len(self.partitions)
+        return totals
 
 
 class YAMLDataManager:
@@ -24,9 +303,13 @@ class YAMLDataManager:
         self.predictions_file = self.data_dir / "predictions.yaml"
         self.auto_predictions_file = self.data_dir / "auto_predictions.yaml"
         self.message_log_file = self.data_dir / "message_log.yaml"
+
+        # Planifications automatiques: stockage unique partagé avec le planificateur
+        self.schedule_store = ScheduleStore(self.data_dir / "schedules")
         
         # Initialiser les fichiers s'ils n'existent pas
         self._init_files()
+        self._migrate_auto_predictions()
         print("✅ Gestionnaire YAML initialisé")
     
     def _init_files(self):
@@ -34,7 +317,6 @@ class YAMLDataManager:
         default_structures = {
             self.config_file: {},
             self.predictions_file: [],
-            self.auto_predictions_file: {},
             self.message_log_file: []
         }
         
@@ -42,6 +324,19 @@ class YAMLDataManager:
             if not file_path.exists():
                 self._save_yaml(file_path, default_content)
     
+    def _migrate_auto_predictions(self):
+        """Importe l'ancien auto_predictions.yaml (une clé par jour) dans le stockage unique"""
+        if not self.auto_predictions_file.exists():
+            return
+        auto_predictions = self._load_yaml(self.auto_predictions_file)
+        if isinstance(auto_predictions, dict):
+            for day, schedule_data in auto_predictions.items():
+                if isinstance(schedule_data, dict) and not self.schedule_store.path_for(str(day)).exists():
+                    self.schedule_store.partition(str(day)).replace(schedule_data)
+                    self.schedule_store.save(str(day))
+        self.auto_predictions_file.rename(self.auto_predictions_file.with_suffix(".yaml.migrated"))
+        print(f"📦 {self.auto_predictions_file.name} migré vers {self.schedule_store.directory}")
+
     def _load_yaml(self, file_path: Path) -> Any:
         """Charge un fichier YAML"""
         try:
@@ -55,11 +350,13 @@ class YAMLDataManager:
     
     def _save_yaml(self, file_path: Path, data: Any):
         """Sauvegarde des données dans un fichier YAML"""
+        started_at = perf_counter()
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
                 yaml.dump(data, f, allow_unicode=True, default_flow_style=False, indent=2)
         except Exception as e:
             print(f"❌ Erreur sauvegarde {file_path}: {e}")
+        YAML_WRITE_SECONDS.observe(perf_counter() - started_at)
     
     def set_config(self, key: str, value: Any):
         """Sauvegarde une valeur de configuration"""
@@ -147,17 +444,10 @@ class YAMLDataManager:
     def save_auto_prediction_schedule(self, schedule_data: Dict[str, Any]):
         """Sauvegarde la planification automatique complète"""
         try:
-            # Ajouter la date courante pour organiser par jour
+            # Une partition par jour dans le stockage unique
             today = date.today().isoformat()
-            auto_predictions = self._load_yaml(self.auto_predictions_file)
-            
-            if not isinstance(auto_predictions, dict):
-                auto_predictions = {}
-            
-            # Remplacer la planification du jour
-            auto_predictions[today] = schedule_data
-            
-            self._save_yaml(self.auto_predictions_file, auto_predictions)
+            self.schedule_store.partition(today).replace(schedule_data)
+            self.schedule_store.save_later(today)
         except Exception as e:
             print(f"❌ Erreur save_auto_prediction_schedule: {e}")
     
@@ -165,12 +455,7 @@ class YAMLDataManager:
         """Charge la planification automatique du jour"""
         try:
             today = date.today().isoformat()
-            auto_predictions = self._load_yaml(self.auto_predictions_file)
-            
-            if not isinstance(auto_predictions, dict):
-                return {}
-            
-            return auto_predictions.get(today, {})
+            return self.schedule_store.partition(today).entries
         except Exception as e:
             print(f"❌ Erreur load_auto_prediction_schedule: {e}")
             return {}
@@ -179,17 +464,11 @@ class YAMLDataManager:
         """Met à jour une prédiction automatique"""
         try:
             today = date.today().isoformat()
-            auto_predictions = self._load_yaml(self.auto_predictions_file)
+            partition = self.schedule_store.partition(today)
             
-            if not isinstance(auto_predictions, dict):
-                auto_predictions = {}
-            
-            if today not in auto_predictions:
-                auto_predictions[today] = {}
-            
-            if numero in auto_predictions[today]:
-                auto_predictions[today][numero].update(updates)
-                self._save_yaml(self.auto_predictions_file, auto_predictions)
+            if numero in partition.entries:
+                partition.update(numero, updates)
+                self.schedule_store.save_later(today)
         except Exception as e:
             print(f"❌ Erreur update_auto_prediction: {e}")
     
@@ -252,20 +531,8 @@ class YAMLDataManager:
                 'pending': len([p for p in predictions if p.get('status') == '⌛'])
             }
             
-            # Statistiques des prédictions automatiques
-            today = date.today().isoformat()
-            auto_predictions = self._load_yaml(self.auto_predictions_file)
-            
-            if not isinstance(auto_predictions, dict):
-                auto_predictions = {}
-            
-            today_schedule = auto_predictions.get(today, {})
-            
-            auto_stats = {
-                'total': len(today_schedule),
-                'launched': len([p for p in today_schedule.values() if p.get('launched', False)]),
-                'verified': len([p for p in today_schedule.values() if p.get('verified', False)])
-            }
+            # Statistiques des prédictions automatiques du jour (partitions chargées du stockage unique)
+            auto_stats = self.schedule_store.stats(date.today().isoformat())
             
             return {
                 'manual': manual_stats,
@@ -280,16 +547,18 @@ class YAMLDataManager:
         try:
             cutoff_date = datetime.now().date() - timedelta(days=days_to_keep)
             
-            # Nettoyer les anciennes prédictions automatiques
-            auto_predictions = self._load_yaml(self.auto_predictions_file)
-            if isinstance(auto_predictions, dict):
-                cleaned = {
-                    date_str: data for date_str, data in auto_predictions.items()
-                    if datetime.fromisoformat(date_str).date() >= cutoff_date
-                }
-                if len(cleaned) != len(auto_predictions):
-                    self._save_yaml(self.auto_predictions_file, cleaned)
-                    print(f"🧹 Nettoyage: {len(auto_predictions) - len(cleaned)} anciennes planifications supprimées")
+            # Nettoyer les anciennes planifications journalières (les partitions de canaux sont conservées)
+            removed = 0
+            for name in self.schedule_store.partition_names():
+                try:
+                    partition_date = date.fromisoformat(name)
+                except ValueError:
+                    continue
+                if partition_date < cutoff_date:
+                    self.schedule_store.delete(name)
+                    removed += 1
+            if removed:
+                print(f"🧹 Nettoyage: {removed} anciennes planifications supprimées")
         except Exception as e:
             print(f"❌ Erreur cleanup_old_data: {e}")
 